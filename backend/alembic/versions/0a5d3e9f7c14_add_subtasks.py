@@ -0,0 +1,95 @@
+"""add_subtasks
+
+Revision ID: 0a5d3e9f7c14
+Revises: f7c2a8e05b91
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0a5d3e9f7c14"
+down_revision: Union[str, Sequence[str], None] = "f7c2a8e05b91"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the task hierarchy (parent_id, path) and subtree rollups."""
+    op.add_column(
+        "tasks",
+        sa.Column("parent_id", sa.Integer(), nullable=True),
+        schema="faros",
+    )
+    # Existing tasks are all top-level with no subtasks, so the defaults are right
+    op.add_column(
+        "tasks",
+        sa.Column("path", sa.String(length=255), server_default="/", nullable=False),
+        schema="faros",
+    )
+    op.add_column(
+        "tasks",
+        sa.Column("subtask_count", sa.Integer(), server_default="0", nullable=False),
+        schema="faros",
+    )
+    op.add_column(
+        "tasks",
+        sa.Column("subtasks_completed", sa.Integer(), server_default="0", nullable=False),
+        schema="faros",
+    )
+    op.create_foreign_key(
+        "tasks_parent_id_fkey",
+        "tasks",
+        "tasks",
+        ["parent_id"],
+        ["id"],
+        source_schema="faros",
+        referent_schema="faros",
+    )
+
+    # Build the indexes without blocking writes on large task tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_parent_id",
+            "tasks",
+            ["parent_id"],
+            unique=False,
+            schema="faros",
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tasks_path",
+            "tasks",
+            ["path"],
+            unique=False,
+            schema="faros",
+            postgresql_ops={"path": "text_pattern_ops"},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Drop the task hierarchy and rollups."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_path",
+            table_name="tasks",
+            schema="faros",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_tasks_parent_id",
+            table_name="tasks",
+            schema="faros",
+            postgresql_concurrently=True,
+        )
+    op.drop_constraint("tasks_parent_id_fkey", "tasks", schema="faros", type_="foreignkey")
+    op.drop_column("tasks", "subtasks_completed", schema="faros")
+    op.drop_column("tasks", "subtask_count", schema="faros")
+    op.drop_column("tasks", "path", schema="faros")
+    op.drop_column("tasks", "parent_id", schema="faros")
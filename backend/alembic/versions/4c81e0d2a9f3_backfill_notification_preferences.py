@@ -0,0 +1,41 @@
+"""backfill_notification_preferences
+
+Revision ID: 4c81e0d2a9f3
+Revises: 9d3f2c6117ac
+Create Date: 2026-10-19 09:12:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4c81e0d2a9f3"
+down_revision: Union[str, Sequence[str], None] = "9d3f2c6117ac"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create default preferences for users registered before eager creation."""
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO faros.notification_preferences (user_id, email_verified)
+            SELECT u.id, COALESCE(u.email_verified, false)
+            FROM faros.users u
+            WHERE NOT EXISTS (
+                SELECT 1 FROM faros.notification_preferences p
+                WHERE p.user_id = u.id
+            )
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    """Backfilled rows are indistinguishable from user-created ones; nothing to undo."""
+    pass
@@ -0,0 +1,63 @@
+"""add_activity_logs_task_id
+
+Revision ID: a3d6f1b08e27
+Revises: e5a90c3b7f12
+Create Date: 2026-10-19 12:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3d6f1b08e27"
+down_revision: Union[str, Sequence[str], None] = "e5a90c3b7f12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Promote details->task_id to a column indexed with created_at."""
+    op.add_column(
+        "activity_logs",
+        sa.Column("task_id", sa.Integer(), nullable=True),
+        schema="faros",
+    )
+
+    op.execute(
+        """
+        UPDATE faros.activity_logs
+        SET task_id = resource_id
+        WHERE resource_type = 'task'
+        """
+    )
+    op.execute(
+        """
+        UPDATE faros.activity_logs
+        SET task_id = (details ->> 'task_id')::integer
+        WHERE resource_type IN ('comment', 'file')
+          AND details ->> 'task_id' ~ '^[0-9]+$'
+        """
+    )
+
+    # Created on the partitioned parent, so every partition gets its own copy
+    op.create_index(
+        "ix_activity_logs_task_id_created_at",
+        "activity_logs",
+        ["task_id", "created_at"],
+        unique=False,
+        schema="faros",
+    )
+
+
+def downgrade() -> None:
+    """Drop the activity_logs task_id column."""
+    op.drop_index(
+        "ix_activity_logs_task_id_created_at",
+        table_name="activity_logs",
+        schema="faros",
+    )
+    op.drop_column("activity_logs", "task_id", schema="faros")
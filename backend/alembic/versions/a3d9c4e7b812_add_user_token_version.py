@@ -0,0 +1,33 @@
+"""add_user_token_version
+
+Revision ID: a3d9c4e7b812
+Revises: f1b6d83a2c57
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3d9c4e7b812"
+down_revision: Union[str, Sequence[str], None] = "f1b6d83a2c57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add users.token_version for access token revocation."""
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), server_default="0", nullable=False),
+        schema="faros",
+    )
+
+
+def downgrade() -> None:
+    """Drop users.token_version."""
+    op.drop_column("users", "token_version", schema="faros")
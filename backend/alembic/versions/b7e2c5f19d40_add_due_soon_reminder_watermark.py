@@ -0,0 +1,52 @@
+"""add_due_soon_reminder_watermark
+
+Revision ID: b7e2c5f19d40
+Revises: 4c81e0d2a9f3
+Create Date: 2026-10-19 10:05:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2c5f19d40"
+down_revision: Union[str, Sequence[str], None] = "4c81e0d2a9f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add reminder watermark and partial index for the due-soon sweep."""
+    op.add_column(
+        "tasks",
+        sa.Column("due_reminder_sent_for", sa.Date(), nullable=True),
+        schema="faros",
+    )
+
+    # Build the index without blocking writes on large task tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_open_due_date",
+            "tasks",
+            ["due_date", "id"],
+            unique=False,
+            schema="faros",
+            postgresql_where=sa.text("NOT completed"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Drop reminder watermark and partial index."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_open_due_date",
+            table_name="tasks",
+            schema="faros",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("tasks", "due_reminder_sent_for", schema="faros")
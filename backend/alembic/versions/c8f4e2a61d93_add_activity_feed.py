@@ -0,0 +1,71 @@
+"""add_activity_feed
+
+Revision ID: c8f4e2a61d93
+Revises: a3d6f1b08e27
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c8f4e2a61d93"
+down_revision: Union[str, Sequence[str], None] = "a3d6f1b08e27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the fan-out activity feed and backfill it from activity_logs."""
+    op.create_table(
+        "activity_feed",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("activity_id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=True),
+        sa.Column("actor_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["faros.users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "created_at", "activity_id"),
+        schema="faros",
+    )
+    op.create_index(
+        "ix_activity_feed_task_id",
+        "activity_feed",
+        ["task_id"],
+        unique=False,
+        schema="faros",
+    )
+
+    # Every entry is visible to its actor
+    op.execute(
+        """
+        INSERT INTO faros.activity_feed
+            (user_id, created_at, activity_id, task_id, actor_id)
+        SELECT user_id, created_at, id, task_id, user_id
+        FROM faros.activity_logs
+        """
+    )
+    # ...and to everyone the task is shared with, except task created/deleted
+    op.execute(
+        """
+        INSERT INTO faros.activity_feed
+            (user_id, created_at, activity_id, task_id, actor_id)
+        SELECT ts.shared_with_user_id, al.created_at, al.id, al.task_id, al.user_id
+        FROM faros.activity_logs al
+        JOIN faros.task_shares ts ON ts.task_id = al.task_id
+        WHERE NOT (al.resource_type = 'task' AND al.action IN ('created', 'deleted'))
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop the activity feed."""
+    op.drop_index(
+        "ix_activity_feed_task_id", table_name="activity_feed", schema="faros"
+    )
+    op.drop_table("activity_feed", schema="faros")
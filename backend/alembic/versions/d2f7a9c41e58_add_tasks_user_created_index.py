@@ -0,0 +1,35 @@
+"""add_tasks_user_created_index
+
+Revision ID: d2f7a9c41e58
+Revises: a3d9c4e7b812
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d2f7a9c41e58"
+down_revision: Union[str, Sequence[str], None] = "a3d9c4e7b812"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index tasks by (user_id, created_at, id) for the visible-tasks listing."""
+    op.create_index(
+        "ix_tasks_user_id_created_at_id",
+        "tasks",
+        ["user_id", "created_at", "id"],
+        unique=False,
+        schema="faros",
+    )
+
+
+def downgrade() -> None:
+    """Drop the visible-tasks listing index."""
+    op.drop_index(
+        "ix_tasks_user_id_created_at_id", table_name="tasks", schema="faros"
+    )
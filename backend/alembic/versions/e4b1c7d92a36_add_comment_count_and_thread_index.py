@@ -0,0 +1,60 @@
+"""add_comment_count_and_thread_index
+
+Revision ID: e4b1c7d92a36
+Revises: d2f7a9c41e58
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b1c7d92a36"
+down_revision: Union[str, Sequence[str], None] = "d2f7a9c41e58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add tasks.comment_count (backfilled) and the comment thread index."""
+    op.create_index(
+        "ix_task_comments_task_id_created_at_id",
+        "task_comments",
+        ["task_id", "created_at", "id"],
+        unique=False,
+        schema="faros",
+    )
+    op.add_column(
+        "tasks",
+        sa.Column("comment_count", sa.Integer(), server_default="0", nullable=False),
+        schema="faros",
+    )
+    # updated_at is left alone: counting comments isn't an edit of the task
+    op.execute(
+        sa.text(
+            """
+        UPDATE faros.tasks AS t
+        SET comment_count = c.count
+        FROM (
+            SELECT task_id, count(*) AS count
+            FROM faros.task_comments
+            GROUP BY task_id
+        ) AS c
+        WHERE c.task_id = t.id
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    """Drop tasks.comment_count and the comment thread index."""
+    op.drop_column("tasks", "comment_count", schema="faros")
+    op.drop_index(
+        "ix_task_comments_task_id_created_at_id",
+        table_name="task_comments",
+        schema="faros",
+    )
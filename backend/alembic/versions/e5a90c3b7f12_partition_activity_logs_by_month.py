@@ -0,0 +1,143 @@
+"""partition_activity_logs_by_month
+
+Revision ID: e5a90c3b7f12
+Revises: b7e2c5f19d40
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a90c3b7f12"
+down_revision: Union[str, Sequence[str], None] = "b7e2c5f19d40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months of empty partitions to create ahead of today
+MONTHS_AHEAD = 3
+
+INDEXES = {
+    "ix_activity_logs_user_id": "(user_id)",
+    "ix_activity_logs_created_at": "(created_at)",
+    "ix_activity_logs_resource": "(resource_type, resource_id)",
+    "ix_activity_logs_action": "(action)",
+}
+
+COLUMNS = "id, user_id, action, resource_type, resource_id, details, created_at"
+
+
+def _add_months(month: date, months: int) -> date:
+    years, month_index = divmod(month.month - 1 + months, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def _rename_legacy_table() -> None:
+    op.execute("ALTER TABLE faros.activity_logs RENAME TO activity_logs_legacy")
+    op.execute(
+        "ALTER TABLE faros.activity_logs_legacy "
+        "RENAME CONSTRAINT activity_logs_pkey TO activity_logs_legacy_pkey"
+    )
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX faros.{name} RENAME TO {name}_legacy")
+
+
+def upgrade() -> None:
+    """Rebuild activity_logs as a table range-partitioned by created_at month."""
+    connection = op.get_bind()
+
+    _rename_legacy_table()
+
+    op.execute(
+        """
+        CREATE TABLE faros.activity_logs (
+            id INTEGER NOT NULL
+                DEFAULT nextval('faros.activity_logs_id_seq'::regclass),
+            user_id INTEGER NOT NULL REFERENCES faros.users (id),
+            action VARCHAR(50) NOT NULL,
+            resource_type VARCHAR(50) NOT NULL,
+            resource_id INTEGER NOT NULL,
+            details JSON,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT activity_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON faros.activity_logs {columns}")
+
+    # One partition per month from the oldest entry through MONTHS_AHEAD
+    oldest = connection.execute(
+        sa.text("SELECT min(created_at) FROM faros.activity_logs_legacy")
+    ).scalar()
+    today = datetime.now(timezone.utc).date().replace(day=1)
+    month = (oldest.date() if oldest else today).replace(day=1)
+    last = _add_months(today, MONTHS_AHEAD)
+
+    while month <= last:
+        next_month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE faros.activity_logs_p{month:%Y%m} "
+            f"PARTITION OF faros.activity_logs "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{next_month.isoformat()} 00:00:00+00')"
+        )
+        month = next_month
+
+    op.execute(
+        "CREATE TABLE faros.activity_logs_default "
+        "PARTITION OF faros.activity_logs DEFAULT"
+    )
+
+    op.execute(
+        f"INSERT INTO faros.activity_logs ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM faros.activity_logs_legacy"
+    )
+    op.execute(
+        "ALTER SEQUENCE faros.activity_logs_id_seq OWNED BY faros.activity_logs.id"
+    )
+    op.execute("DROP TABLE faros.activity_logs_legacy")
+
+
+def downgrade() -> None:
+    """Collapse the partitions back into a single plain table."""
+    op.execute("ALTER TABLE faros.activity_logs RENAME TO activity_logs_partitioned")
+    op.execute(
+        "ALTER TABLE faros.activity_logs_partitioned "
+        "RENAME CONSTRAINT activity_logs_pkey TO activity_logs_partitioned_pkey"
+    )
+    for name in INDEXES:
+        op.execute(f"ALTER INDEX faros.{name} RENAME TO {name}_partitioned")
+
+    op.execute(
+        """
+        CREATE TABLE faros.activity_logs (
+            id INTEGER NOT NULL
+                DEFAULT nextval('faros.activity_logs_id_seq'::regclass),
+            user_id INTEGER NOT NULL REFERENCES faros.users (id),
+            action VARCHAR(50) NOT NULL,
+            resource_type VARCHAR(50) NOT NULL,
+            resource_id INTEGER NOT NULL,
+            details JSON,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT activity_logs_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON faros.activity_logs {columns}")
+
+    op.execute(
+        f"INSERT INTO faros.activity_logs ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM faros.activity_logs_partitioned"
+    )
+    op.execute(
+        "ALTER SEQUENCE faros.activity_logs_id_seq OWNED BY faros.activity_logs.id"
+    )
+    # Dropping the partitioned parent drops every partition with it
+    op.execute("DROP TABLE faros.activity_logs_partitioned")
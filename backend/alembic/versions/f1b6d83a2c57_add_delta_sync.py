@@ -0,0 +1,105 @@
+"""add_delta_sync
+
+Revision ID: f1b6d83a2c57
+Revises: c8f4e2a61d93
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f1b6d83a2c57"
+down_revision: Union[str, Sequence[str], None] = "c8f4e2a61d93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENT_XID = sa.text("(pg_current_xact_id()::text)::bigint")
+
+# (table, index name, leading column) for each change_xid index
+CHANGE_XID_INDEXES = [
+    ("tasks", "ix_tasks_user_id_change_xid", "user_id"),
+    ("task_comments", "ix_task_comments_task_id_change_xid", "task_id"),
+    ("task_shares", "ix_task_shares_user_change_xid", "shared_with_user_id"),
+    ("task_shares", "ix_task_shares_task_change_xid", "task_id"),
+]
+
+
+def upgrade() -> None:
+    """Add updated_at and change_xid columns and the sync_tombstones table."""
+    op.add_column(
+        "tasks",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        schema="faros",
+    )
+    # Best available value for tasks that predate the column
+    op.execute("UPDATE faros.tasks SET updated_at = created_at")
+
+    # Existing rows all get this migration's xid, so the first sync after it is a full one
+    for table in ("tasks", "task_comments", "task_shares"):
+        op.add_column(
+            table,
+            sa.Column(
+                "change_xid", sa.BigInteger(), server_default=CURRENT_XID, nullable=False
+            ),
+            schema="faros",
+        )
+
+    for table, index_name, column in CHANGE_XID_INDEXES:
+        op.create_index(
+            index_name, table, [column, "change_xid"], unique=False, schema="faros"
+        )
+
+    op.create_table(
+        "sync_tombstones",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("resource_type", sa.String(length=20), nullable=False),
+        sa.Column("resource_id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "deleted_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.Column(
+            "change_xid", sa.BigInteger(), server_default=CURRENT_XID, nullable=False
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["faros.users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        schema="faros",
+    )
+    op.create_index(
+        "ix_sync_tombstones_user_id_change_xid",
+        "sync_tombstones",
+        ["user_id", "change_xid"],
+        unique=False,
+        schema="faros",
+    )
+
+
+def downgrade() -> None:
+    """Drop the sync tombstones and change tracking columns."""
+    op.drop_index(
+        "ix_sync_tombstones_user_id_change_xid",
+        table_name="sync_tombstones",
+        schema="faros",
+    )
+    op.drop_table("sync_tombstones", schema="faros")
+
+    for table, index_name, _ in CHANGE_XID_INDEXES:
+        op.drop_index(index_name, table_name=table, schema="faros")
+
+    for table in ("tasks", "task_comments", "task_shares"):
+        op.drop_column(table, "change_xid", schema="faros")
+    op.drop_column("tasks", "updated_at", schema="faros")
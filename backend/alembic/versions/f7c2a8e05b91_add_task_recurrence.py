@@ -0,0 +1,80 @@
+"""add_task_recurrence
+
+Revision ID: f7c2a8e05b91
+Revises: e4b1c7d92a36
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f7c2a8e05b91"
+down_revision: Union[str, Sequence[str], None] = "e4b1c7d92a36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add recurrence columns to tasks and the indexes the sweep relies on."""
+    op.add_column(
+        "tasks",
+        sa.Column("recurrence_rule", sa.String(length=200), nullable=True),
+        schema="faros",
+    )
+    op.add_column(
+        "tasks",
+        sa.Column("recurrence_next", sa.Date(), nullable=True),
+        schema="faros",
+    )
+    op.add_column(
+        "tasks",
+        sa.Column("recurrence_parent_id", sa.Integer(), nullable=True),
+        schema="faros",
+    )
+    op.create_foreign_key(
+        "tasks_recurrence_parent_id_fkey",
+        "tasks",
+        "tasks",
+        ["recurrence_parent_id"],
+        ["id"],
+        source_schema="faros",
+        referent_schema="faros",
+        ondelete="SET NULL",
+    )
+
+    # Both indexes are partial and start out empty (no task recurs yet)
+    op.create_index(
+        "ix_tasks_recurrence_next",
+        "tasks",
+        ["recurrence_next", "id"],
+        unique=False,
+        schema="faros",
+        postgresql_where=sa.text("recurrence_next IS NOT NULL"),
+    )
+    op.create_index(
+        "uq_tasks_recurrence_parent_id_due_date",
+        "tasks",
+        ["recurrence_parent_id", "due_date"],
+        unique=True,
+        schema="faros",
+        postgresql_where=sa.text("recurrence_parent_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Drop recurrence columns and indexes."""
+    op.drop_index(
+        "uq_tasks_recurrence_parent_id_due_date", table_name="tasks", schema="faros"
+    )
+    op.drop_index("ix_tasks_recurrence_next", table_name="tasks", schema="faros")
+    op.drop_constraint(
+        "tasks_recurrence_parent_id_fkey", "tasks", schema="faros", type_="foreignkey"
+    )
+    op.drop_column("tasks", "recurrence_parent_id", schema="faros")
+    op.drop_column("tasks", "recurrence_next", schema="faros")
+    op.drop_column("tasks", "recurrence_rule", schema="faros")
@@ -0,0 +1,331 @@
+"""
+Redis result cache with tag-based invalidation.
+
+Cached results are keyed by namespace, the call's arguments, today's date and
+the current version of each tag the result depends on:
+
+    cache:{namespace}:{digest of arguments, date and tag versions}
+
+Tags name what a result was computed from - user_tag(id) for a user's own
+tasks, share_tag(id) for tasks shared with them, task_tag(id) for one task's
+details. invalidate_tags() bumps tag versions, so every entry built on an
+older version is simply never read again and expires on its own. Unlike
+deleting keys, this can't race with a request that computed its result just
+before a write and stores it just after: that result lands under the old
+versions.
+
+Stampedes are handled with a per-entry lock plus stale-while-revalidate:
+an entry stays readable for CACHE_STALE_SECONDS past its TTL, and while one
+request recomputes it the others keep serving the stale copy. (Stale means
+old, never invalidated - a tag bump always forces a recompute.)
+
+Entries never change once written under a key (a tag bump moves readers to a
+new key), so fresh entries are also kept in the in-process L1 tier
+(core.redis_config.local_cache) until they go stale; only the tag versions
+are read from Redis on an L1 hit.
+
+Without Redis, cached functions just run.
+"""
+
+import functools
+import hashlib
+import inspect
+import logging
+import time
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Iterable, Optional
+
+import orjson
+from pydantic import TypeAdapter
+
+from core.redis_config import count_l2_lookup, local_cache, redis_client
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "cache"
+TAG_VERSION_PREFIX = "cache:tagv"
+LOCK_PREFIX = "cache:lock"
+
+# Recomputing an entry should take far less than this
+LOCK_TTL_MS = 10_000
+# How long a request waits for another one to fill a missing entry
+LOCK_WAIT_SECONDS = 2.0
+LOCK_POLL_SECONDS = 0.05
+
+# Tag versions outlive every entry that could refer to them
+TAG_VERSION_TTL_SECONDS = 30 * 24 * 3600
+
+SIMPLE_TYPES = (str, int, float, bool, date, datetime, Enum, type(None))
+
+
+def user_tag(user_id: int) -> str:
+    """A user's own tasks (and what hangs off them: comments, shares, files)."""
+    return f"user:{user_id}"
+
+
+def share_tag(user_id: int) -> str:
+    """Tasks shared with a user."""
+    return f"share:{user_id}"
+
+
+def task_tag(task_id: int) -> str:
+    """One task's details, comments, shares and files."""
+    return f"task:{task_id}"
+
+
+# --- Multi-key helpers ---
+
+
+def get_many(keys: list[str]) -> list[Optional[str]]:
+    """MGET that degrades to all-misses without Redis."""
+    if not redis_client or not keys:
+        return [None] * len(keys)
+
+    try:
+        return redis_client.mget(keys)  # type: ignore
+    except Exception as e:
+        logger.error(f"Redis MGET error for {len(keys)} keys: {e}")
+        return [None] * len(keys)
+
+
+def delete_many(keys: list[str]) -> int:
+    """DEL several keys in one round trip. Returns how many existed."""
+    if not redis_client or not keys:
+        return 0
+
+    try:
+        return redis_client.delete(*keys)  # type: ignore
+    except Exception as e:
+        logger.error(f"Redis DEL error for {len(keys)} keys: {e}")
+        return 0
+
+
+# --- Tags ---
+
+
+def _tag_version_key(tag: str) -> str:
+    return f"{TAG_VERSION_PREFIX}:{tag}"
+
+
+def _tag_versions(tags: list[str]) -> list[str]:
+    """Current version of each tag; missing tags are seeded from the clock."""
+    if not tags:
+        return []
+    pipe = redis_client.pipeline(transaction=False)  # type: ignore
+    for tag in tags:
+        # The clock seed keeps a lost version from repeating an old value
+        pipe.set(_tag_version_key(tag), time.time_ns(), nx=True, ex=TAG_VERSION_TTL_SECONDS)
+    pipe.mget([_tag_version_key(tag) for tag in tags])
+    return pipe.execute()[-1]
+
+
+def invalidate_tags(tags: Iterable[str]) -> None:
+    """Bump tag versions, orphaning every entry computed from them."""
+    tags = sorted(set(tags))
+    if not redis_client or not tags:
+        return
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for tag in tags:
+            key = _tag_version_key(tag)
+            pipe.set(key, time.time_ns(), nx=True)
+            pipe.incr(key)
+            pipe.expire(key, TAG_VERSION_TTL_SECONDS)
+        pipe.execute()
+        logger.debug(f"Cache tags invalidated: {', '.join(tags)}")
+    except Exception as e:
+        logger.error(f"Cache tag invalidation failed for {tags}: {e}")
+
+
+# --- Entries ---
+
+
+def _entry_key(namespace: str, params: dict[str, Any], versions: list[str]) -> str:
+    # Today's date is part of the key so date-relative results ("overdue")
+    # never outlive the day they were computed on
+    material = orjson.dumps(
+        [params, versions, date.today()],
+        option=orjson.OPT_SORT_KEYS,
+        default=str,
+    )
+    digest = hashlib.blake2b(material, digest_size=12).hexdigest()
+    return f"{KEY_PREFIX}:{namespace}:{digest}"
+
+
+def _store(key: str, value: Any, ttl: int) -> None:
+    envelope = orjson.dumps({"value": value, "fresh_until": time.time() + ttl}).decode()
+    local_cache.set(key, envelope, ttl=ttl)
+    try:
+        redis_client.set(key, envelope, ex=ttl + settings.CACHE_STALE_SECONDS)  # type: ignore
+    except Exception as e:
+        logger.error(f"Cache store failed for {key}: {e}")
+
+
+def _read(key: str) -> Optional[str]:
+    """The entry from L1, else from Redis (copied to L1 while still fresh)."""
+    raw = local_cache.get(key)
+    if raw is not None:
+        return raw
+
+    raw = redis_client.get(key)  # type: ignore
+    count_l2_lookup(raw is not None)
+    if raw:
+        fresh_for = orjson.loads(raw)["fresh_until"] - time.time()  # type: ignore
+        local_cache.set(key, raw, ttl=fresh_for)  # type: ignore
+    return raw  # type: ignore
+
+
+def _acquire(key: str) -> bool:
+    try:
+        return bool(
+            redis_client.set(  # type: ignore
+                f"{LOCK_PREFIX}:{key}", 1, nx=True, px=LOCK_TTL_MS
+            )
+        )
+    except Exception as e:
+        # Can't coordinate, so just compute
+        logger.error(f"Cache lock failed for {key}: {e}")
+        return True
+
+
+def _release(key: str) -> None:
+    try:
+        redis_client.delete(f"{LOCK_PREFIX}:{key}")  # type: ignore
+    except Exception as e:
+        logger.error(f"Cache unlock failed for {key}: {e}")
+
+
+def _recompute(key: str, compute: Callable[[], Any], ttl: int) -> Any:
+    try:
+        value = compute()
+        _store(key, value, ttl)
+        return value
+    finally:
+        _release(key)
+
+
+def _wait_for_fill(key: str) -> Optional[dict[str, Any]]:
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_SECONDS)
+        try:
+            raw = redis_client.get(key)  # type: ignore
+        except Exception:
+            return None
+        if raw:
+            return orjson.loads(raw)  # type: ignore
+    return None
+
+
+def get_or_compute(
+    namespace: str,
+    params: dict[str, Any],
+    tags: list[str],
+    compute: Callable[[], Any],
+    ttl: Optional[int] = None,
+) -> Any:
+    """
+    Return the cached JSON-compatible value for (namespace, params, tags),
+    computing and storing it on a miss.
+    """
+    ttl = ttl or settings.CACHE_TTL_SECONDS
+    if not redis_client:
+        return compute()
+
+    try:
+        # Versions before anything is computed, see the module docstring
+        key = _entry_key(namespace, params, _tag_versions(tags))
+        raw = _read(key)
+    except Exception as e:
+        logger.error(f"Cache read failed for {namespace}: {e}")
+        return compute()
+
+    if raw:
+        entry = orjson.loads(raw)  # type: ignore
+        if entry["fresh_until"] > time.time():
+            logger.debug(f"Cache HIT: {key}")
+            return entry["value"]
+        if not _acquire(key):
+            # Someone else is refreshing it; serve the stale copy meanwhile
+            logger.debug(f"Cache STALE: {key}")
+            return entry["value"]
+        return _recompute(key, compute, ttl)
+
+    logger.debug(f"Cache MISS: {key}")
+    if _acquire(key):
+        return _recompute(key, compute, ttl)
+
+    # Another request is computing this entry: wait for it rather than pile on
+    entry = _wait_for_fill(key)
+    if entry is not None:
+        return entry["value"]
+    return compute()
+
+
+def _cache_params(arguments: dict[str, Any]) -> dict[str, Any]:
+    """Arguments that identify a result: plain values, not sessions or users."""
+    params = {}
+    for name, value in arguments.items():
+        if isinstance(value, SIMPLE_TYPES):
+            params[name] = value
+        elif isinstance(value, (list, tuple)) and all(
+            isinstance(item, SIMPLE_TYPES) for item in value
+        ):
+            params[name] = list(value)
+    return params
+
+
+def cached(
+    namespace: str,
+    *,
+    model: Any,
+    tags: Callable[[dict[str, Any]], Iterable[str]],
+    ttl: Optional[int] = None,
+):
+    """
+    Cache an endpoint's result in Redis.
+
+    The key covers the current user (current_user.id) and every plain-valued
+    argument (query and path params), so two calls share an entry only when
+    they would return the same thing. The result is validated against model
+    (the endpoint's response_model) and cached as JSON; a hit returns that
+    JSON-compatible data for FastAPI to validate again. tags receives the
+    call's arguments by name and returns the tags the result depends on.
+
+        @router.get("", response_model=PaginatedTasks)
+        @cache.cached(
+            "tasks:list",
+            model=PaginatedTasks,
+            tags=lambda args: [cache.user_tag(args["current_user"].id)],
+        )
+        def get_all_tasks(...):
+    """
+    adapter: TypeAdapter = TypeAdapter(model)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+
+            params = _cache_params(arguments)
+            user = arguments.get("current_user")
+            if user is not None:
+                params["current_user"] = user.id
+
+            def compute() -> Any:
+                result = func(*args, **kwargs)
+                validated = adapter.validate_python(result, from_attributes=True)
+                return adapter.dump_python(validated, mode="json")
+
+            return get_or_compute(namespace, params, list(tags(arguments)), compute, ttl)
+
+        return wrapper
+
+    return decorator
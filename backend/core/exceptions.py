@@ -50,3 +50,21 @@ class InvalidCredentialsError(Exception):
     def __init__(self):
         self.message = "Invalid username or password"
         super().__init__(self.message)
+
+
+class RateLimitExceededError(Exception):
+    """Raised when a caller has used up a rate-limited endpoint's budget"""
+
+    def __init__(self, limit: str, retry_after: float):
+        self.limit = limit
+        self.retry_after = retry_after
+        self.message = f"Rate limit exceeded: {limit}"
+        super().__init__(self.message)
+
+
+class PasswordHashingBusyError(Exception):
+    """Raised when the password hashing pool is saturated and sheds the request"""
+
+    def __init__(self):
+        self.message = "Too many sign-in requests right now, please retry shortly"
+        super().__init__(self.message)
@@ -0,0 +1,111 @@
+"""
+In-process L1 cache that sits in front of Redis.
+
+Values are the strings get_cache() would have read from Redis. Each one keeps
+its own expiry and the cache as a whole is limited by an estimate of the
+memory it holds (key + value), evicting least recently used entries first.
+Values bigger than a quarter of the budget are never kept, so one large
+value can't flush everything else.
+
+The cache only knows about this process. core.redis_config keeps copies on
+other instances in line by publishing the keys it sets or deletes.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class LocalCache:
+    """Thread-safe TTL + LRU map of str -> str, bounded by bytes."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (expires_at, value, size)
+        self._entries: OrderedDict[str, tuple[float, str, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def _size(key: str, value: str) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store a value for at most ttl_seconds (or ttl, if shorter)."""
+        if not self.enabled:
+            return
+
+        ttl = self.ttl_seconds if ttl is None else min(ttl, self.ttl_seconds)
+        size = self._size(key, value)
+        with self._lock:
+            self._remove(key)
+            if ttl <= 0 or size > self.max_bytes // 4:
+                return
+
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
@@ -1,13 +1,79 @@
+"""
+Per-endpoint rate limiting with token buckets.
+
+    @router.post("/login")
+    @limiter.limit("5/minute")
+    def login_user(request: Request, ...):
+
+"5/minute" is a bucket of 5 tokens refilled at 5 per minute: a caller can
+burst up to 5 requests, then gets one more every 12 seconds. Unlike fixed
+windows there is no boundary where twice the limit gets through.
+
+Buckets live in Redis and are updated by one Lua script (TOKEN_BUCKET_LUA),
+so checking and taking a token is a single atomic round trip shared by every
+instance; the script uses the Redis clock, so instance clocks don't matter.
+A rejection tells the caller when the next token arrives, and this process
+remembers it: until then the same caller is rejected locally, with no Redis
+call. That is always correct, since only time adds tokens.
+
+Without Redis (not configured, or its circuit breaker is open) each process
+keeps its own buckets. Decision counts and latency are reported by
+GET /health/rate-limit.
+"""
+
+import functools
+import inspect
 import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
 
 from fastapi import Request
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
+from core.exceptions import RateLimitExceededError
+from core.redis_config import async_redis_client, redis_client
 from core.settings import settings
 
 logger = logging.getLogger(__name__)
 
+KEY_PREFIX = "ratelimit"
+
+# Callers remembered by the local pre-check / in-memory fallback before pruning
+LOCAL_MAX_KEYS = 10_000
+
+PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# KEYS[1] bucket hash; ARGV: capacity, tokens added per millisecond.
+# Returns {allowed (0/1), milliseconds until a token is available}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_ms = math.ceil((1 - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+-- Idle buckets disappear once they would be full again
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1000)
+return {allowed, retry_ms}
+"""
+
 
 def get_user_id_or_ip(request: Request) -> str:
     """
@@ -16,119 +82,278 @@ def get_user_id_or_ip(request: Request) -> str:
     1. User ID (if authenticated)
     2. IP address (if not authenticated)
     """
-    # Try to get user from request state (set by auth dependency)
-    if hasattr(request.state, "user"):
-        user = request.state.user
-        identifier = f"user_{user.id}"
+    # Try to get user from request state (set by the auth dependencies)
+    user_id = getattr(request.state, "user_id", None)
+    if user_id is not None:
+        identifier = f"user_{user_id}"
         logger.debug(f"Rate limit key: {identifier}")
         return identifier
 
     # Fall back to IP address
-    ip = get_remote_address(request)
+    ip = request.client.host if request.client else "127.0.0.1"
     identifier = f"ip_{ip}"
     logger.debug(f"Rate limit key: {identifier}")
     return identifier
 
 
-# Check if we're running tests
-TESTING = settings.TESTING
+def parse_rate(rate: str) -> tuple[int, int]:
+    """"5/minute" -> (5, 60): bucket capacity and refill period in seconds."""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(second|minute|hour|day)\s*", rate)
+    if not match:
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+    return int(match.group(1)), PERIOD_SECONDS[match.group(2)]
 
-# Smart Redis URL selection (same logic as redis_config.py)
-ENVIRONMENT = settings.normalized_environment
-REDIS_URL_ENV = settings.REDIS_URL
-REDIS_URL = settings.redis_url
 
-if TESTING:
-    # Create a disabled limiter for tests
-    limiter = Limiter(
-        key_func=get_user_id_or_ip, enabled=False  # Disable rate limiting in tests
-    )
-    logger.info("Rate limiting DISABLED for testing")
-else:
-    # Try to use Redis if available, fall back to memory storage
-    # In production, if REDIS_URL is not set, skip Redis entirely
-    if not REDIS_URL_ENV and ENVIRONMENT == "production":
-        # Production without Redis - use in-memory (single instance only)
-        logger.info("No REDIS_URL set in production, using in-memory rate limiting")
-        limiter = Limiter(
-            key_func=get_user_id_or_ip,
-            default_limits=["1000/hour"],
-            # No storage_uri = in-memory storage
-            strategy="fixed-window",
-        )
-        logger.info(
-            "Rate limiting ENABLED with in-memory storage (single instance only)"
-        )
-    else:
-        # Try Redis connection - but be defensive about it
-        # If Redis is unreliable, use in-memory instead
-        use_redis = False
-        redis_error = None
-
-        try:
-            import urllib.parse
-
-            import redis
-
-            # Test Redis connection with proper SSL handling for Upstash
-            parsed = urllib.parse.urlparse(REDIS_URL)
-            hostname = parsed.hostname or "localhost"
-            use_ssl = hostname.endswith(".upstash.io")
-
-            # Get password from URL if present
-            password = parsed.password or None
-
-            test_client = redis.Redis(
-                host=hostname,
-                port=parsed.port or 6379,
-                password=password,
-                ssl=use_ssl,
-                ssl_cert_reqs=None,  # type: ignore[arg-type]  # Upstash uses self-signed certs
-                socket_connect_timeout=3,  # Fast timeout for connection test
-                socket_timeout=3,
-                retry_on_timeout=False,  # Don't retry during test
-            )
-            # Test connection - try multiple times to ensure it's stable
-            test_client.ping()
-            # Test a second time to ensure connection is stable
-            test_client.ping()
-            test_client.close()
-            use_redis = True
-        except Exception as e:
-            # Redis unavailable or unreliable
-            redis_error = str(e)
-            logger.warning(f"Redis connection test failed: {redis_error}")
-
-        if use_redis:
-            # Redis is available - use it
+def _find_request(args: tuple, kwargs: dict[str, Any]) -> Request:
+    request = kwargs.get("request")
+    if request is None:
+        request = next((arg for arg in args if isinstance(arg, Request)), None)
+    if request is None:
+        raise TypeError("Rate-limited endpoints need a `request: Request` parameter")
+    return request
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 3)
+
+
+class LimiterMetrics:
+    """Decision counts and latency for GET /health/rate-limit."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._latencies_ms: deque[float] = deque(maxlen=window)
+        self.allowed = 0
+        self.rejected = 0
+        # Rejected by the pre-check, without a Redis call
+        self.rejected_locally = 0
+        # Decided by in-process buckets because Redis was unavailable
+        self.fallback_decisions = 0
+        self.redis_errors = 0
+        self.rejected_by_limit: dict[str, int] = {}
+
+    def record(self, scope: str, allowed: bool, started: float, source: str) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._latencies_ms.append(elapsed_ms)
+            if allowed:
+                self.allowed += 1
+            else:
+                self.rejected += 1
+                self.rejected_by_limit[scope] = self.rejected_by_limit.get(scope, 0) + 1
+            if source == "precheck":
+                self.rejected_locally += 1
+            elif source == "memory":
+                self.fallback_decisions += 1
+
+    def record_redis_error(self) -> None:
+        with self._lock:
+            self.redis_errors += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            counts = {
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "rejected_locally": self.rejected_locally,
+                "fallback_decisions": self.fallback_decisions,
+                "redis_errors": self.redis_errors,
+                "rejected_by_limit": dict(self.rejected_by_limit),
+            }
+
+        latency: dict[str, float] = {}
+        if latencies:
+            latency = {
+                "p50": _percentile(latencies, 0.50),
+                "p95": _percentile(latencies, 0.95),
+                "p99": _percentile(latencies, 0.99),
+                "max": round(latencies[-1], 3),
+            }
+        return {**counts, "decision_latency_ms": latency}
+
+
+class RateLimiter:
+    """Token-bucket limiter with a local pre-check in front of Redis."""
+
+    def __init__(self, enabled: bool = True, use_redis: bool = True):
+        self.enabled = enabled
+        self.use_redis = use_redis
+        self.metrics = LimiterMetrics()
+
+        self._lock = threading.Lock()
+        # key -> monotonic time before which the caller is known to be limited
+        self._blocked_until: dict[str, float] = {}
+        # key -> (tokens, monotonic time of last update), used without Redis
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+        self._script = redis_client.register_script(TOKEN_BUCKET_LUA)
+        self._async_script = async_redis_client.register_script(TOKEN_BUCKET_LUA)
+
+    # --- Local state ---
+
+    def _prune(self, table: dict[str, Any]) -> None:
+        # Caller holds the lock. Blocks and buckets are only an optimisation or a
+        # fallback, so when there are too many callers to track, start over.
+        if len(table) > LOCAL_MAX_KEYS:
+            table.clear()
+
+    def _precheck(self, key: str) -> Optional[float]:
+        """Seconds until the caller can have a token, if known to be limited."""
+        with self._lock:
+            until = self._blocked_until.get(key)
+            if until is None:
+                return None
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                del self._blocked_until[key]
+                return None
+            return remaining
+
+    def _block(self, key: str, retry_after: float) -> None:
+        with self._lock:
+            self._prune(self._blocked_until)
+            self._blocked_until[key] = time.monotonic() + retry_after
+
+    def _take_local(self, key: str, capacity: int, period: int) -> tuple[bool, float]:
+        """The Lua script's algorithm, on in-process buckets."""
+        rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, 0.0
+            self._prune(self._buckets)
+            self._buckets[key] = (tokens, now)
+            return False, (1 - tokens) / rate
+
+    # --- Decisions ---
+
+    def _key(self, scope: str, request: Request) -> str:
+        return f"{KEY_PREFIX}:{scope}:{get_user_id_or_ip(request)}"
+
+    def _script_args(self, capacity: int, period: int) -> list[Any]:
+        return [capacity, capacity / (period * 1000)]
+
+    def _finish(
+        self,
+        scope: str,
+        rate: str,
+        key: str,
+        started: float,
+        source: str,
+        allowed: bool,
+        retry_after: float,
+    ) -> None:
+        self.metrics.record(scope, allowed, started, source)
+        if allowed:
+            return
+
+        if source != "precheck":
+            self._block(key, retry_after)
+        logger.warning(f"Rate limit exceeded: {key} ({rate}), retry in {retry_after:.1f}s")
+        raise RateLimitExceededError(limit=rate, retry_after=retry_after)
+
+    def _redis_failed(self, error: Exception) -> None:
+        self.metrics.record_redis_error()
+        logger.error(f"Rate limit check failed in Redis, using local bucket: {error}")
+
+    def hit(self, scope: str, rate: str, request: Request) -> None:
+        """Take a token for this caller or raise RateLimitExceededError."""
+        started = time.perf_counter()
+        capacity, period = parse_rate(rate)
+        key = self._key(scope, request)
+
+        retry_after = self._precheck(key)
+        if retry_after is not None:
+            return self._finish(scope, rate, key, started, "precheck", False, retry_after)
+
+        if self.use_redis and redis_client:
             try:
-                limiter = Limiter(
-                    key_func=get_user_id_or_ip,
-                    default_limits=["1000/hour"],  # Default limit for all endpoints
-                    storage_uri=REDIS_URL,
-                    strategy="fixed-window",
+                allowed, retry_ms = self._script(
+                    keys=[key], args=self._script_args(capacity, period)
                 )
-                logger.info(
-                    f"Rate limiting ENABLED with Redis storage: {REDIS_URL.split('@')[-1] if '@' in REDIS_URL else REDIS_URL}"
+            except Exception as e:
+                self._redis_failed(e)
+            else:
+                return self._finish(
+                    scope, rate, key, started, "redis", bool(allowed), retry_ms / 1000
+                )
+
+        allowed, retry_after = self._take_local(key, capacity, period)
+        self._finish(scope, rate, key, started, "memory", allowed, retry_after)
+
+    async def ahit(self, scope: str, rate: str, request: Request) -> None:
+        """hit() for async endpoints, without blocking the event loop on Redis."""
+        started = time.perf_counter()
+        capacity, period = parse_rate(rate)
+        key = self._key(scope, request)
+
+        retry_after = self._precheck(key)
+        if retry_after is not None:
+            return self._finish(scope, rate, key, started, "precheck", False, retry_after)
+
+        if self.use_redis and async_redis_client:
+            try:
+                allowed, retry_ms = await self._async_script(
+                    keys=[key], args=self._script_args(capacity, period)
                 )
             except Exception as e:
-                # Even if connection test passed, Limiter init might fail
-                logger.error(
-                    f"Failed to initialize Redis rate limiter: {e}, falling back to in-memory"
+                self._redis_failed(e)
+            else:
+                return self._finish(
+                    scope, rate, key, started, "redis", bool(allowed), retry_ms / 1000
                 )
-                use_redis = False
-
-        if not use_redis:
-            # Redis unavailable or unreliable - use in-memory storage (works for single instance)
-            logger.warning(
-                f"Using in-memory rate limiting (Redis unavailable: {redis_error or 'initialization failed'})"
-            )
-            limiter = Limiter(
-                key_func=get_user_id_or_ip,
-                default_limits=["1000/hour"],
-                # No storage_uri = in-memory storage
-                strategy="fixed-window",
-            )
-            logger.info(
-                "Rate limiting ENABLED with in-memory storage (single instance only)"
-            )
+
+        allowed, retry_after = self._take_local(key, capacity, period)
+        self._finish(scope, rate, key, started, "memory", allowed, retry_after)
+
+    def limit(self, rate: str) -> Callable:
+        """Decorator limiting an endpoint to rate per caller, e.g. "5/minute"."""
+        parse_rate(rate)  # Fail at import time on a typo
+
+        def decorator(func):
+            if not self.enabled:
+                return func
+
+            scope = f"{func.__module__}.{func.__name__}"
+
+            if inspect.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    await self.ahit(scope, rate, _find_request(args, kwargs))
+                    return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                self.hit(scope, rate, _find_request(args, kwargs))
+                return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+def retry_after_header(retry_after: float) -> str:
+    return str(max(1, math.ceil(retry_after)))
+
+
+# Check if we're running tests
+TESTING = settings.TESTING
+
+if TESTING:
+    # Disabled for tests; decorated endpoints are left untouched
+    limiter = RateLimiter(enabled=False)
+    logger.info("Rate limiting DISABLED for testing")
+elif not settings.has_explicit_redis_url and settings.normalized_environment == "production":
+    # Production without Redis - per-process buckets (single instance only)
+    limiter = RateLimiter(use_redis=False)
+    logger.info("Rate limiting ENABLED with in-memory buckets (single instance only)")
+else:
+    limiter = RateLimiter()
+    logger.info("Rate limiting ENABLED with Redis token buckets")
@@ -1,9 +1,16 @@
+import json
 import logging
-import urllib.parse
-from typing import Optional
+import os
+import socket
+import threading
+import time
+from typing import Any, Optional
 
 import redis
+import redis.asyncio
 
+from core.local_cache import LocalCache
+from core.redis_factory import get_async_redis, get_redis
 from core.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -25,59 +32,143 @@ else:
     # Production - should have REDIS_URL set, but fallback to standard port
     logger.warning("REDIS_URL not set in production, using default localhost:6379")
 
-# Parse the Redis URL to extract host, port, and database number
+# Cache expiration times
+STATS_CACHE_TTL = 300
+PREFERENCES_CACHE_TTL = 3600
 
+# Shared pooled clients (core/redis_factory.py). They are never None: while
+# Redis is down or its circuit breaker is open they are falsy, so callers keep
+# using `if not redis_client` to skip Redis, and calls that slip through fail
+# fast with a redis.ConnectionError.
+redis_client: redis.Redis = get_redis()
 
-parsed = urllib.parse.urlparse(REDIS_URL)
+# Asyncio client for long-lived pub/sub subscribers (SSE), same pool settings
+async_redis_client: redis.asyncio.Redis = get_async_redis()
 
-# Redis connection settings
-REDIS_HOST = parsed.hostname or "localhost"
-REDIS_PORT = parsed.port or 6379
-REDIS_DB = int(parsed.path.lstrip("/")) if parsed.path else 0
 
-# Cache expiration times
-STATS_CACHE_TTL = 300
+# --- L1 (in-process) tier ---
+
+# Keys read on most requests; get_cache keeps a short-lived copy of these in
+# process memory, and set_cache/delete_cache tell other instances to drop theirs
+LOCAL_CACHE_PREFIXES = ("notification_prefs:", "activity_stats:")
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+INSTANCE_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+local_cache = LocalCache(
+    max_bytes=settings.LOCAL_CACHE_MAX_BYTES,
+    ttl_seconds=settings.LOCAL_CACHE_TTL_SECONDS,
+)
+
+# L2 lookups (Redis reads behind the L1 tier), for cache_stats()
+_l2_counts = {"hits": 0, "misses": 0}
+
+
+def count_l2_lookup(hit: bool) -> None:
+    _l2_counts["hits" if hit else "misses"] += 1
+
+
+def _is_local(key: str) -> bool:
+    return key.startswith(LOCAL_CACHE_PREFIXES)
+
+
+def _publish_invalidation(keys: list[str]) -> None:
+    """Ask other instances to drop their L1 copies of keys."""
+    if not redis_client:
+        return
+
+    message = json.dumps({"origin": INSTANCE_ID, "keys": keys})
+    try:
+        redis_client.publish(INVALIDATION_CHANNEL, message)
+    except Exception as e:
+        logger.error(f"Cache invalidation publish failed for {keys}: {e}")
+
+
+def _handle_invalidation(message: dict[str, Any]) -> None:
+    try:
+        payload = json.loads(message["data"])
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed cache invalidation: {message.get('data')!r}")
+        return
+
+    if payload.get("origin") != INSTANCE_ID:
+        local_cache.delete(*payload.get("keys", []))
+
+
+def _handle_listener_error(error: Exception, pubsub, thread) -> None:
+    # Invalidations sent while disconnected are lost, so start over empty.
+    # redis-py resubscribes on the next read.
+    logger.error(f"Cache invalidation listener error: {error}")
+    local_cache.clear()
+    time.sleep(1)
 
-# Create Redis client
-redis_client: Optional[redis.Redis] = None
 
-try:
-    # Upstash Redis requires SSL/TLS - detect by checking if hostname ends with .upstash.io
-    use_ssl = REDIS_HOST.endswith(".upstash.io") if REDIS_HOST else False
+_listener_thread: Optional[threading.Thread] = None
 
-    # Get password from URL if present, otherwise from parsed URL
-    password = parsed.password or None
 
-    client = redis.Redis(  # pylint: disable=invalid-name
-        host=REDIS_HOST,
-        port=REDIS_PORT,
-        db=REDIS_DB,
-        password=password,  # Explicitly set password
-        decode_responses=True,  # Automatically decode bytes to strings
-        ssl=use_ssl,  # Enable SSL for Upstash
-        ssl_cert_reqs="none",  # Don't verify SSL cert (Upstash uses self-signed)
+def start_invalidation_listener() -> None:
+    """Subscribe to cross-instance L1 invalidations (no-op without Redis)."""
+    global _listener_thread
+    if not redis_client or not local_cache.enabled or _listener_thread is not None:
+        return
+
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{INVALIDATION_CHANNEL: _handle_invalidation})
+    _listener_thread = pubsub.run_in_thread(
+        sleep_time=1.0,
+        daemon=True,
+        exception_handler=_handle_listener_error,
     )
-    # Test connection
-    client.ping()
-    redis_client = client
-    logger.info(f"Redis connected: {REDIS_HOST}:{REDIS_PORT}/{REDIS_DB} (SSL: {use_ssl})")
-except (redis.ConnectionError, redis.AuthenticationError) as e:
-    logger.error(f"Redis connection failed: {e}")
-    redis_client = None
+    logger.info(f"Cache invalidation listener started ({INSTANCE_ID})")
+
+
+def stop_invalidation_listener() -> None:
+    global _listener_thread
+    if _listener_thread is None:
+        return
+
+    _listener_thread.stop()  # type: ignore
+    _listener_thread.join(timeout=5)
+    _listener_thread = None
+
+
+def cache_stats() -> dict[str, Any]:
+    """Hit ratios for both tiers since the process started."""
+    l2_lookups = _l2_counts["hits"] + _l2_counts["misses"]
+    return {
+        "l1": local_cache.stats(),
+        "l2": {
+            **_l2_counts,
+            "hit_ratio": round(_l2_counts["hits"] / l2_lookups, 4) if l2_lookups else 0.0,
+        },
+    }
+
+
+# --- Helpers ---
 
 
 def get_cache(key: str) -> Optional[str]:
     """
-    Get value from Redis cache.
+    Get value from the cache (L1 for LOCAL_CACHE_PREFIXES keys, then Redis).
     Returns None if key doesn't exist or Redis is unavailable
     """
+    local = _is_local(key)
+    if local:
+        value = local_cache.get(key)
+        if value is not None:
+            logger.debug(f"Cache L1 HIT: {key}")
+            return value
+
     if not redis_client:
         return None
 
     try:
         value = redis_client.get(key)
+        count_l2_lookup(value is not None)
         if value:
             logger.info(f"Cache HIT: {key}")
+            if local:
+                local_cache.set(key, value)  # type: ignore
         else:
             logger.info(f"Cache MISS: {key}")
         return value  # type: ignore
@@ -97,33 +188,45 @@ def set_cache(key: str, value: str, ttl: int = STATS_CACHE_TTL) -> bool:
     try:
         redis_client.setex(key, ttl, value)
         logger.info(f"Cache SET: {key} (TTL: {ttl}s)")
-        return True
     except Exception as e:
         logger.error(f"Redis SET error: {e}")
         return False
 
+    if _is_local(key):
+        local_cache.set(key, value, ttl=ttl)
+        _publish_invalidation([key])
+    return True
+
 
 def delete_cache(key: str) -> bool:
     """
     Delete value from Redis cache.
     Returns True if successful, False otherwise.
     """
+    if _is_local(key):
+        local_cache.delete(key)
+
     if not redis_client:
         return False
 
     try:
         redis_client.delete(key)
         logger.info(f"Cache DELETE: {key}")
-        return True
     except Exception as e:
         logger.error(f"Redis DELETE error: {e}")
         return False
 
+    if _is_local(key):
+        _publish_invalidation([key])
+    return True
+
+
+def activity_stats_cache_key(user_id: int) -> str:
+    return f"activity_stats:user_{user_id}"
+
 
-def invalidate_user_cache(user_id: int):
-    """Invalidate all cache entries for a user.
-    Called when user creates/updates/deletes tasks.
+def invalidate_activity_stats(user_id: int):
+    """Invalidate a user's cached activity stats.
+    Called once new activity by that user is committed.
     """
-    stats_key = f"stats:user_{user_id}"
-    delete_cache(stats_key)
-    logger.info(f"Invalidated cache for user_id={user_id}")
+    delete_cache(activity_stats_cache_key(user_id))
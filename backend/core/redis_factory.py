@@ -0,0 +1,203 @@
+"""
+Shared Redis clients: one connection pool per flavour (sync and asyncio),
+guarded by a circuit breaker.
+
+Both clients are built once from settings.redis_url and reused by every
+module (core.redis_config, core.rate_limit_config). Pools keep idle
+connections alive with periodic health checks and reconnect on the next
+command after a failure, so a Redis restart doesn't need an app restart.
+
+The circuit breaker counts connection errors and timeouts. After
+REDIS_BREAKER_FAILURE_THRESHOLD in a row it opens: commands fail at once
+with CircuitOpenError (a redis.ConnectionError, so existing handlers catch
+it) instead of each waiting for a socket timeout. After
+REDIS_BREAKER_RESET_SECONDS commands are let through again; the first
+success closes the breaker and a failure reopens it.
+
+An open breaker also makes the clients falsy, so the `if not redis_client`
+checks around the codebase skip Redis during an outage exactly as they do
+when Redis isn't configured.
+"""
+
+import functools
+import logging
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable
+
+import redis
+import redis.asyncio
+from redis.client import Pipeline
+
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean "Redis is unreachable", as opposed to a bad command
+OUTAGE_ERRORS = (redis.ConnectionError, redis.TimeoutError)
+
+
+class CircuitOpenError(redis.ConnectionError):
+    """Raised instead of calling Redis while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open after a cool-down."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    @property
+    def available(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        if self._failures or self._opened_at is not None:
+            with self._lock:
+                if self._opened_at is not None:
+                    logger.info("Redis circuit breaker closed")
+                self._failures = 0
+                self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            # A failed half-open probe reopens straight away
+            if self._failures >= self.failure_threshold or self._opened_at is not None:
+                if self.state != "open":
+                    logger.error(
+                        f"Redis circuit breaker open for {self.reset_seconds}s "
+                        f"after {self._failures} failures"
+                    )
+                self._opened_at = time.monotonic()
+
+    def trip(self) -> None:
+        """Open the breaker now (e.g. the first ping failed)."""
+        with self._lock:
+            self._failures = max(self._failures, self.failure_threshold)
+            self._opened_at = time.monotonic()
+
+    def _check(self) -> None:
+        if not self.available:
+            raise CircuitOpenError("Redis circuit breaker is open")
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        self._check()
+        try:
+            result = func(*args, **kwargs)
+        except OUTAGE_ERRORS:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    async def acall(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        self._check()
+        try:
+            result = await func(*args, **kwargs)
+        except OUTAGE_ERRORS:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.REDIS_BREAKER_RESET_SECONDS,
+)
+
+
+class _BreakerPipeline(Pipeline):
+    def execute(self, raise_on_error: bool = True):
+        return breaker.call(super().execute, raise_on_error)
+
+
+class BreakerRedis(redis.Redis):
+    """redis.Redis whose commands and pipelines go through the breaker."""
+
+    def execute_command(self, *args, **options):
+        return breaker.call(super().execute_command, *args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> Pipeline:
+        return _BreakerPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+    def __bool__(self) -> bool:
+        return breaker.available
+
+
+class BreakerAsyncRedis(redis.asyncio.Redis):
+    """redis.asyncio.Redis whose commands go through the breaker."""
+
+    async def execute_command(self, *args, **options):
+        return await breaker.acall(super().execute_command, *args, **options)
+
+    def __bool__(self) -> bool:
+        return breaker.available
+
+
+def connection_kwargs() -> dict[str, Any]:
+    """Connection and pool settings shared by the sync and asyncio clients."""
+    parsed = urllib.parse.urlparse(settings.redis_url)
+    host = parsed.hostname or "localhost"
+    # Upstash Redis requires TLS and uses a self-signed certificate
+    use_ssl = host.endswith(".upstash.io")
+
+    kwargs: dict[str, Any] = {
+        "host": host,
+        "port": parsed.port or 6379,
+        "db": int(parsed.path.lstrip("/") or 0),
+        "password": parsed.password or None,
+        "decode_responses": True,
+        "max_connections": settings.REDIS_MAX_CONNECTIONS,
+        "socket_connect_timeout": settings.REDIS_CONNECT_TIMEOUT_SECONDS,
+        "socket_timeout": settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        "socket_keepalive": True,
+        "health_check_interval": settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+    }
+    if use_ssl:
+        kwargs.update(ssl=True, ssl_cert_reqs="none")
+    return kwargs
+
+
+def redis_location() -> str:
+    """host:port/db for log lines (no credentials)."""
+    kwargs = connection_kwargs()
+    return f"{kwargs['host']}:{kwargs['port']}/{kwargs['db']}"
+
+
+@functools.cache
+def get_redis() -> BreakerRedis:
+    """The process-wide pooled sync client."""
+    client = BreakerRedis(**connection_kwargs())
+    try:
+        client.ping()
+        logger.info(f"Redis connected: {redis_location()}")
+    except Exception as e:
+        # Start open, so requests don't each wait for a timeout; the breaker
+        # probes again after REDIS_BREAKER_RESET_SECONDS
+        logger.error(f"Redis connection failed: {e}")
+        breaker.trip()
+    return client
+
+
+@functools.cache
+def get_async_redis() -> BreakerAsyncRedis:
+    """The process-wide pooled asyncio client (pub/sub subscribers, async code)."""
+    return BreakerAsyncRedis(**connection_kwargs())
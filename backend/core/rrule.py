@@ -0,0 +1,235 @@
+"""
+Recurrence rules: the subset of RFC 5545 RRULE that recurring tasks support.
+
+    FREQ=DAILY|WEEKLY|MONTHLY|YEARLY   (required)
+    INTERVAL=n                         every n periods (1-365, default 1)
+    BYDAY=MO,WE,FR                     WEEKLY only: weekdays in each week
+    BYMONTHDAY=1,15,-1                 MONTHLY only: days of the month, -1 = last
+    COUNT=n | UNTIL=YYYYMMDD           optional end, not both (COUNT 1-1000)
+
+Occurrences are dates. The first is always the start date (the series task's
+due date), as with DTSTART. Months without a BYMONTHDAY day and Feb 29 in
+non-leap years are skipped, never moved.
+
+occurrences(rule, start, after=...) jumps straight to the period holding
+`after` instead of walking from the start, so expanding a window of a
+years-old series costs the same as a new one (COUNT rules still walk, they
+are at most 1000 long).
+"""
+
+import calendar
+import itertools
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Iterator, Optional
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+MAX_INTERVAL = 365
+MAX_COUNT = 1000
+
+# A rule can select days that no period has (BYMONTHDAY=31 every 12 months
+# from February); give up after this many empty periods in a row
+MAX_EMPTY_PERIODS = 400
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    freq: str
+    interval: int = 1
+    by_day: tuple[int, ...] = ()  # date.weekday() numbers, sorted
+    by_month_day: tuple[int, ...] = ()
+    count: Optional[int] = None
+    until: Optional[date] = None
+
+    def __str__(self) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.by_day:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in self.by_day))
+        if self.by_month_day:
+            parts.append("BYMONTHDAY=" + ",".join(str(day) for day in self.by_month_day))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until:%Y%m%d}")
+        return ";".join(parts)
+
+
+def _int(name: str, value: str, low: int, high: int) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if not low <= number <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return number
+
+
+def _until(value: str) -> date:
+    # UNTIL=20260131 or UNTIL=20260131T000000Z; only the date matters
+    try:
+        return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    except ValueError:
+        raise ValueError("UNTIL must be a date like 20260131")
+
+
+@lru_cache(maxsize=1024)
+def parse_rule(text: str) -> RecurrenceRule:
+    """Parse an RRULE string, raising ValueError if it is outside the subset."""
+    text = text.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+
+    fields: dict[str, str] = {}
+    for part in filter(None, text.upper().split(";")):
+        name, sep, value = part.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Malformed rule part '{part}'")
+        if name in fields:
+            raise ValueError(f"{name} given twice")
+        fields[name] = value
+
+    unsupported = set(fields) - {"FREQ", "INTERVAL", "BYDAY", "BYMONTHDAY", "COUNT", "UNTIL"}
+    if unsupported:
+        raise ValueError(f"Unsupported rule parts: {', '.join(sorted(unsupported))}")
+
+    freq = fields.get("FREQ")
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+
+    by_day: tuple[int, ...] = ()
+    if "BYDAY" in fields:
+        if freq != "WEEKLY":
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+        try:
+            by_day = tuple(sorted({WEEKDAYS.index(day) for day in fields["BYDAY"].split(",")}))
+        except ValueError:
+            raise ValueError(f"BYDAY days must be among {','.join(WEEKDAYS)}")
+
+    by_month_day: tuple[int, ...] = ()
+    if "BYMONTHDAY" in fields:
+        if freq != "MONTHLY":
+            raise ValueError("BYMONTHDAY is only supported with FREQ=MONTHLY")
+        days = {_int("BYMONTHDAY", day, -31, 31) for day in fields["BYMONTHDAY"].split(",")}
+        if 0 in days:
+            raise ValueError("BYMONTHDAY can't be 0")
+        by_month_day = tuple(sorted(days))
+
+    if "COUNT" in fields and "UNTIL" in fields:
+        raise ValueError("Use COUNT or UNTIL, not both")
+
+    return RecurrenceRule(
+        freq=freq,
+        interval=_int("INTERVAL", fields.get("INTERVAL", "1"), 1, MAX_INTERVAL),
+        by_day=by_day,
+        by_month_day=by_month_day,
+        count=_int("COUNT", fields["COUNT"], 1, MAX_COUNT) if "COUNT" in fields else None,
+        until=_until(fields["UNTIL"]) if "UNTIL" in fields else None,
+    )
+
+
+def normalize_rule(text: str) -> str:
+    """Canonical form of a rule string (what gets stored), or ValueError."""
+    return str(parse_rule(text))
+
+
+def _month_index(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _period_dates(rule: RecurrenceRule, start: date, k: int) -> list[date]:
+    """Candidate dates in the k-th period after the start's, ascending."""
+    step = k * rule.interval
+
+    if rule.freq == "DAILY":
+        return [start + timedelta(days=step)]
+
+    if rule.freq == "WEEKLY":
+        week = _week_start(start) + timedelta(weeks=step)
+        return [week + timedelta(days=day) for day in rule.by_day or (start.weekday(),)]
+
+    if rule.freq == "MONTHLY":
+        year, month = divmod(_month_index(start) + step, 12)
+        month += 1
+        length = calendar.monthrange(year, month)[1]
+        # 31 and -1 can name the same day
+        days = sorted(
+            {day if day > 0 else length + 1 + day for day in rule.by_month_day or (start.day,)}
+        )
+        return [date(year, month, day) for day in days if 1 <= day <= length]
+
+    # YEARLY
+    try:
+        return [start.replace(year=start.year + step)]
+    except ValueError:  # Feb 29
+        return []
+
+
+def _first_period(rule: RecurrenceRule, start: date, after: date) -> int:
+    """Index of the period containing `after` (0 if it precedes the start)."""
+    if rule.freq == "DAILY":
+        periods = (after - start).days // rule.interval
+    elif rule.freq == "WEEKLY":
+        periods = (after - _week_start(start)).days // 7 // rule.interval
+    elif rule.freq == "MONTHLY":
+        periods = (_month_index(after) - _month_index(start)) // rule.interval
+    else:
+        periods = (after.year - start.year) // rule.interval
+    return max(periods, 0)
+
+
+def occurrences(
+    rule: RecurrenceRule, start: date, after: Optional[date] = None
+) -> Iterator[date]:
+    """
+    Occurrence dates of the series starting on `start`, ascending, from
+    `after` (inclusive) on. Infinite unless the rule has COUNT or UNTIL, so
+    bound it (itertools.takewhile).
+    """
+    if rule.count is not None or after is None:
+        # COUNT numbers occurrences from the start, so walk from there
+        first_k = 0
+    else:
+        first_k = _first_period(rule, start, after)
+
+    emitted = 1
+    if after is None or start >= after:
+        yield start
+
+    empty = 0
+    for k in itertools.count(first_k):
+        days = [day for day in _period_dates(rule, start, k) if day > start]
+        empty = 0 if days else empty + 1
+        if empty > MAX_EMPTY_PERIODS:
+            return
+
+        for day in days:
+            if rule.until is not None and day > rule.until:
+                return
+            if rule.count is not None and emitted >= rule.count:
+                return
+            emitted += 1
+            if after is None or day >= after:
+                yield day
+
+
+def occurrences_between(
+    rule: RecurrenceRule, start: date, first: date, last: date
+) -> list[date]:
+    """Occurrence dates in [first, last]."""
+    return list(
+        itertools.takewhile(lambda day: day <= last, occurrences(rule, start, after=first))
+    )
+
+
+def next_occurrence(rule: RecurrenceRule, start: date, after: date) -> Optional[date]:
+    """First occurrence on or after `after`, or None once the series has ended."""
+    return next(occurrences(rule, start, after=after), None)
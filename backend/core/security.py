@@ -1,10 +1,20 @@
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
 
+from fastapi import Response
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
+from core.exceptions import PasswordHashingBusyError
 from core.settings import settings
 
+logger = logging.getLogger(__name__)
+
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
@@ -17,6 +27,112 @@ pwd_context = CryptContext(
 )
 
 
+# --- Password hashing ---
+#
+# bcrypt is deliberately slow (~250ms of CPU at 12 rounds). Run in request
+# threads, a burst of logins takes every threadpool slot and every core, and
+# all other requests on the process queue behind it. Hashing runs in a small
+# process pool instead, so it can use at most PASSWORD_HASH_WORKERS cores. At
+# most workers + queue limit hashes are in flight; beyond that callers get
+# PasswordHashingBusyError (503) at once rather than queueing behind the burst.
+
+
+@functools.lru_cache(maxsize=4)
+def _context_for(rounds: int) -> CryptContext:
+    return pwd_context.copy(bcrypt__rounds=rounds)
+
+
+def _needs_rehash(hashed_password: str, rounds: int) -> bool:
+    # bcrypt hashes look like $2b$<rounds>$<salt+digest>
+    parts = hashed_password.split("$")
+    return len(parts) < 4 or not parts[2].isdigit() or int(parts[2]) != rounds
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context_for(rounds).hash(password)
+
+
+def _verify_and_update(
+    plain_password: str, hashed_password: str, rounds: int
+) -> tuple[bool, str | None]:
+    context = _context_for(rounds)
+    if not context.verify(plain_password, hashed_password):
+        return False, None
+    if _needs_rehash(hashed_password, rounds):
+        return True, context.hash(plain_password)
+    return True, None
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded process pool (or inline with workers=0)."""
+
+    def __init__(self, workers: int, queue_limit: int, rounds: int):
+        self.workers = workers
+        self.rounds = rounds
+        self.capacity = workers + queue_limit
+
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(self.capacity, 1))
+        self.shed = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created on first use, so the pool is started in the serving process
+        # (after uvicorn forks its workers), not at import. By then the process
+        # runs other threads (activity writer, invalidation listener, Redis
+        # pools), and forking it could copy a lock some thread holds into the
+        # child; forkserver starts workers from a clean single-threaded process
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            return self._pool
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+
+        if not self._slots.acquire(blocking=False):
+            self.shed += 1
+            logger.warning(f"Password hashing saturated ({self.capacity} in flight), shedding")
+            raise PasswordHashingBusyError()
+
+        try:
+            return self._get_pool().submit(func, *args).result()
+        except BrokenProcessPool as e:
+            # A worker died (e.g. OOM-killed); start a fresh pool next time
+            logger.error(f"Password hashing pool broken, restarting: {e}")
+            with self._pool_lock:
+                self._pool = None
+            raise PasswordHashingBusyError() from e
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, self.rounds)
+
+    def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        """(matches, new hash if the stored one uses other settings, else None)."""
+        return self._run(_verify_and_update, plain_password, hashed_password, self.rounds)
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    queue_limit=settings.PASSWORD_HASH_QUEUE_LIMIT,
+    rounds=BCRYPT_ROUNDS,
+)
+
+
 def hash_password(password: str) -> str:
     """
     Has a plain password using bcrypt.
@@ -24,8 +140,10 @@ def hash_password(password: str) -> str:
         password: Plain text password from user
     Returns:
         Hashed password string (safe to store in db)
+    Raises:
+        PasswordHashingBusyError: the hashing pool is saturated
     """
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -36,8 +154,32 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         hashed_password: Hashed password from database
     Returns:
         True if passwords match, False otherwise
+    Raises:
+        PasswordHashingBusyError: the hashing pool is saturated
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    valid, _ = password_hasher.verify_and_update(plain_password, hashed_password)
+    return valid
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Verify a password and, if the stored hash was made with a different
+    BCRYPT_ROUNDS, also return a fresh hash to store in its place.
+    Returns:
+        (True, new_hash_or_None) if the password matches, (False, None) otherwise
+    """
+    return password_hasher.verify_and_update(plain_password, hashed_password)
+
+
+def create_user_access_token(username: str, user_id: int, token_version: int) -> str:
+    """
+    Access token for a user: sub (username), uid (id) and ver (token version).
+    uid lets get_current_user_id skip the user lookup; ver lets the token be
+    revoked (services.token_versions).
+    """
+    return create_access_token(data={"sub": username, "uid": user_id, "ver": token_version})
 
 
 def create_access_token(data: dict) -> str:
@@ -56,6 +198,27 @@ def create_access_token(data: dict) -> str:
     return encoded_jwt
 
 
+def set_auth_cookie(response: Response, access_token: str) -> None:
+    response.set_cookie(
+        key=settings.ACCESS_TOKEN_COOKIE_NAME,
+        value=access_token,
+        httponly=True,
+        secure=settings.cookie_secure,
+        samesite=settings.cookie_samesite,
+        max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        path="/",
+        domain=settings.cookie_domain,
+    )
+
+
+def clear_auth_cookie(response: Response) -> None:
+    response.delete_cookie(
+        key=settings.ACCESS_TOKEN_COOKIE_NAME,
+        path="/",
+        domain=settings.cookie_domain,
+    )
+
+
 def verify_access_token(token: str) -> dict | None:
     """
     Verify and decode a JWT access token.
@@ -1,3 +1,4 @@
+import os
 from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -15,6 +16,14 @@ class Settings(BaseSettings):
     DATABASE_URL: str | None = None
     SQLALCHEMY_ECHO: bool = False
     REDIS_URL: str | None = None
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_CONNECT_TIMEOUT_SECONDS: float = 2.0
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = 30
+    # Consecutive connection errors/timeouts before Redis calls are skipped,
+    # and how long they are skipped for
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 5
+    REDIS_BREAKER_RESET_SECONDS: float = 30.0
 
     SECRET_KEY: str
     ALGORITHM: str
@@ -25,6 +34,10 @@ class Settings(BaseSettings):
     COOKIE_DOMAIN: str | None = None
     TESTING: bool = False
     BCRYPT_ROUNDS: int | None = None
+    # Processes hashing passwords (0 = hash inline), and how many more hashes
+    # may wait for one before requests are shed with 503
+    PASSWORD_HASH_WORKERS: int | None = None
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
 
     STORAGE_PROVIDER: str = "local"
     UPLOAD_DIR: str = "uploads"
@@ -43,6 +56,64 @@ class Settings(BaseSettings):
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024
     ALLOWED_EXTENSIONS: str = ".jpg,.jpeg,.png,.gif,.pdf,.txt,.doc,.docx"
 
+    # GET /tasks/export and POST /tasks/import: rows per server-side cursor
+    # fetch and per COPY batch, and the largest import file accepted
+    TRANSFER_BATCH_SIZE: int = 1000
+    IMPORT_MAX_SIZE: int = 100 * 1024 * 1024
+    # Rows per server-side cursor fetch for streamed JSON arrays (core/streaming.py)
+    STREAM_BATCH_SIZE: int = 500
+
+    ACTIVITY_LOG_MODE: str = "sync"
+    ACTIVITY_FLUSH_BATCH_SIZE: int = 500
+    ACTIVITY_FLUSH_INTERVAL_SECONDS: float = 1.0
+    # In-memory buffer bound; past it the oldest entries are dropped (and counted)
+    ACTIVITY_BUFFER_MAX_ENTRIES: int = 50_000
+
+    DUE_SOON_REMINDER_DAYS: int = 1
+    REMINDER_SWEEP_INTERVAL_SECONDS: int = 900
+    REMINDER_BATCH_SIZE: int = 500
+    REMINDER_MAX_CONCURRENT_SENDS: int = 8
+
+    # Recurring tasks: days of occurrences created ahead, sweep cadence and
+    # series per batch (services/recurrence.py); widest GET /tasks/occurrences range
+    RECURRENCE_HORIZON_DAYS: int = 14
+    RECURRENCE_SWEEP_INTERVAL_SECONDS: int = 3600
+    RECURRENCE_BATCH_SIZE: int = 500
+    RECURRENCE_MAX_RANGE_DAYS: int = 366
+
+    # Levels of subtasks below a top-level task (tasks.path is 255 characters)
+    SUBTASK_MAX_DEPTH: int = 10
+
+    ACTIVITY_PARTITION_MONTHS_AHEAD: int = 3
+    # 0 keeps activity partitions forever
+    ACTIVITY_RETENTION_MONTHS: int = 0
+    ACTIVITY_RETENTION_ACTION: str = "archive"
+    ACTIVITY_MAINTENANCE_INTERVAL_SECONDS: int = 86400
+
+    # Per-connection buffer for GET /events; a client this far behind gets a resync
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: int = 15
+
+    # 0 makes clients revalidate task reads (cheap 304s) on every request
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 0
+
+    # core/cache.py result cache; entries are served stale for a while past the TTL
+    # while one request refreshes them
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_STALE_SECONDS: int = 30
+
+    # In-process L1 tier in front of Redis (core/local_cache.py); 0 disables it
+    LOCAL_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    LOCAL_CACHE_TTL_SECONDS: float = 10.0
+
+    # Shared-task permission maps (services/permission_cache.py) are dropped
+    # this long after they were created, however often they are read
+    PERMISSION_CACHE_TTL_SECONDS: int = 300
+
+    # Responses smaller than this many bytes are sent uncompressed
+    GZIP_MINIMUM_SIZE: int = 1000
+    GZIP_COMPRESS_LEVEL: int = 6
+
     @property
     def normalized_environment(self) -> str:
         return self.ENVIRONMENT.lower().strip()
@@ -77,10 +148,33 @@ class Settings(BaseSettings):
             return self.BCRYPT_ROUNDS
         return 4 if self.TESTING else 12
 
+    @property
+    def password_hash_workers(self) -> int:
+        if self.PASSWORD_HASH_WORKERS is not None:
+            return self.PASSWORD_HASH_WORKERS
+        if self.TESTING:
+            return 0
+        return min(4, os.cpu_count() or 1)
+
     @property
     def storage_provider(self) -> str:
         return self.STORAGE_PROVIDER.lower()
 
+    @property
+    def activity_log_mode(self) -> Literal["sync", "memory", "redis"]:
+        normalized = self.ACTIVITY_LOG_MODE.lower().strip()
+        if normalized == "memory":
+            return "memory"
+        if normalized == "redis":
+            return "redis"
+        return "sync"
+
+    @property
+    def activity_retention_action(self) -> Literal["archive", "drop"]:
+        if self.ACTIVITY_RETENTION_ACTION.lower().strip() == "drop":
+            return "drop"
+        return "archive"
+
     @property
     def email_provider(self) -> str:
         return self.EMAIL_PROVIDER.lower()
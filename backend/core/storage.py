@@ -8,9 +8,10 @@ Switch between implementations using STORAGE_PROVIDER environment variable:
 This allows easy switching between implementations without code changes.
 """
 
+import shutil
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional
 
 from core.settings import settings
 
@@ -28,6 +29,13 @@ class StorageInterface(ABC):
         """Upload a file to storage."""
         pass
 
+    @abstractmethod
+    def upload_fileobj(
+        self, stored_filename: str, fileobj: BinaryIO, content_type: str
+    ) -> None:
+        """Upload a file object from its current position, without reading it into memory."""
+        pass
+
     @abstractmethod
     def download_file(self, stored_filename: str) -> bytes:
         """Download a file from storage. Returns file content as bytes."""
@@ -65,6 +73,15 @@ class LocalStorage(StorageInterface):
         file_path.parent.mkdir(parents=True, exist_ok=True)
         file_path.write_bytes(content)
 
+    def upload_fileobj(
+        self, stored_filename: str, fileobj: BinaryIO, content_type: str
+    ) -> None:
+        """Copy a file object to the local filesystem in chunks."""
+        file_path = self.upload_dir / stored_filename
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_path.open("wb") as target:
+            shutil.copyfileobj(fileobj, target)
+
     def download_file(self, stored_filename: str) -> bytes:
         """Read file from local filesystem."""
         file_path = self.upload_dir / stored_filename
@@ -131,6 +148,22 @@ class S3Storage(StorageInterface):
         except ClientError as e:
             raise RuntimeError(f"Failed to upload file to S3: {e}") from e
 
+    def upload_fileobj(
+        self, stored_filename: str, fileobj: BinaryIO, content_type: str
+    ) -> None:
+        """Upload a file object to S3; large files go up as a multipart upload."""
+        from botocore.exceptions import ClientError
+
+        try:
+            self.s3_client.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                stored_filename,
+                ExtraArgs={"ContentType": content_type},
+            )
+        except ClientError as e:
+            raise RuntimeError(f"Failed to upload file to S3: {e}") from e
+
     def download_file(self, stored_filename: str) -> bytes:
         """Download file from S3."""
         from botocore.exceptions import ClientError
@@ -0,0 +1,58 @@
+"""
+JSON array responses streamed straight from a database cursor.
+
+    return streaming.json_array_response(query, serialize, headers=response.headers)
+
+The query runs with yield_per(STREAM_BATCH_SIZE), which makes psycopg2 use a
+server-side cursor (stream_results): rows are fetched, encoded with orjson and
+sent one batch at a time, so peak memory is one batch however many rows
+match. The body is an ordinary JSON array, so clients can't tell it from a
+list response.
+
+The status code and headers go out before the first row is read, so:
+- run every check that can fail (404, 403) before returning the response;
+- response_model validation doesn't apply; serialize must build the
+  schema's shape itself (the response_model still documents it);
+- headers set by dependencies (ETag, Cache-Control) have to be passed in,
+  FastAPI only copies them onto responses it builds itself.
+
+The request's session stays open until the stream ends; FastAPI closes
+yield dependencies after the response is sent.
+"""
+
+import itertools
+from typing import Any, Callable, Iterable, Iterator, Mapping, Optional
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query
+
+from core.settings import settings
+
+
+def iter_json_array(
+    rows: Iterable[Any], serialize: Callable[[Any], Any], batch_size: int
+) -> Iterator[bytes]:
+    """Encode rows as one JSON array, a batch of elements per chunk."""
+    separator = b"["
+    for batch in itertools.batched(rows, batch_size):
+        yield separator + b",".join(orjson.dumps(serialize(row)) for row in batch)
+        separator = b","
+
+    # "[" is still pending when there were no rows
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def json_array_response(
+    query: Query,
+    serialize: Callable[[Any], Any],
+    headers: Optional[Mapping[str, str]] = None,
+    batch_size: Optional[int] = None,
+) -> StreamingResponse:
+    """Stream query's rows as a JSON array, serialize(row) per element."""
+    size = batch_size or settings.STREAM_BATCH_SIZE
+    return StreamingResponse(
+        iter_json_array(query.yield_per(size), serialize, size),
+        media_type="application/json",
+        headers=dict(headers) if headers else None,
+    )
@@ -2,7 +2,9 @@ from datetime import datetime, timezone
 from typing import Any
 
 from sqlalchemy import (
+    DDL,
     JSON,
+    BigInteger,
     Boolean,
     Column,
     Date,
@@ -12,6 +14,8 @@ from sqlalchemy import (
     Integer,
     String,
     UniqueConstraint,
+    event,
+    text,
 )
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
@@ -20,6 +24,17 @@ from sqlalchemy.sql import func
 from db_config import Base
 
 
+def change_xid_column() -> Column:
+    """
+    Id of the transaction that last wrote the row (xid8, stored as bigint).
+    GET /sync compares it with a snapshot-xmin change token, see services/sync.py.
+    """
+    current_xid = text("(pg_current_xact_id()::text)::bigint")
+    return Column(
+        BigInteger, server_default=current_xid, onupdate=current_xid, nullable=False
+    )
+
+
 class Task(Base):
     __tablename__ = "tasks"
 
@@ -29,10 +44,37 @@ class Task(Base):
     completed = Column(Boolean, default=False, nullable=False)
     priority = Column(String(20), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
     due_date = Column(Date, nullable=True)
     tags: Any = Column(ARRAY(String), default=list, nullable=False)
     notes = Column(String(500), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Denormalized count of task_comments rows, kept by add/delete_comment
+    comment_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Due date a "due soon" reminder was last sent for (reminder watermark)
+    due_reminder_sent_for = Column(Date, nullable=True)
+    # Recurring series: the task is the first occurrence, due_date the rule's
+    # start. recurrence_next is the next occurrence the scheduler hasn't
+    # created yet (NULL when not recurring or the series has ended)
+    recurrence_rule = Column(String(200), nullable=True)
+    recurrence_next = Column(Date, nullable=True)
+    # Series an occurrence was created from
+    recurrence_parent_id = Column(
+        Integer, ForeignKey("tasks.id", ondelete="SET NULL"), nullable=True
+    )
+    # Subtasks: parent_id is the parent, path the ancestor ids from the top
+    # ("/" for a top-level task, "/12/34/" below 34 below 12), see
+    # services/subtasks.py. The rollups count the whole subtree
+    parent_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)
+    path = Column(String(255), default="/", server_default="/", nullable=False)
+    subtask_count = Column(Integer, default=0, server_default="0", nullable=False)
+    subtasks_completed = Column(Integer, default=0, server_default="0", nullable=False)
+    change_xid = change_xid_column()
 
     # Relationships
     files = relationship(
@@ -46,6 +88,37 @@ class Task(Base):
         "TaskShare", back_populates="task", cascade="all, delete-orphan"
     )
 
+    # Partial index for the due-soon reminder sweep (open tasks only)
+    __table_args__ = (
+        Index(
+            "ix_tasks_open_due_date",
+            "due_date",
+            "id",
+            postgresql_where=text("NOT completed"),
+        ),
+        Index("ix_tasks_user_id_change_xid", "user_id", "change_xid"),
+        # Owned branch of the visible-tasks listing, newest first
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Recurrence sweep: only series with occurrences still to create
+        Index(
+            "ix_tasks_recurrence_next",
+            "recurrence_next",
+            "id",
+            postgresql_where=text("recurrence_next IS NOT NULL"),
+        ),
+        # Direct children, and subtrees as a path prefix scan (LIKE '/12/%')
+        Index("ix_tasks_parent_id", "parent_id"),
+        Index("ix_tasks_path", "path", postgresql_ops={"path": "text_pattern_ops"}),
+        # One occurrence per series and date, so re-running a sweep is harmless
+        Index(
+            "uq_tasks_recurrence_parent_id_due_date",
+            "recurrence_parent_id",
+            "due_date",
+            unique=True,
+            postgresql_where=text("recurrence_parent_id IS NOT NULL"),
+        ),
+    )
+
     @property
     def share_count(self):
         """Count how many users this task is shared with"""
@@ -69,6 +142,8 @@ class User(Base):
     verification_expires = Column(DateTime(timezone=True), nullable=True)
     password_reset_token = Column(String, nullable=True)
     password_reset_token_expires = Column(DateTime(timezone=True), nullable=True)
+    # Bumped to revoke issued access tokens (their "ver" claim), see services/token_versions.py
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     tasks = relationship("Task", back_populates="owner")
@@ -114,11 +189,18 @@ class TaskComment(Base):
     content = Column(String(1000), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_xid = change_xid_column()
 
     # Relationships
     task = relationship("Task", back_populates="comments")
     user = relationship("User", back_populates="comments")
 
+    __table_args__ = (
+        Index("ix_task_comments_task_id_change_xid", "task_id", "change_xid"),
+        # Comment thread in order, keyset pages
+        Index("ix_task_comments_task_id_created_at_id", "task_id", "created_at", "id"),
+    )
+
 
 class TaskShare(Base):
     __tablename__ = "task_shares"
@@ -131,6 +213,7 @@ class TaskShare(Base):
     permission = Column(String(20), nullable=False)
     shared_at = Column(DateTime(timezone=True), server_default=func.now())
     shared_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    change_xid = change_xid_column()
 
     # Relationships
     task = relationship("Task", back_populates="shares")
@@ -140,6 +223,8 @@ class TaskShare(Base):
     # Unique constraint: Can't share same task with same user twice
     __table_args__ = (
         UniqueConstraint("task_id", "shared_with_user_id", name="unique_task_share"),
+        Index("ix_task_shares_user_change_xid", "shared_with_user_id", "change_xid"),
+        Index("ix_task_shares_task_change_xid", "task_id", "change_xid"),
     )
 
     def __repr__(self):
@@ -170,6 +255,32 @@ class NotificationPreference(Base):
     user = relationship("User", back_populates="notification_preferences")
 
 
+class SyncTombstone(Base):
+    """
+    Deletion marker for GET /sync, one row per user who could see the
+    deleted resource (or, for an unshare, who lost access to it).
+    """
+
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    resource_type = Column(String(20), nullable=False)
+    resource_id = Column(Integer, nullable=False)
+    task_id = Column(Integer, nullable=True)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    change_xid = change_xid_column()
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_id_change_xid", "user_id", "change_xid"),
+    )
+
+    def __repr__(self):
+        return f"<SyncTombstone(user={self.user_id}, {self.resource_type}:{self.resource_id})>"
+
+
 class ActivityLog(Base):
     """
     Tracks all user actions in the system for audit and transparency.
@@ -178,14 +289,21 @@ class ActivityLog(Base):
 
     __tablename__ = "activity_logs"
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     action = Column(String(50), nullable=False)
     resource_type = Column(String(50), nullable=False)
     resource_id = Column(Integer, nullable=False)
+    # Task the activity belongs to (the task itself, or a comment/file's parent).
+    # No FK: entries outlive deleted tasks.
+    task_id = Column(Integer, nullable=True)
     details = Column(JSON, nullable=True)
+    # Partition key - Postgres requires it in the primary key of a partitioned table
     created_at = Column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=func.now(),
+        nullable=False,
     )
 
     # Relationships
@@ -197,7 +315,49 @@ class ActivityLog(Base):
         Index("ix_activity_logs_created_at", "created_at"),
         Index("ix_activity_logs_resource", "resource_type", "resource_id"),
         Index("ix_activity_logs_action", "action"),
+        Index("ix_activity_logs_task_id_created_at", "task_id", "created_at"),
+        # Monthly range partitions, see services/activity_partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     def __repr__(self):
         return f"<ActivityLog(id={self.id}, user={self.user_id}, action={self.action}, resource={self.resource_type}:{self.resource_id})>"
+
+
+class ActivityFeedEntry(Base):
+    """
+    Fan-out-on-write feed: one row per activity entry per user who can see it.
+
+    Written by services/activity_feed.py whenever activity is logged and when
+    task shares change, so GET /activity reads one user's rows in
+    (created_at, activity_id) order straight off the primary key.
+    """
+
+    __tablename__ = "activity_feed"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    created_at = Column(DateTime(timezone=True), primary_key=True)
+    # References activity_logs (id, created_at); no FK so retention can drop partitions
+    activity_id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=True)
+    actor_id = Column(Integer, nullable=False)
+
+    __table_args__ = (Index("ix_activity_feed_task_id", "task_id"),)
+
+    def __repr__(self):
+        return f"<ActivityFeedEntry(user={self.user_id}, activity={self.activity_id})>"
+
+
+# A partitioned table accepts no rows until it has partitions. The DEFAULT
+# partition catches anything outside the monthly partitions created by the
+# maintenance job (and is all create_all-built test databases need).
+event.listen(
+    ActivityLog.__table__,
+    "after_create",
+    DDL(
+        "CREATE TABLE IF NOT EXISTS %(fullname)s_default "
+        "PARTITION OF %(fullname)s DEFAULT"
+    ),
+)
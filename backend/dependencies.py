@@ -10,6 +10,7 @@ from core.exceptions import UnauthorizedTaskAccessError
 from core.security import verify_access_token
 from core.settings import settings
 from db_config import get_db
+from services import permission_cache, token_versions
 
 
 # Custom HTTPBearer that raises 401 instead of 403
@@ -39,66 +40,98 @@ class TaskPermission(Enum):
 security = HTTPBearerAuth(auto_error=False)
 
 
-def get_current_user(
-    request: Request,
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db_session: Session = Depends(get_db),
-) -> db_models.User:
-    """
-    Dependency that extracts and verifies JWT token from request
-    Returns the authenticated User object.
-    Raises 401 if token is missing, invalid, or user not found.
-    Also stores user in request.state for rate limiting.
-    """
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _token_payload(
+    request: Request, credentials: Optional[HTTPAuthorizationCredentials]
+) -> dict:
+    """Decoded JWT from the bearer header or the auth cookie."""
     # Compatibility mode: prefer bearer header if provided, else fall back to cookie auth.
     token = credentials.credentials if credentials else None
     if not token:
         token = request.cookies.get(settings.ACCESS_TOKEN_COOKIE_NAME)
 
     if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("Not authenticated")
 
     # Verify and decode token
     payload = verify_access_token(token)
     if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("Invalid or expired token")
 
-    # Extract username from token payload
-    username: str | None = payload.get("sub")
-    if username is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token payload",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    if payload.get("sub") is None:
+        raise _unauthorized("Invalid token payload")
 
-    # Look up user in database
-    user = (
-        db_session.query(db_models.User)
-        .filter(db_models.User.username == username)
-        .first()
-    )
+    return payload
+
+
+def get_current_user(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db_session: Session = Depends(get_db),
+) -> db_models.User:
+    """
+    Dependency that extracts and verifies JWT token from request
+    Returns the authenticated User object.
+    Raises 401 if token is missing, invalid, revoked, or user not found.
+    Also stores user in request.state for rate limiting.
+    """
+    payload = _token_payload(request, credentials)
+
+    # Look up user in database (tokens issued before the uid claim only have sub)
+    query = db_session.query(db_models.User)
+    if "uid" in payload:
+        query = query.filter(db_models.User.id == payload["uid"])
+    else:
+        query = query.filter(db_models.User.username == payload["sub"])
+    user = query.first()
 
     if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise _unauthorized("User not found")
+
+    if "ver" in payload and payload["ver"] != user.token_version:
+        raise _unauthorized("Token has been revoked")
 
     request.state.user = user
+    request.state.user_id = user.id
 
     return user
 
 
+def get_current_user_id(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    db_session: Session = Depends(get_db),
+) -> int:
+    """
+    Like get_current_user, but returns only the user's id and, for current
+    tokens, runs no database query: the id comes from the uid claim and the
+    revocation check uses the token version cached in Redis. Use it for
+    endpoints that need nothing but the id.
+    """
+    payload = _token_payload(request, credentials)
+
+    if "uid" not in payload or "ver" not in payload:
+        # Token from before the uid/ver claims
+        return get_current_user(request, credentials, db_session).id  # type: ignore
+
+    user_id: int = payload["uid"]
+    version = token_versions.current_token_version(user_id, db_session)
+    if version is None:
+        raise _unauthorized("User not found")
+    if payload["ver"] != version:
+        raise _unauthorized("Token has been revoked")
+
+    request.state.user_id = user_id
+    return user_id
+
+
 def get_user_task_permission(
     task: db_models.Task, user: db_models.User, db_session: Session
 ) -> TaskPermission:
@@ -115,23 +148,16 @@ def get_user_task_permission(
     if task.user_id == user.id:  # type: ignore
         return TaskPermission.OWNER
 
-    # Check if task is shared with this user
-    share = (
-        db_session.query(db_models.TaskShare)
-        .filter(
-            db_models.TaskShare.task_id == task.id,
-            db_models.TaskShare.shared_with_user_id == user.id,
-        )
-        .first()
+    # Shared access, from the user's cached permission map when possible
+    permission = permission_cache.lookup_permission(
+        user.id, task.id, db_session  # type: ignore
     )
 
-    if not share:
-        return TaskPermission.NONE
-
-    if share.permission == "edit":  # type: ignore
+    if permission == "edit":
         return TaskPermission.EDIT
-    else:
+    if permission == "view":
         return TaskPermission.VIEW
+    return TaskPermission.NONE
 
 
 def require_task_access(
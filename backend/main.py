@@ -3,21 +3,29 @@ from contextlib import asynccontextmanager
 
 import core.exceptions as exceptions
 from core.logging_config import setup_logging
+from core.rate_limit_config import retry_after_header
+from core.security import password_hasher
 from core.settings import settings
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from routers import (
     activity,
     auth,
     comments,
+    events,
     files,
     health,
     notifications,
     sharing,
+    sync,
     tasks,
+    transfer,
     users,
 )
+from core.redis_config import start_invalidation_listener, stop_invalidation_listener
+from services.activity_writer import activity_writer
 
 # cd task-manager-api
 # source venv/bin/activate
@@ -32,14 +40,6 @@ setup_logging()
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
-# Check if testing before importing rate limiter
-TESTING = settings.TESTING
-
-if not TESTING:
-    from core.rate_limit_config import limiter
-    from slowapi import _rate_limit_exceeded_handler
-    from slowapi.errors import RateLimitExceeded
-
 # --- Application Setup ---
 
 
@@ -47,9 +47,15 @@ if not TESTING:
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Task Manager API starting up")
+    activity_writer.start()
+    start_invalidation_listener()
     yield
     # Shutdown
     logger.info("Task Manager API shutting down")
+    # Flush buffered activity entries so the audit trail is complete
+    activity_writer.stop()
+    stop_invalidation_listener()
+    password_hasher.shutdown()
 
 
 # Define the order and details for your docs
@@ -109,16 +115,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Comment pages (GET /tasks/{task_id}/comments?limit=)
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Only add rate limiter if not testing
-if not TESTING:
-    app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)  # type: ignore
-    logger.info("Rate limiting enabled")
-else:
-    logger.info("Rate limiting disabled (testing mode)")
-
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL,
+)
 
 # Log application startup
 logger.info("Task Manager API starting up")
@@ -140,6 +145,8 @@ def favicon():
 
 app.include_router(notifications.router)
 app.include_router(sharing.sharing_router)
+# Before tasks.router, whose /tasks/{task_id} would otherwise match /tasks/export
+app.include_router(transfer.router)
 app.include_router(tasks.router)
 app.include_router(auth.router)
 app.include_router(files.task_files_router)
@@ -148,6 +155,8 @@ app.include_router(health.router)
 app.include_router(comments.task_comments_router)
 app.include_router(comments.comments_router)
 app.include_router(activity.router)
+app.include_router(events.router)
+app.include_router(sync.router)
 app.include_router(users.router)
 
 
@@ -211,6 +220,31 @@ async def duplicate_user_handler(request: Request, exc: exceptions.DuplicateUser
     )
 
 
+@app.exception_handler(exceptions.RateLimitExceededError)
+async def rate_limit_exceeded_handler(
+    request: Request, exc: exceptions.RateLimitExceededError
+):
+    """Handle RateLimitExceededError by returning 429"""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"error": "Rate Limit Exceeded", "message": exc.message},
+        headers={"Retry-After": retry_after_header(exc.retry_after)},
+    )
+
+
+@app.exception_handler(exceptions.PasswordHashingBusyError)
+async def password_hashing_busy_handler(
+    request: Request, exc: exceptions.PasswordHashingBusyError
+):
+    """Handle PasswordHashingBusyError by returning 503"""
+    logger.warning(f"PasswordHashingBusyError: shed {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"error": "Service Busy", "message": exc.message},
+        headers={"Retry-After": "1"},
+    )
+
+
 @app.exception_handler(exceptions.InvalidCredentialsError)
 async def invalid_credentials_handler(
     request: Request, exc: exceptions.InvalidCredentialsError
@@ -6,7 +6,13 @@ from sqlalchemy.orm import Session
 import db_models
 from core import exceptions
 from core.rate_limit_config import limiter
-from core.security import create_access_token, hash_password, verify_password
+from core.security import (
+    clear_auth_cookie,
+    create_user_access_token,
+    hash_password,
+    set_auth_cookie,
+    verify_and_update_password,
+)
 from core.settings import settings
 from core.tokens import generate_token, verify_token_expiration
 from db_config import get_db
@@ -18,7 +24,8 @@ from schemas.auth import (
     UserLogin,
     UserResponse,
 )
-from services.notifications import send_direct_email
+from services import token_versions
+from services.notifications import create_default_preferences, send_direct_email
 
 FRONTEND_URL = settings.FRONTEND_URL
 
@@ -26,27 +33,6 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 logger = logging.getLogger(__name__)
 
 
-def _set_auth_cookie(response: Response, access_token: str) -> None:
-    response.set_cookie(
-        key=settings.ACCESS_TOKEN_COOKIE_NAME,
-        value=access_token,
-        httponly=True,
-        secure=settings.cookie_secure,
-        samesite=settings.cookie_samesite,
-        max_age=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        path="/",
-        domain=settings.cookie_domain,
-    )
-
-
-def _clear_auth_cookie(response: Response) -> None:
-    response.delete_cookie(
-        key=settings.ACCESS_TOKEN_COOKIE_NAME,
-        path="/",
-        domain=settings.cookie_domain,
-    )
-
-
 @router.post(
     "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
 )
@@ -101,6 +87,11 @@ def register_user(
     )
 
     db_session.add(new_user)
+    db_session.flush()
+
+    # Create preferences up front so notification checks never have to write
+    create_default_preferences(new_user.id, db_session)  # type: ignore
+
     db_session.commit()
     db_session.refresh(new_user)
 
@@ -139,15 +130,30 @@ def login_user(
     )
 
     # Check if user exists and if password is correct
-    if not user or not verify_password(login_data.password, user.hashed_password):  # type: ignore
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = verify_and_update_password(
+            login_data.password, user.hashed_password  # type: ignore
+        )
+    if not user or not valid:
         logger.warning(
             f"Login failed for username: {login_data.username} (invalid credentials)"
         )
         raise exceptions.InvalidCredentialsError()
 
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS
+        user.hashed_password = new_hash  # type: ignore
+        db_session.commit()
+        logger.info(f"Password rehashed for user_id={user.id}")
+
     # Create access token
-    access_token = create_access_token(data={"sub": user.username})
-    _set_auth_cookie(response, access_token)
+    access_token = create_user_access_token(
+        user.username, user.id, user.token_version  # type: ignore
+    )
+    set_auth_cookie(response, access_token)
+    # Warm the revocation check used by get_current_user_id
+    token_versions.cache_token_version(user.id, user.token_version)  # type: ignore
 
     logger.info(f"Login successful for user: {user.username} (user_id={user.id})")
 
@@ -160,7 +166,7 @@ def logout_user(response: Response):
     Clear auth cookie.
     Kept idempotent so frontend can always call logout without checking auth state first.
     """
-    _clear_auth_cookie(response)
+    clear_auth_cookie(response)
     return {"message": "Logged out successfully"}
 
 
@@ -281,6 +287,8 @@ def verify_password_reset(
     user.hashed_password = hash_password(request.new_password)  # type: ignore
     user.password_reset_token = None  # type: ignore
     user.password_reset_token_expires = None  # type: ignore
+    # Sign out every existing session
+    token_versions.revoke_tokens(db_session, user)
 
     db_session.commit()
 
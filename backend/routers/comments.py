@@ -1,15 +1,25 @@
 import logging
-
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from typing import Optional, Union
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session, joinedload
 
 import db_models
-from core import exceptions
-from core.redis_config import invalidate_user_cache
+from core import exceptions, streaming
+from core.pagination import decode_cursor, encode_cursor
 from db_config import get_db
 from dependencies import TaskPermission, get_current_user, require_task_access
-from schemas.comment import Comment, CommentCreate, CommentUpdate
-from services import activity_service
+from schemas.comment import Comment, CommentCreate, CommentPage, CommentUpdate
+from services import activity_service, events, http_cache, sync
 from services.background_tasks import notify_comment_added
 
 task_comments_router = APIRouter(prefix="/tasks", tags=["comments"])
@@ -18,6 +28,22 @@ comments_router = APIRouter(prefix="/comments", tags=["comments"])
 logger = logging.getLogger(__name__)
 
 
+def _adjust_comment_count(db_session: Session, task_id: int, delta: int) -> None:
+    """
+    Keep tasks.comment_count in step, as one atomic UPDATE. updated_at is kept:
+    a comment isn't an edit of the task. change_xid still moves (onupdate), so
+    /sync sends the new count. The comment row's own flush drives cache and
+    ETag invalidation, so skipping ORM events here is fine.
+    """
+    db_session.query(db_models.Task).filter(db_models.Task.id == task_id).update(
+        {
+            db_models.Task.comment_count: db_models.Task.comment_count + delta,
+            db_models.Task.updated_at: db_models.Task.updated_at,
+        },
+        synchronize_session=False,
+    )
+
+
 @task_comments_router.post(
     "/{task_id}/comments", response_model=Comment, status_code=status.HTTP_201_CREATED
 )
@@ -45,6 +71,7 @@ def add_comment(
 
     db_session.add(comment)
     db_session.flush()
+    _adjust_comment_count(db_session, task_id, 1)
 
     activity_service.log_comment_created(
         db_session=db_session, user_id=current_user.id, comment=comment  # type: ignore
@@ -62,8 +89,6 @@ def add_comment(
             comment_content=comment_data.content,
         )
 
-    invalidate_user_cache(current_user.id)  # type: ignore
-
     logger.info(f"Successfully added comment_id={comment.id} for task_id={task_id}")
     return {
         "id": comment.id,
@@ -76,13 +101,41 @@ def add_comment(
     }
 
 
-@task_comments_router.get("/{task_id}/comments", response_model=list[Comment])
+def _serialize_comment(comment: db_models.TaskComment) -> dict:
+    return {
+        "id": comment.id,
+        "task_id": comment.task_id,
+        "user_id": comment.user_id,
+        "content": comment.content,
+        "created_at": comment.created_at,
+        "updated_at": comment.updated_at,
+        "username": comment.user.username if comment.user else None,
+    }
+
+
+@task_comments_router.get(
+    "/{task_id}/comments",
+    response_model=Union[list[Comment], CommentPage],
+    dependencies=[Depends(http_cache.task_conditional_get)],
+)
 def get_comments(
     task_id: int,
+    response: Response,
     db_session: Session = Depends(get_db),
     current_user: db_models.User = Depends(get_current_user),
+    limit: Optional[int] = Query(
+        None, ge=1, le=100, description="Page size; omit for the whole thread"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page"
+    ),
 ):
-    """List all comments attached to a task"""
+    """
+    List the comments on a task, oldest first, streamed from a server-side cursor.
+
+    With limit, returns one page as {items, next_cursor}, like GET /activity
+    and GET /tasks/visible; follow next_cursor for further pages.
+    """
     logger.info(f"Listing comments for task_id={task_id}, user_id={current_user.id}")
 
     # Check if task exists and user owns it
@@ -93,27 +146,35 @@ def get_comments(
 
     require_task_access(task, current_user, db_session, TaskPermission.VIEW)
 
-    comments = (
-        db_session.query(db_models.TaskComment)
-        .options(joinedload(db_models.TaskComment.user))
-        .filter(db_models.TaskComment.task_id == task_id)
-        .order_by(db_models.TaskComment.created_at)
-        .all()
+    # Keyset on ix_task_comments_task_id_created_at_id
+    thread_key = tuple_(db_models.TaskComment.created_at, db_models.TaskComment.id)
+    thread_order = (db_models.TaskComment.created_at, db_models.TaskComment.id)
+
+    comments = db_session.query(db_models.TaskComment).filter(
+        db_models.TaskComment.task_id == task_id
     )
+    if cursor:
+        comments = comments.filter(thread_key > tuple_(*decode_cursor(cursor)))
 
-    logger.info(f"Found {len(comments)} comments for task_id={task_id}")
-    return [
-        {
-            "id": c.id,
-            "task_id": c.task_id,
-            "user_id": c.user_id,
-            "content": c.content,
-            "created_at": c.created_at,
-            "updated_at": c.updated_at,
-            "username": c.user.username if c.user else None,
+    comments = comments.options(joinedload(db_models.TaskComment.user)).order_by(
+        *thread_order
+    )
+
+    if limit:
+        page = comments.limit(limit + 1).all()
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor(page[-1].created_at, page[-1].id)
+        return {
+            "items": [_serialize_comment(comment) for comment in page],
+            "next_cursor": next_cursor,
         }
-        for c in comments
-    ]
+
+    # ETag and Cache-Control
+    return streaming.json_array_response(
+        comments, _serialize_comment, headers=response.headers
+    )
 
 
 @comments_router.patch("/{comment_id}", response_model=Comment)
@@ -223,9 +284,15 @@ def delete_comment(
     activity_service.log_comment_deleted(
         db_session=db_session, user_id=current_user.id, comment=comment  # type: ignore
     )
+    sync.record_deletion(
+        db_session,
+        "comment",
+        comment_id,
+        events.task_audience(db_session, comment.task_id),  # type: ignore
+        task_id=comment.task_id,  # type: ignore
+    )
+    _adjust_comment_count(db_session, comment.task_id, -1)  # type: ignore
     db_session.delete(comment)
     db_session.commit()
 
-    invalidate_user_cache(current_user.id)  # type: ignore
-
     logger.info(f"Comment deleted successfully: comment_id={comment_id}")
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from core.redis_config import async_redis_client
+from db_config import get_db
+from dependencies import get_current_user_id
+from services.events import event_stream
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+@router.get("")
+async def stream_events(
+    request: Request,
+    db_session: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Server-sent event stream of task, comment, share and file changes
+    visible to the current user.
+    """
+    # The stream can stay open for hours; don't hold a pooled DB connection for it
+    db_session.close()
+
+    if not async_redis_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live events are unavailable",
+        )
+
+    return StreamingResponse(
+        event_stream(request, current_user_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx-style proxies from buffering the stream
+            "X-Accel-Buffering": "no",
+            # Keep GZipMiddleware from buffering frames to compress them
+            "Content-Encoding": "identity",
+        },
+    )
@@ -14,7 +14,7 @@ from core.storage import get_file_path, storage
 from db_config import get_db
 from dependencies import TaskPermission, get_current_user, require_task_access
 from schemas.file import FileUploadResponse, TaskFileInfo
-from services import activity_service
+from services import activity_service, http_cache
 
 # Router for task-related file endpoints
 task_files_router = APIRouter(prefix="/tasks", tags=["files"])
@@ -137,7 +137,11 @@ async def upload_file(
     return task_file
 
 
-@task_files_router.get("/{task_id}/files", response_model=list[TaskFileInfo])
+@task_files_router.get(
+    "/{task_id}/files",
+    response_model=list[TaskFileInfo],
+    dependencies=[Depends(http_cache.task_conditional_get)],
+)
 def list_task_files(
     task_id: int,
     db_session: Session = Depends(get_db),
@@ -5,6 +5,8 @@ from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from core.rate_limit_config import limiter
+from core.redis_config import cache_stats
 from core.settings import settings
 from db_config import get_db
 
@@ -30,6 +32,18 @@ def health_check(db_session: Session = Depends(get_db)):
     return {"status": "ok", "database": db_status}
 
 
+@router.get("/health/cache")
+def cache_health():
+    """L1 (in-process) and L2 (Redis) cache hit ratios for this instance."""
+    return cache_stats()
+
+
+@router.get("/health/rate-limit")
+def rate_limit_health():
+    """Rate limiter decisions, rejections and decision latency for this instance."""
+    return limiter.metrics.stats()
+
+
 @router.get("/version")
 def get_version():
     return {"version": "0.1.0", "environment": settings.ENVIRONMENT}
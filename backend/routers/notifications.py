@@ -14,6 +14,7 @@ from schemas.notification import (
     NotificationPreferenceUpdate,
 )
 from services.notifications import (
+    cache_preferences,
     get_or_create_preferences,
     send_direct_email,
     subscribe_user_to_notifications,
@@ -54,6 +55,9 @@ def update_notification_preferences(
     db_session.commit()
     db_session.refresh(prefs)
 
+    # Write-through so background notifications see the new settings immediately
+    cache_preferences(prefs)
+
     return prefs
 
 
@@ -115,6 +119,7 @@ def _verify_email_token(token: str, db_session: Session):
     prefs.email_verified = True  # type: ignore
 
     db_session.commit()
+    cache_preferences(prefs)
 
     logger.info(f"Email verified successfully for user_id={user.id}")
     return user
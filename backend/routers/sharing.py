@@ -1,9 +1,19 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session, joinedload
 
 import db_models
-from core import exceptions
-from core.redis_config import invalidate_user_cache
+from core import cache, exceptions
 from db_config import get_db
 from dependencies import TaskPermission, get_current_user, require_task_access
 from schemas.sharing import (
@@ -11,37 +21,59 @@ from schemas.sharing import (
     TaskShareCreate,
     TaskShareResponse,
     TaskShareUpdate,
+    VisibleTaskPage,
 )
-from services import activity_service
+from services import activity_feed, activity_service, sync, task_listing
 from services.background_tasks import notify_task_shared
 
 sharing_router = APIRouter(prefix="/tasks", tags=["sharing"])
 
 
-@sharing_router.get("/shared-with-me", response_model=list[SharedTaskResponse])
+@cache.cached(
+    "tasks:shared_with_me_page",
+    model=VisibleTaskPage,
+    tags=lambda args: [cache.share_tag(args["current_user"].id)],
+)
+def _shared_tasks_page(
+    db_session: Session,
+    current_user: db_models.User,
+    limit: int,
+    cursor: Optional[str],
+):
+    # Cached as a whole page, so a hit has the next cursor too
+    return task_listing.visible_tasks_page(
+        db_session,
+        current_user.id,  # type: ignore
+        scope="shared",
+        limit=limit,
+        cursor=cursor,
+    )
+
+
+@sharing_router.get(
+    "/shared-with-me",
+    response_model=list[SharedTaskResponse],
+    response_class=ORJSONResponse,
+    deprecated=True,
+)
 def get_shared_tasks(
+    response: Response,
     db_session: Session = Depends(get_db),
     current_user: db_models.User = Depends(get_current_user),
+    limit: int = Query(default=100, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        default=None, description="X-Next-Cursor from the previous page"
+    ),
 ):
-    """Get all tasks that have been shared with the current user"""
-
-    # Query for shares where current user is the recipient
-    shares = (
-        db_session.query(db_models.TaskShare)
-        .options(joinedload(db_models.TaskShare.task).joinedload(db_models.Task.owner))
-        .filter(db_models.TaskShare.shared_with_user_id == current_user.id)
-        .all()
-    )
-
-    return [
-        {
-            "task": share.task,
-            "permission": share.permission,
-            "is_owner": False,
-            "owner_username": share.task.owner.username,
-        }
-        for share in shares
-    ]
+    """
+    Get tasks that have been shared with the current user, newest first.
+    Sets X-Next-Cursor when more follow; pass it back as cursor.
+    Superseded by GET /tasks/visible?scope=shared, which returns next_cursor.
+    """
+    page = _shared_tasks_page(db_session, current_user, limit, cursor)
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return page["items"]
 
 
 @sharing_router.get("/{task_id}/shares", response_model=list[TaskShareResponse])
@@ -155,6 +187,12 @@ def share_task(
         shared_with_user=shared_with_user,
         permission=share_data.permission,
     )
+    activity_feed.grant_task_activity(
+        db_session, task_id=task_id, user_id=shared_with_user.id  # type: ignore
+    )
+    sync.clear_task_tombstone(
+        db_session, task_id=task_id, user_id=shared_with_user.id  # type: ignore
+    )
 
     db_session.commit()
     db_session.refresh(share)
@@ -169,8 +207,6 @@ def share_task(
         permission=share_data.permission,
     )
 
-    invalidate_user_cache(current_user.id)  # type: ignore
-
     return {
         "id": share.id,
         "task_id": share.task_id,
@@ -292,6 +328,18 @@ def unshare_task(
 
     # Delete the share
     db_session.delete(share)
+    activity_feed.revoke_task_activity(
+        db_session, task_id=task_id, user_id=share.shared_with_user_id  # type: ignore
+    )
+    # The sharee drops the task itself; the owner only the share
+    sync.record_deletion(
+        db_session,
+        "share",
+        share.id,  # type: ignore
+        {task.user_id, share.shared_with_user_id},  # type: ignore
+        task_id=task_id,
+    )
+    sync.record_deletion(
+        db_session, "task", task_id, [share.shared_with_user_id]  # type: ignore
+    )
     db_session.commit()
-
-    invalidate_user_cache(current_user.id)  # type: ignore
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+
+from db_config import get_db
+from dependencies import get_current_user_id
+from schemas.sync import SyncResponse
+from services import sync
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("", response_model=SyncResponse, response_class=ORJSONResponse)
+def get_changes(
+    since: Optional[int] = Query(default=None, ge=0),
+    db_session: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Tasks, comments, shares and deletions changed since a token from a
+    previous sync. Without since, returns everything visible to the user.
+    """
+    return sync.sync_changes(db_session, user_id=current_user_id, since=since)
@@ -1,7 +1,5 @@
-import json
 import logging
 import time
-from collections import Counter
 from datetime import date, datetime
 from typing import Any, Literal, Optional
 
@@ -14,25 +12,37 @@ from fastapi import (
     Request,
     status,
 )
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import distinct, func
 from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.orm.attributes import flag_modified
 
 import db_models
-from core import exceptions
+from core import cache, exceptions
 from core.rate_limit_config import limiter
-from core.redis_config import get_cache, invalidate_user_cache, set_cache
 from db_config import get_db
 from dependencies import TaskPermission, get_current_user, require_task_access
+from schemas.sharing import VisibleTaskPage
 from schemas.task import (
     BulkTaskUpdate,
     PaginatedTasks,
     Task,
     TaskCreate,
+    TaskListItem,
+    TaskOccurrence,
     TaskStats,
     TaskUpdate,
 )
-from services import activity_service
+from services import (
+    activity_feed,
+    activity_service,
+    events,
+    http_cache,
+    recurrence,
+    subtasks,
+    sync,
+    task_listing,
+)
 from services.background_tasks import cleanup_after_task_deletion, notify_task_completed
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
@@ -53,10 +63,41 @@ def serialize_value(value: Any) -> Any:
     return value
 
 
+def get_parent_task(
+    db_session: Session, parent_id: Optional[int], current_user: db_models.User
+) -> Optional[db_models.Task]:
+    """
+    The task to nest under (None: top level). Subtasks belong to the owner of
+    their parent, so the user must own it: an edit share isn't enough.
+    """
+    if parent_id is None:
+        return None
+
+    parent = (
+        db_session.query(db_models.Task).filter(db_models.Task.id == parent_id).first()
+    )
+    if not parent:
+        logger.warning(f"Parent task not found: task_id={parent_id}")
+        raise exceptions.TaskNotFoundError(task_id=parent_id)
+
+    require_task_access(parent, current_user, db_session, TaskPermission.OWNER)
+    return parent
+
+
 # --- Endpoints ---
 
 
-@router.get("", response_model=PaginatedTasks)
+@router.get(
+    "",
+    response_model=PaginatedTasks,
+    response_class=ORJSONResponse,
+    dependencies=[Depends(http_cache.user_conditional_get)],
+)
+@cache.cached(
+    "tasks:list",
+    model=PaginatedTasks,
+    tags=lambda args: [cache.user_tag(args["current_user"].id)],
+)
 def get_all_tasks(
     db_session: Session = Depends(get_db),
     current_user: db_models.User = Depends(get_current_user),
@@ -87,57 +128,18 @@ def get_all_tasks(
         db_models.Task.user_id == current_user.id
     )
 
-    # Completion and priority filters
-    if completed is not None:
-        query = query.filter(db_models.Task.completed == completed)
-
-    if priority is not None:
-        query = query.filter(db_models.Task.priority == priority)
-
-    # Tag filter
-    if tags:
-        # Split by comma, then strip whitespace
-        tag_list = [tag.strip() for tag in tags.split(",")]
-        # Filter out empty strings
-        tag_list = [t for t in tag_list if t]
-        query = query.filter(db_models.Task.tags.contains(tag_list))
-
-    # Title and description filters
-    if search:
-        search_pattern = f"%{search.lower()}%"
-        query = query.filter(
-            (db_models.Task.title.ilike(search_pattern))
-            | (db_models.Task.description.ilike(search_pattern))
-        )
-
-    # Date filters
-    if created_after:
-        query = query.filter(db_models.Task.created_at >= created_after)
-
-    if created_before:
-        query = query.filter(db_models.Task.created_at <= created_before)
-
-    if due_after:
-        query = query.filter(db_models.Task.due_date >= due_after)
-
-    if due_before:
-        query = query.filter(db_models.Task.due_date <= due_before)
-
-    # Overdue filter
-    if overdue:
-        today = date.today()
-        if overdue:
-            query = query.filter(
-                db_models.Task.due_date.isnot(None),
-                db_models.Task.completed.is_(False),
-                db_models.Task.due_date < today,
-            )
-        else:
-            query = query.filter(
-                (db_models.Task.due_date.is_(None))
-                | (db_models.Task.completed.is_(True))
-                | (db_models.Task.due_date >= today)
-            )
+    query = task_listing.apply_task_filters(
+        query,
+        completed=completed,
+        priority=priority,
+        tags=tags,
+        overdue=overdue,
+        search=search,
+        created_after=created_after,
+        created_before=created_before,
+        due_after=due_after,
+        due_before=due_before,
+    )
 
     # Apply sorting
     if sort_by:
@@ -149,8 +151,10 @@ def get_all_tasks(
 
     total_count = query.count()
 
-    # Apply pagination
-    tasks = query.offset(skip).limit(limit).all()
+    # Apply pagination. Shares for share_count; comments aren't listed
+    tasks = (
+        query.options(selectinload(db_models.Task.shares)).offset(skip).limit(limit).all()
+    )
 
     logger.info(
         f"Successfully retrieved {len(tasks)} tasks for user_id={current_user.id}"
@@ -163,58 +167,172 @@ def get_all_tasks(
     }
 
 
-@router.get("/stats", response_model=TaskStats)
+@router.get(
+    "/visible",
+    response_model=VisibleTaskPage,
+    response_class=ORJSONResponse,
+    dependencies=[Depends(http_cache.user_conditional_get)],
+)
+@cache.cached(
+    "tasks:visible",
+    model=VisibleTaskPage,
+    tags=lambda args: [
+        cache.user_tag(args["current_user"].id),
+        cache.share_tag(args["current_user"].id),
+    ],
+)
+def get_visible_tasks(
+    db_session: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+    scope: Literal["owned", "shared", "all"] = "all",
+    completed: Optional[bool] = None,
+    priority: Optional[Literal["low", "medium", "high"]] = None,
+    tags: Optional[str] = Query(
+        default=None,
+        description="Comma seperated list of tags. Tasks must contain ALL listed tags",
+    ),
+    overdue: Optional[bool] = None,
+    search: Optional[str] = None,
+    created_after: Optional[date] = None,
+    created_before: Optional[date] = None,
+    due_after: Optional[date] = None,
+    due_before: Optional[date] = None,
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        default=None, description="next_cursor from the previous page"
+    ),
+):
+    """
+    Tasks the user owns and/or that are shared with them, newest first.
+    Same filters as GET /tasks; follow next_cursor for further pages.
+    """
+    logger.info(f"Retrieving {scope} visible tasks for user_id={current_user.id}")
+
+    return task_listing.visible_tasks_page(
+        db_session,
+        current_user.id,  # type: ignore
+        scope=scope,
+        limit=limit,
+        cursor=cursor,
+        completed=completed,
+        priority=priority,
+        tags=tags,
+        overdue=overdue,
+        search=search,
+        created_after=created_after,
+        created_before=created_before,
+        due_after=due_after,
+        due_before=due_before,
+    )
+
+
+@router.get(
+    "/occurrences",
+    response_model=list[TaskOccurrence],
+    response_class=ORJSONResponse,
+    dependencies=[Depends(http_cache.user_conditional_get)],
+)
+@cache.cached(
+    "tasks:occurrences",
+    model=list[TaskOccurrence],
+    tags=lambda args: [cache.user_tag(args["current_user"].id)],
+)
+def get_task_occurrences(
+    due_after: date,
+    due_before: date,
+    db_session: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+    completed: Optional[bool] = None,
+    priority: Optional[Literal["low", "medium", "high"]] = None,
+    tags: Optional[str] = Query(
+        default=None,
+        description="Comma seperated list of tags. Tasks must contain ALL listed tags",
+    ),
+    search: Optional[str] = None,
+):
+    """
+    The user's tasks due between due_after and due_before (inclusive, at most
+    RECURRENCE_MAX_RANGE_DAYS apart), plus upcoming occurrences of recurring
+    tasks that haven't been created yet (virtual: true, task_id null).
+    """
+    logger.info(
+        f"Listing occurrences {due_after}..{due_before} for user_id={current_user.id}"
+    )
+
+    return recurrence.list_occurrences(
+        db_session,
+        current_user.id,  # type: ignore
+        due_after,
+        due_before,
+        completed=completed,
+        priority=priority,
+        tags=tags,
+        search=search,
+    )
+
+
+@router.get(
+    "/stats",
+    response_model=TaskStats,
+    dependencies=[Depends(http_cache.user_conditional_get)],
+)
+@cache.cached(
+    "tasks:stats",
+    model=TaskStats,
+    # comments_posted counts comments on shared tasks too
+    tags=lambda args: [
+        cache.user_tag(args["current_user"].id),
+        cache.share_tag(args["current_user"].id),
+    ],
+)
 def get_task_stats(
     db_session: Session = Depends(get_db),
     current_user: db_models.User = Depends(get_current_user),
 ):
-    """Get statistics about all tasks with Redis caching"""
+    """Get statistics about all tasks (cached in Redis by core.cache)"""
     start_time = time.time()
-    logger.info(f"Retrieving task statistics for user_id={current_user.id}")
-
-    cache_key = f"stats:user_{current_user.id}"
-    cached_stats = get_cache(cache_key)
-
-    if cached_stats:
-        # Cache hit - Return cached data
-        stats_dict = json.loads(cached_stats)
-        elapsed_time = (time.time() - start_time) * 1000
-        logger.info(
-            f"Returning cached statistics for user_id={current_user.id} "
-            f"| Time: {elapsed_time:.2f}ms"
-        )
-        return stats_dict
-
-    # Cache miss - calculate stats from database
     logger.info(f"Calculating fresh statistics for user_id={current_user.id}")
 
-    all_tasks: list[db_models.Task] = (
-        db_session.query(db_models.Task)
-        .filter(db_models.Task.user_id == current_user.id)
-        .all()
+    # Aggregated in SQL, so memory doesn't grow with the number of tasks
+    today = date.today()
+    owned = db_models.Task.user_id == current_user.id
+    totals = (
+        db_session.query(
+            func.count().label("total"),
+            func.count().filter(db_models.Task.completed.is_(True)).label("completed"),
+            func.count()
+            .filter(
+                db_models.Task.due_date.isnot(None),
+                db_models.Task.completed.is_(False),
+                db_models.Task.due_date < today,
+            )
+            .label("overdue"),
+        )
+        .filter(owned)
+        .one()
     )
 
-    total = len(all_tasks)
-    completed = sum(1 for t in all_tasks if t.completed is True)
+    total = totals.total
+    completed = totals.completed
     incomplete = total - completed
+    overdue = totals.overdue
 
     # Count by priority
-    by_priority = Counter(t.priority for t in all_tasks)
+    by_priority = dict(
+        db_session.query(db_models.Task.priority, func.count())
+        .filter(owned)
+        .group_by(db_models.Task.priority)
+        .all()
+    )
 
     # Count by tag (each tag counted seperately)
-    all_tags: list[str] = []
-    for task in all_tasks:
-        all_tags.extend(task.tags)  # type: ignore[arg-type]
-    by_tag = Counter(all_tags)
-
-    # Count overdue tasks
-    today = date.today()
-    overdue = sum(
-        1
-        for t in all_tasks
-        if t.due_date is not None  # type: ignore[arg-type]
-        and not t.completed  # type: ignore[arg-type]
-        and t.due_date < today
+    tag_rows = (
+        db_session.query(func.unnest(db_models.Task.tags).label("tag"))
+        .filter(owned)
+        .subquery()
+    )
+    by_tag = dict(
+        db_session.query(tag_rows.c.tag, func.count()).group_by(tag_rows.c.tag).all()
     )
 
     tasks_shared = (
@@ -235,19 +353,16 @@ def get_task_stats(
         "total": total,
         "completed": completed,
         "incomplete": incomplete,
-        "by_priority": dict(by_priority),
-        "by_tag": dict(by_tag),
+        "by_priority": by_priority,
+        "by_tag": by_tag,
         "overdue": overdue,
         "tasks_shared": tasks_shared,
         "comments_posted": comments_posted,
     }
 
-    # Store in cache for next time
-    set_cache(cache_key, json.dumps(stats_dict))
-
     elapsed_time = (time.time() - start_time) * 1000
     logger.info(
-        f"Successfully calculated and cached statistics for "
+        f"Successfully calculated statistics for "
         f"user_id={current_user.id} | Time: {elapsed_time:.2f}ms"
     )
 
@@ -301,14 +416,28 @@ def bulk_update_tasks(
     for task in tasks:
         require_task_access(task, current_user, db_session, TaskPermission.EDIT)
 
+    parent = None
+    if "parent_id" in update_data:
+        # Only the owner rearranges their task tree
+        for task in tasks:
+            require_task_access(task, current_user, db_session, TaskPermission.OWNER)
+        parent = get_parent_task(db_session, update_data["parent_id"], current_user)
+
     logger.info(
         f"Bulk update authorized for user_id{current_user.id} on {len(tasks)} tasks"
     )
 
     # Update each task
     for task in tasks:
+        if "parent_id" in update_data:
+            subtasks.move(db_session, task, parent)
+        was_completed = bool(task.completed)
         for field, value in update_data.items():
             setattr(task, field, value)
+        if recurrence.SCHEDULE_FIELDS & update_data.keys():
+            recurrence.schedule_series(db_session, task)
+        if bool(task.completed) != was_completed:
+            subtasks.completion_changed(db_session, task)
 
     db_session.commit()
 
@@ -316,16 +445,17 @@ def bulk_update_tasks(
         f"Bulk update completed: {len(tasks)} tasks updated for user_id={current_user.id}"
     )
 
-    # Invalidate stats cache since task count changed
-    invalidate_user_cache(current_user.id)  # type: ignore
-
     for task in tasks:
         db_session.refresh(task)
 
     return tasks
 
 
-@router.get("/{task_id}", response_model=Task)
+@router.get(
+    "/{task_id}",
+    response_model=Task,
+    dependencies=[Depends(http_cache.task_conditional_get)],
+)
 def get_task_id(
     task_id: int,
     db_session: Session = Depends(get_db),
@@ -354,6 +484,29 @@ def get_task_id(
     return task
 
 
+@router.get("/{task_id}/subtasks", response_model=list[TaskListItem])
+def get_subtasks(
+    task_id: int,
+    db_session: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+    recursive: bool = False,
+):
+    """Subtasks of a task, or its whole subtree with recursive=true"""
+    logger.info(f"Fetching subtasks of task_id={task_id} for user_id={current_user.id}")
+
+    task = db_session.query(db_models.Task).filter(db_models.Task.id == task_id).first()
+
+    if not task:
+        logger.warning(f"Task not found: task_id={task_id}")
+        raise exceptions.TaskNotFoundError(task_id=task_id)
+
+    require_task_access(task, current_user, db_session, TaskPermission.VIEW)
+
+    return subtasks.list_subtasks(
+        db_session, task, current_user.id, recursive=recursive  # type: ignore
+    )
+
+
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=Task)
 @limiter.limit("100/hour")  # 100 tasks per hour
 def create_task(
@@ -368,6 +521,8 @@ def create_task(
         f"Creating task for user_id={current_user.id}: title='{task_data.title}'"
     )
 
+    parent = get_parent_task(db_session, task_data.parent_id, current_user)
+
     new_task = db_models.Task(
         title=task_data.title,
         description=task_data.description,
@@ -376,7 +531,10 @@ def create_task(
         due_date=task_data.due_date,
         tags=task_data.tags,
         user_id=current_user.id,
+        recurrence_rule=task_data.recurrence_rule,
     )
+    recurrence.schedule_series(db_session, new_task)
+    subtasks.attach(db_session, new_task, parent)
     db_session.add(new_task)
     db_session.flush()
     activity_service.log_task_created(
@@ -389,9 +547,6 @@ def create_task(
         f"Task created successfully: task_id={new_task.id}, user_id={current_user.id}"
     )
 
-    # Invalidate stats cache since task count changed
-    invalidate_user_cache(current_user.id)  # type: ignore
-
     return new_task
 
 
@@ -432,9 +587,20 @@ def update_task(
     was_incomplete = not task.completed  # type: ignore
     is_being_marked_complete = update_data.get("completed") is True
 
+    # Move first: it reloads the task (locked) before the fields change
+    if "parent_id" in update_data:
+        # Only the owner rearranges their task tree
+        require_task_access(task, current_user, db_session, TaskPermission.OWNER)
+        parent = get_parent_task(db_session, update_data["parent_id"], current_user)
+        subtasks.move(db_session, task, parent)
+
     # Update the task
     for field, value in update_data.items():
         setattr(task, field, value)
+    if recurrence.SCHEDULE_FIELDS & update_data.keys():
+        recurrence.schedule_series(db_session, task)
+    if bool(task.completed) == was_incomplete:  # completed was flipped
+        subtasks.completion_changed(db_session, task)
 
     new_values = {}
     for field in update_data.keys():
@@ -468,9 +634,6 @@ def update_task(
         f"Task updates successfully: task_id={task_id}, user_id={current_user.id}"
     )
 
-    # Invalidate stats cache since task count changed
-    invalidate_user_cache(current_user.id)  # type: ignore
-
     return task
 
 
@@ -496,14 +659,26 @@ def delete_task_id(
     # Save task info before deletion
     task_title: str = task.title  # type: ignore
 
-    # Get list of files to delete from disk
-    file_list = [file.stored_filename for file in task.files]
+    # Subtasks go with the task
+    doomed = [*subtasks.descendants(db_session, task), task]
 
-    activity_service.log_task_deleted(
-        db_session=db_session, user_id=current_user.id, task=task  # type: ignore
-    )
+    # Get list of files to delete from disk
+    file_list = [file.stored_filename for each in doomed for file in each.files]
+
+    # One query for the whole subtree's audiences, reused by the deletion
+    # events, feed rows and tombstones below
+    events.preload_task_audiences(db_session, [each.id for each in doomed])  # type: ignore
+    for each in doomed:
+        activity_service.log_task_deleted(
+            db_session=db_session, user_id=current_user.id, task=each  # type: ignore
+        )
+        # Collaborators lose the task's history along with their access
+        activity_feed.revoke_task_activity(db_session, task_id=each.id)  # type: ignore
+        sync.record_deletion(
+            db_session, "task", each.id, events.task_audience(db_session, each.id)  # type: ignore
+        )
 
-    db_session.delete(task)
+    subtasks.delete_subtree(db_session, task, doomed[:-1])
     db_session.commit()
 
     background_tasks.add_task(
@@ -516,9 +691,6 @@ def delete_task_id(
         f"Task deleted successfully: task_id={task_id}, user_id={current_user.id}"
     )
 
-    # Invalidate stats cache since task count changed
-    invalidate_user_cache(current_user.id)  # type: ignore
-
 
 @router.post("/{task_id}/tags", response_model=Task)
 def add_tags(
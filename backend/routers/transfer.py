@@ -0,0 +1,92 @@
+import logging
+from pathlib import Path
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+import db_models
+from core.rate_limit_config import limiter
+from core.settings import settings
+from db_config import get_db
+from dependencies import get_current_user
+from schemas.task import TaskImportResult
+from services import task_transfer
+
+router = APIRouter(prefix="/tasks", tags=["import-export"])
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+
+
+def _require_parquet(format: str) -> None:
+    if format == "parquet" and not task_transfer.parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet support is not installed on this server",
+        )
+
+
+@router.get("/export")
+@limiter.limit("30/hour")
+def export_tasks(
+    request: Request,
+    db_session: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+    format: Literal["csv", "jsonl", "parquet"] = "jsonl",
+    resource: Literal["tasks", "comments", "activity"] = "tasks",
+):
+    """
+    Download all of the user's tasks, the comments on them, or their activity.
+    The file is streamed straight from a database cursor, so there is no size cap.
+    """
+    _require_parquet(format)
+
+    # The session stays open until the stream finishes (yield dependencies
+    # are closed after the response is sent)
+    return StreamingResponse(
+        task_transfer.export_chunks(
+            db_session, current_user.id, resource, format  # type: ignore
+        ),
+        media_type=task_transfer.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="faros-{resource}.{format}"'},
+    )
+
+
+@router.post("/import", response_model=TaskImportResult)
+@limiter.limit("10/hour")
+def import_tasks(
+    request: Request,
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "jsonl", "parquet"]] = None,
+    db_session: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    """
+    Create tasks from a CSV, JSONL or Parquet file (e.g. a GET /tasks/export).
+    format defaults to the file extension. Valid rows are imported and the
+    rest reported by row number; a file with no valid rows still returns 200.
+    """
+    if format is None:
+        format = IMPORT_FORMATS.get(Path(file.filename or "").suffix.lower())  # type: ignore
+        if format is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Pass format=csv|jsonl|parquet or use a matching file extension",
+            )
+    _require_parquet(format)
+
+    if file.size is not None and file.size > settings.IMPORT_MAX_SIZE:
+        logger.warning(f"Import rejected: file too large ({file.size} bytes)")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File too large. Max size: {settings.IMPORT_MAX_SIZE / 1024 / 1024} MB",
+        )
+
+    result = task_transfer.import_tasks(
+        db_session, current_user.id, file.file, format  # type: ignore
+    )
+    db_session.commit()
+
+    return result
@@ -16,11 +16,17 @@ from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
 import db_models
-from core.security import hash_password, verify_password
+from core.security import (
+    create_user_access_token,
+    hash_password,
+    set_auth_cookie,
+    verify_password,
+)
 from core.storage import get_file_path, storage
 from db_config import get_db
 from dependencies import get_current_user
 from schemas.auth import PasswordChange, UserProfile
+from services import token_versions
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -76,6 +82,7 @@ async def upload_avatar(
 @router.patch("/me/change-password")
 def change_password(
     password_data: PasswordChange,
+    response: Response,
     db_session: Session = Depends(get_db),
     current_user: db_models.User = Depends(get_current_user),
 ):
@@ -95,13 +102,24 @@ def change_password(
     new_hashed_password = hash_password(password_data.new_password)
 
     current_user.hashed_password = new_hashed_password  # type: ignore
+    # Sign out every other session; this one gets a fresh token below
+    token_versions.revoke_tokens(db_session, current_user)
 
     db_session.commit()
     db_session.refresh(current_user)
 
+    access_token = create_user_access_token(
+        current_user.username, current_user.id, current_user.token_version  # type: ignore
+    )
+    set_auth_cookie(response, access_token)
+
     logger.info(f"Password changed successfully for user_id={current_user.id}")
 
-    return {"message": "Password changed successfully"}
+    return {
+        "message": "Password changed successfully",
+        "access_token": access_token,
+        "token_type": "bearer",
+    }
 
 
 @router.get("/search")
@@ -12,6 +12,7 @@ class ActivityLogResponse(BaseModel):
     action: str
     resource_type: str
     resource_id: int
+    task_id: Optional[int] = None
     details: Optional[dict[str, Any]] = None
     created_at: datetime
     username: Optional[str] = None
@@ -19,6 +20,13 @@ class ActivityLogResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ActivityPage(BaseModel):
+    """A page of activity entries with the cursor for the next page."""
+
+    items: list[ActivityLogResponse]
+    next_cursor: Optional[str] = None
+
+
 class ActivityLogCreate(BaseModel):
     """Internal model for creating activity logs (not exposed via API)."""
 
@@ -26,6 +34,7 @@ class ActivityLogCreate(BaseModel):
     action: str
     resource_type: str
     resource_id: int
+    task_id: Optional[int] = None
     details: Optional[dict[str, Any]] = None
 
 
@@ -24,3 +24,10 @@ class Comment(BaseModel):
     username: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CommentPage(BaseModel):
+    """A page of a task's comments with the cursor for the next page"""
+
+    items: list[Comment]
+    next_cursor: Optional[str] = None
@@ -1,9 +1,9 @@
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Optional
 
 from pydantic import BaseModel, ConfigDict
 
-from .task import Task
+from .task import TaskListItem
 
 
 class TaskShareCreate(BaseModel):
@@ -29,12 +29,19 @@ class TaskShareResponse(BaseModel):
 class SharedTaskResponse(BaseModel):
     """Task with sharing context"""
 
-    task: Task
+    task: TaskListItem
     permission: str  # Your permission level
     is_owner: bool  # Are you the owner?
     owner_username: str
 
 
+class VisibleTaskPage(BaseModel):
+    """A page of owned and shared tasks with the cursor for the next page"""
+
+    items: list[SharedTaskResponse]
+    next_cursor: Optional[str] = None
+
+
 class TaskShareUpdate(BaseModel):
     """Request to update a share permission"""
 
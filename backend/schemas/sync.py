@@ -0,0 +1,59 @@
+from datetime import date, datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from .comment import Comment
+
+
+class SyncTask(BaseModel):
+    """Task as sent by /sync; comments are synced separately"""
+
+    id: int
+    title: str
+    description: Optional[str] = None
+    completed: bool
+    priority: Literal["low", "medium", "high"]
+    created_at: datetime
+    updated_at: datetime
+    due_date: Optional[date] = None
+    tags: list[str]
+    user_id: int
+    comment_count: int = 0
+    recurrence_rule: Optional[str] = None
+    parent_id: Optional[int] = None
+    subtask_count: int = 0
+    subtasks_completed: int = 0
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SyncShare(BaseModel):
+    id: int
+    task_id: int
+    shared_with_user_id: int
+    permission: str
+    shared_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Tombstone(BaseModel):
+    """A deleted resource (or one the user lost access to)"""
+
+    resource_type: Literal["task", "comment", "share"]
+    resource_id: int
+    task_id: Optional[int] = None
+    deleted_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SyncResponse(BaseModel):
+    """Changes since the requested token; pass token as since next time"""
+
+    token: int
+    tasks: list[SyncTask]
+    comments: list[Comment]
+    shares: list[SyncShare]
+    deleted: list[Tombstone]
@@ -1,10 +1,15 @@
 from datetime import date, datetime
-from typing import Literal, Optional
+from typing import Annotated, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, model_validator
+
+from core.rrule import normalize_rule
 
 from .comment import Comment
 
+# RRULE subset (see core/rrule.py), stored in canonical form
+RecurrenceRule = Annotated[str, Field(max_length=200), AfterValidator(normalize_rule)]
+
 
 class TaskCreate(BaseModel):
     """Schema for creating a new task"""
@@ -17,10 +22,19 @@ class TaskCreate(BaseModel):
     completed: bool = False
     # Field(default_factory=list) means "if no tags provided, use an empty list []"
     # You can't use = [] directly because that causes Python issues with mutable defaults.
+    # Repeat the task; due_date is the first occurrence
+    recurrence_rule: Optional[RecurrenceRule] = None
+    parent_id: Optional[int] = None  # Create as a subtask of this task
 
     # Clean up leading/trailing whitespace
     model_config = ConfigDict(str_strip_whitespace=True)
 
+    @model_validator(mode="after")
+    def _recurrence_needs_due_date(self):
+        if self.recurrence_rule and self.due_date is None:
+            raise ValueError("A recurring task needs a due_date (its first occurrence)")
+        return self
+
 
 class TaskUpdate(BaseModel):
     """Schema for updating a task"""
@@ -31,10 +45,15 @@ class TaskUpdate(BaseModel):
     priority: Optional[Literal["low", "medium", "high"]] = None
     due_date: Optional[date] = None
     tags: Optional[list[str]] = None
+    recurrence_rule: Optional[RecurrenceRule] = None  # null stops the series
+    parent_id: Optional[int] = None  # Move under this task; null for top level
 
 
-class Task(BaseModel):
-    """Schema for task responses"""
+class TaskListItem(BaseModel):
+    """
+    Schema for tasks in lists: comment_count instead of the comments, so a
+    list reads no comments and its size doesn't grow with their threads
+    """
 
     id: int
     title: str
@@ -42,19 +61,48 @@ class Task(BaseModel):
     completed: bool
     priority: Literal["low", "medium", "high"]
     created_at: datetime
+    updated_at: Optional[datetime] = None
     due_date: Optional[date] = None
     tags: list[str]
     user_id: int
-    comments: list["Comment"] = []
+    comment_count: int = 0
     share_count: int = 0
+    recurrence_rule: Optional[str] = None
+    recurrence_parent_id: Optional[int] = None  # Series this occurrence belongs to
+    parent_id: Optional[int] = None
+    # Whole subtree, e.g. 7 of 10 subtasks done
+    subtask_count: int = 0
+    subtasks_completed: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class Task(TaskListItem):
+    """Schema for task responses"""
+
+    comments: list["Comment"] = []
+
+
+class TaskOccurrence(BaseModel):
+    """
+    A dated entry of GET /tasks/occurrences: a task, or an upcoming occurrence
+    of a recurring task that hasn't been created yet (virtual, task_id null).
+    """
+
+    task_id: Optional[int] = None
+    series_id: Optional[int] = None
+    virtual: bool = False
+    title: str
+    priority: Literal["low", "medium", "high"]
+    due_date: date
+    completed: bool = False
+    tags: list[str]
+
+
 class PaginatedTasks(BaseModel):
     """Schema for paginated task list"""
 
-    tasks: list[Task]
+    tasks: list[TaskListItem]
     total: int
     page: int
     pages: int
@@ -78,3 +126,18 @@ class BulkTaskUpdate(BaseModel):
 
     task_ids: list[int] = Field(min_length=1)  # Must provide at least one ID
     updates: TaskUpdate  # Reuse the existing TaskUpdate model
+
+
+class TaskImportError(BaseModel):
+    """A row POST /tasks/import could not load"""
+
+    row: int  # 1-based, not counting a CSV header
+    error: str
+
+
+class TaskImportResult(BaseModel):
+    """Outcome of a task import"""
+
+    imported: int
+    failed: int
+    errors: list[TaskImportError]  # The first 100 failures
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark a login storm against the password hasher.
+
+Fires --logins concurrent password verifications from a thread pool the size
+of uvicorn's (40 threads), while a probe thread measures how late a tiny
+"other request" (10ms sleep + JSON dump) runs, i.e. how much the storm hurts
+everything else on the process. Compares:
+- inline: bcrypt in the request threads (the old behaviour)
+- pool: PasswordHasher with --workers processes and --queue-limit
+
+Stored hashes use --old-rounds, so every login also exercises rehash-on-login
+when it differs from --rounds.
+
+No database or server needed.
+
+Usage:
+    python scripts/bench_login_storm.py [--logins 200] [--rounds 12] [--workers 4]
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import orjson
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.exceptions import PasswordHashingBusyError
+from core.security import PasswordHasher, _hash
+
+REQUEST_THREADS = 40
+PASSWORD = "correct horse battery staple"
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def probe(stop: threading.Event, delays: list[float]) -> None:
+    """A cheap request every 10ms; records how late it finishes (ms)."""
+    payload = {"tasks": [{"id": i, "title": f"Task {i}"} for i in range(50)]}
+    while not stop.is_set():
+        start = time.perf_counter()
+        time.sleep(0.01)
+        orjson.dumps(payload)
+        delays.append((time.perf_counter() - start - 0.01) * 1000)
+
+
+def storm(hasher: PasswordHasher, stored_hash: str, logins: int) -> dict[str, float]:
+    latencies: list[float] = []
+    shed = rehashed = 0
+    lock = threading.Lock()
+
+    def login() -> None:
+        nonlocal shed, rehashed
+        start = time.perf_counter()
+        try:
+            valid, new_hash = hasher.verify_and_update(PASSWORD, stored_hash)
+            assert valid
+        except PasswordHashingBusyError:
+            with lock:
+                shed += 1
+            return
+        with lock:
+            latencies.append((time.perf_counter() - start) * 1000)
+            rehashed += new_hash is not None
+
+    delays: list[float] = []
+    stop = threading.Event()
+    prober = threading.Thread(target=probe, args=(stop, delays))
+    prober.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=REQUEST_THREADS) as threads:
+        for _ in range(logins):
+            threads.submit(login)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    prober.join()
+
+    return {
+        "served": len(latencies),
+        "shed": shed,
+        "rehashed": rehashed,
+        "logins/s": len(latencies) / elapsed,
+        "p50 ms": statistics.median(latencies) if latencies else 0.0,
+        "p99 ms": percentile(latencies, 0.99) if latencies else 0.0,
+        "probe p99 ms": percentile(delays, 0.99) if delays else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--old-rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-limit", type=int, default=32)
+    args = parser.parse_args()
+
+    stored_hash = _hash(PASSWORD, args.old_rounds)
+    print(
+        f"{args.logins} logins from {REQUEST_THREADS} threads, "
+        f"bcrypt rounds {args.old_rounds} -> {args.rounds}"
+    )
+
+    configs = {
+        "inline": PasswordHasher(workers=0, queue_limit=0, rounds=args.rounds),
+        f"pool x{args.workers}": PasswordHasher(
+            workers=args.workers, queue_limit=args.queue_limit, rounds=args.rounds
+        ),
+    }
+    columns = ["served", "shed", "rehashed", "logins/s", "p50 ms", "p99 ms", "probe p99 ms"]
+    print(f"{'':<10}" + "".join(f"{name:>14}" for name in columns))
+    for name, hasher in configs.items():
+        result = storm(hasher, stored_hash, args.logins)
+        hasher.shutdown()
+        print(f"{name:<10}" + "".join(f"{result[column]:>14,.1f}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialization and compression for a GET /tasks page.
+
+Builds a 100-task PaginatedTasks page (each task with a comment count) from
+ORM-like objects and compares, per response:
+- time to validate + render with FastAPI's default JSONResponse vs ORJSONResponse
+- bytes on the wire: raw JSON vs gzip at the configured level
+
+No database or server needed.
+
+Usage:
+    python scripts/bench_serialization.py [--tasks 100] [--comments 5] [--runs 200]
+"""
+
+import argparse
+import gzip
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from schemas.task import PaginatedTasks
+
+
+def build_rows(task_count: int, comment_count: int) -> list[SimpleNamespace]:
+    """Stand-ins for db_models.Task rows as the list endpoint returns them."""
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(task_count):
+        rows.append(
+            SimpleNamespace(
+                id=i,
+                title=f"Task number {i}",
+                description="Write the quarterly report and circulate it " * 4,
+                completed=i % 3 == 0,
+                priority=("low", "medium", "high")[i % 3],
+                created_at=now - timedelta(days=i),
+                updated_at=now,
+                due_date=date.today() + timedelta(days=i % 14),
+                tags=["work", f"tag{i % 7}"],
+                user_id=1,
+                # Lists carry the count, not the comments
+                comment_count=comment_count,
+                share_count=i % 4,
+            )
+        )
+    return rows
+
+
+def serialize(rows: list, response_class: type) -> bytes:
+    """What FastAPI does for a response_model route: validate, dump, render."""
+    page = PaginatedTasks.model_validate(
+        {"tasks": rows, "total": len(rows), "page": 1, "pages": 1},
+        from_attributes=True,
+    )
+    return response_class(page.model_dump(mode="json")).body
+
+
+def time_ms(func, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--comments", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--gzip-level", type=int, default=6)
+    args = parser.parse_args()
+
+    rows = build_rows(args.tasks, args.comments)
+    print(f"Page: {args.tasks} tasks x {args.comments} comments, {args.runs} runs (median)")
+    print(f"{'response class':<16}{'time (ms)':>12}{'raw bytes':>12}{'gzip bytes':>12}")
+
+    for response_class in (JSONResponse, ORJSONResponse):
+        body = serialize(rows, response_class)
+        elapsed = time_ms(lambda: serialize(rows, response_class), args.runs)
+        compressed = gzip.compress(body, compresslevel=args.gzip_level)
+        print(
+            f"{response_class.__name__:<16}{elapsed:>12.2f}"
+            f"{len(body):>12,}{len(compressed):>12,}"
+        )
+
+    # Render step alone, i.e. what the response class itself changes
+    content = PaginatedTasks.model_validate(
+        {"tasks": rows, "total": len(rows), "page": 1, "pages": 1},
+        from_attributes=True,
+    ).model_dump(mode="json")
+    for response_class in (JSONResponse, ORJSONResponse):
+        elapsed = time_ms(lambda: response_class(content), args.runs)
+        print(f"render only: {response_class.__name__:<16}{elapsed:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Per-user activity feed (fan-out on write).
+
+An activity entry is visible to its actor and, when it belongs to a task, to
+every user the task is shared with - except task created/deleted entries,
+which stay private to the actor. Rather than evaluating that rule on every
+read, each visible (user, entry) pair is written to activity_feed:
+
+- fan_out() when entries are logged (sync mode: inside the request
+  transaction; buffered modes: by the activity writer, in the same
+  transaction as the INSERT, using the shares current at flush time)
+- grant_task_activity() when a task is shared, backfilling its history
+- revoke_task_activity() when a share is removed or the task is deleted
+
+Entries a user authored are never revoked; they stay in their own feed.
+"""
+
+from typing import Any, Optional
+
+from sqlalchemy import and_, literal, not_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+import db_models
+from services import events
+
+# Task entries only the actor sees
+PRIVATE_TASK_ACTIONS = ("created", "deleted")
+
+FEED_COLUMNS = ["user_id", "created_at", "activity_id", "task_id", "actor_id"]
+
+
+def _is_private(entry: dict[str, Any]) -> bool:
+    return (
+        entry["resource_type"] == "task" and entry["action"] in PRIVATE_TASK_ACTIONS
+    )
+
+
+def _shared_activity_filter():
+    """SQL version of _is_private (negated) for activity_logs rows."""
+    return not_(
+        and_(
+            db_models.ActivityLog.resource_type == "task",
+            db_models.ActivityLog.action.in_(PRIVATE_TASK_ACTIONS),
+        )
+    )
+
+
+def fan_out(db_session: Session, entries: list[dict[str, Any]]) -> None:
+    """
+    Write feed rows for freshly inserted activity entries.
+    Each entry needs id, user_id, task_id, resource_type, action and created_at.
+    """
+    if not entries:
+        return
+
+    task_ids = {
+        entry["task_id"]
+        for entry in entries
+        if entry.get("task_id") is not None and not _is_private(entry)
+    }
+
+    # Memoized on the session: in sync mode queue_event has just read them
+    shared_with = events.task_sharees(db_session, task_ids)
+
+    rows = []
+    for entry in entries:
+        task_id: Optional[int] = entry.get("task_id")
+        recipients = {entry["user_id"]}
+        if task_id is not None and not _is_private(entry):
+            recipients.update(shared_with[task_id])
+
+        for user_id in recipients:
+            rows.append(
+                {
+                    "user_id": user_id,
+                    "created_at": entry["created_at"],
+                    "activity_id": entry["id"],
+                    "task_id": task_id,
+                    "actor_id": entry["user_id"],
+                }
+            )
+
+    db_session.execute(pg_insert(db_models.ActivityFeedEntry).on_conflict_do_nothing(), rows)
+
+
+def grant_task_activity(db_session: Session, task_id: int, user_id: int) -> None:
+    """Backfill a task's shared history into a user's feed (on share)."""
+    history = select(
+        literal(user_id),
+        db_models.ActivityLog.created_at,
+        db_models.ActivityLog.id,
+        db_models.ActivityLog.task_id,
+        db_models.ActivityLog.user_id,
+    ).where(
+        db_models.ActivityLog.task_id == task_id,
+        _shared_activity_filter(),
+    )
+
+    db_session.execute(
+        pg_insert(db_models.ActivityFeedEntry)
+        .from_select(FEED_COLUMNS, history)
+        .on_conflict_do_nothing()
+    )
+
+
+def revoke_task_activity(
+    db_session: Session, task_id: int, user_id: Optional[int] = None
+) -> None:
+    """
+    Remove a task's activity authored by others from a user's feed (on unshare),
+    or from every feed when user_id is None (on task deletion).
+    """
+    query = db_session.query(db_models.ActivityFeedEntry).filter(
+        db_models.ActivityFeedEntry.task_id == task_id,
+        db_models.ActivityFeedEntry.user_id != db_models.ActivityFeedEntry.actor_id,
+    )
+    if user_id is not None:
+        query = query.filter(db_models.ActivityFeedEntry.user_id == user_id)
+
+    query.delete(synchronize_session=False)
@@ -0,0 +1,295 @@
+"""
+Activity log partition maintenance.
+
+activity_logs is range-partitioned by created_at month (activity_logs_pYYYYMM)
+with a DEFAULT partition catching anything outside the monthly ranges. This
+job keeps the scheme healthy and runs as its own process next to the API:
+
+    python -m services.activity_partitions
+
+Each run:
+- creates partitions for the current month and the next
+  ACTIVITY_PARTITION_MONTHS_AHEAD months, so inserts never land in DEFAULT.
+  Rows DEFAULT already holds for such a month (e.g. written while the job
+  was down) are moved into the new partition in the same transaction.
+- applies the retention policy: partitions older than ACTIVITY_RETENTION_MONTHS
+  are archived to gzipped JSON lines through the storage backend (unless
+  ACTIVITY_RETENTION_ACTION is "drop"), then dropped
+"""
+
+import gzip
+import json
+import logging
+import re
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import db_models
+from core.settings import settings
+from core.storage import storage
+from db_config import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "faros"
+PARENT_TABLE = "activity_logs"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+ARCHIVE_PREFIX = "archives/activity_logs"
+ARCHIVE_BATCH_SIZE = 1000
+# Archives bigger than this spill from memory to a temporary file
+ARCHIVE_SPOOL_BYTES = 8 * 1024 * 1024
+
+# Dropping a partition needs an ACCESS EXCLUSIVE lock on activity_logs, and
+# inserts queue behind the request while it waits; give up and retry next run
+# rather than stall activity logging behind a long-running query
+DROP_LOCK_TIMEOUT = "5s"
+
+PARTITION_NAME_PATTERN = re.compile(rf"^{PARENT_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    years, month_index = divmod(month.month - 1 + months, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def _utc_midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+def _partition_month(name: str) -> Optional[date]:
+    match = PARTITION_NAME_PATTERN.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def list_partitions(db_session: Session) -> dict[str, date]:
+    """Return the monthly partitions currently attached, keyed by table name."""
+    rows = db_session.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+            WHERE ns.nspname = :schema AND parent.relname = :parent
+            """
+        ),
+        {"schema": SCHEMA, "parent": PARENT_TABLE},
+    ).scalars()
+
+    partitions = {}
+    for name in rows:
+        month = _partition_month(name)
+        if month is not None:
+            partitions[name] = month
+    return partitions
+
+
+def create_partition(db_session: Session, month: date) -> bool:
+    """
+    Create the partition for one month if missing, moving any rows the DEFAULT
+    partition holds for that month into it. Returns False when Postgres refuses.
+    """
+    name = partition_name(month)
+    next_month = add_months(month, 1)
+    bounds = {"start": _utc_midnight(month), "end": _utc_midnight(next_month)}
+
+    # Identifiers come from partition_name(), bounds from date objects
+    partition_bounds = (
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{next_month.isoformat()} 00:00:00+00')"
+    )
+    in_month = "created_at >= :start AND created_at < :end"
+    try:
+        stranded = db_session.execute(
+            text(
+                f"SELECT EXISTS (SELECT 1 FROM {SCHEMA}.{DEFAULT_PARTITION} "  # nosec B608
+                f"WHERE {in_month})"
+            ),
+            bounds,
+        ).scalar()
+
+        if not stranded:
+            db_session.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {SCHEMA}.{name} "  # nosec B608
+                    f"PARTITION OF {SCHEMA}.{PARENT_TABLE} {partition_bounds}"
+                )
+            )
+        else:
+            # Postgres won't create a partition for rows DEFAULT holds: build
+            # it detached, move the rows over, then attach it (which checks
+            # that DEFAULT has none left), all in one transaction
+            db_session.execute(
+                text(
+                    f"CREATE TABLE {SCHEMA}.{name} "  # nosec B608
+                    f"(LIKE {SCHEMA}.{PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                )
+            )
+            moved = db_session.execute(
+                text(
+                    f"WITH moved AS (DELETE FROM {SCHEMA}.{DEFAULT_PARTITION} "  # nosec B608
+                    f"WHERE {in_month} RETURNING *) "
+                    f"INSERT INTO {SCHEMA}.{name} SELECT * FROM moved"
+                ),
+                bounds,
+            ).rowcount
+            db_session.execute(
+                text(
+                    f"ALTER TABLE {SCHEMA}.{PARENT_TABLE} "  # nosec B608
+                    f"ATTACH PARTITION {SCHEMA}.{name} {partition_bounds}"
+                )
+            )
+            logger.warning(
+                f"Moved {moved} activity entries from {DEFAULT_PARTITION} into {name}"
+            )
+
+        db_session.commit()
+        return True
+    except Exception as e:
+        db_session.rollback()
+        logger.error(f"Could not create activity partition {name}: {e}")
+        return False
+
+
+def ensure_future_partitions(
+    db_session: Session, today: Optional[date] = None
+) -> list[str]:
+    """Create partitions for this month through ACTIVITY_PARTITION_MONTHS_AHEAD."""
+    current = month_start(today or date.today())
+    existing = list_partitions(db_session)
+
+    created = []
+    for offset in range(settings.ACTIVITY_PARTITION_MONTHS_AHEAD + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        if create_partition(db_session, month):
+            created.append(name)
+
+    if created:
+        logger.info(f"Created activity partitions: {', '.join(created)}")
+    return created
+
+
+def archive_partition(db_session: Session, name: str) -> str:
+    """
+    Write a partition's rows to storage as gzipped JSON lines.
+    Returns the stored filename.
+    """
+    # Name is validated against PARTITION_NAME_PATTERN by the caller
+    query = text(
+        "SELECT id, user_id, action, resource_type, resource_id, task_id, "  # nosec B608
+        f"details, created_at FROM {SCHEMA}.{name} ORDER BY created_at, id"
+    ).execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+
+    stored_filename = f"{ARCHIVE_PREFIX}/{name}.jsonl.gz"
+    count = 0
+    # Rows are streamed and compressed as they come; the archive only stays
+    # in memory while it is small, so a big month costs disk, not RAM
+    with tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_BYTES) as spool:
+        with gzip.GzipFile(fileobj=spool, mode="wb") as archive:
+            for row in db_session.execute(query).mappings():
+                archive.write(json.dumps(dict(row), default=str).encode() + b"\n")
+                count += 1
+
+        spool.seek(0)
+        storage.upload_fileobj(stored_filename, spool, "application/gzip")  # type: ignore
+
+    logger.info(f"Archived {count} activity entries from {name} to {stored_filename}")
+    return stored_filename
+
+
+def drop_partition(db_session: Session, name: str, month: date) -> None:
+    # Feed rows pointing into the partition go first, in their own
+    # transaction, so the drop below holds its lock for nothing else
+    db_session.query(db_models.ActivityFeedEntry).filter(
+        db_models.ActivityFeedEntry.created_at >= _utc_midnight(month),
+        db_models.ActivityFeedEntry.created_at < _utc_midnight(add_months(month, 1)),
+    ).delete(synchronize_session=False)
+    db_session.commit()
+
+    # Dropping a partition locks activity_logs (ACCESS EXCLUSIVE) until commit.
+    # DETACH PARTITION ... CONCURRENTLY would avoid that, but Postgres doesn't
+    # allow it while the table has a DEFAULT partition
+    db_session.execute(text(f"SET LOCAL lock_timeout = '{DROP_LOCK_TIMEOUT}'"))
+    db_session.execute(text(f"DROP TABLE {SCHEMA}.{name}"))
+    db_session.commit()
+    logger.info(f"Dropped activity partition {name}")
+
+
+def apply_retention(db_session: Session, today: Optional[date] = None) -> list[str]:
+    """
+    Archive (optionally) and drop partitions older than ACTIVITY_RETENTION_MONTHS.
+    Returns the names of the removed partitions.
+    """
+    retention_months = settings.ACTIVITY_RETENTION_MONTHS
+    if retention_months <= 0:
+        return []
+
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    expired = sorted(
+        (name, month)
+        for name, month in list_partitions(db_session).items()
+        if month < cutoff
+    )
+
+    removed = []
+    for name, month in expired:
+        try:
+            if settings.activity_retention_action == "archive":
+                archive_partition(db_session, name)
+            drop_partition(db_session, name, month)
+            removed.append(name)
+        except Exception as e:
+            # The partition stays in place and is retried on the next run
+            db_session.rollback()
+            logger.error(f"Retention failed for activity partition {name}: {e}")
+
+    return removed
+
+
+def run_maintenance(db_session: Session, today: Optional[date] = None) -> None:
+    ensure_future_partitions(db_session, today)
+    apply_retention(db_session, today)
+
+
+def run_scheduler() -> None:
+    """Run maintenance forever, sleeping ACTIVITY_MAINTENANCE_INTERVAL_SECONDS."""
+    interval = settings.ACTIVITY_MAINTENANCE_INTERVAL_SECONDS
+    logger.info(f"Activity partition maintenance started (interval={interval}s)")
+
+    while True:
+        db = SessionLocal()
+        try:
+            run_maintenance(db)
+        except Exception as e:
+            logger.error(f"Activity partition maintenance failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    from core.logging_config import setup_logging
+
+    setup_logging()
+    run_scheduler()
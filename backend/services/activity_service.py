@@ -1,11 +1,25 @@
 # pyright: reportGeneralTypeIssues=false
 
+import json
+from datetime import datetime, timezone
 from typing import Any, Optional, cast
 
+from sqlalchemy import event, func
 from sqlalchemy.orm import Session
 
 import db_models
-from schemas.activity import ActivityLogCreate
+from core.redis_config import (
+    activity_stats_cache_key,
+    get_cache,
+    invalidate_activity_stats,
+    set_cache,
+)
+from services import activity_feed, events
+from services.activity_writer import activity_writer
+
+
+# Session.info key: users whose activity stats go stale when the session commits
+STATS_DIRTY_KEY = "activity_stats_dirty"
 
 
 def log_activity(
@@ -15,22 +29,107 @@ def log_activity(
     resource_type: str,
     resource_id: int,
     details: Optional[dict[str, Any]] = None,
+    task_id: Optional[int] = None,
 ) -> db_models.ActivityLog:
-    """Core function to log any user activity."""
-    log_data = ActivityLogCreate(
-        user_id=user_id,
-        action=action,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        details=details,
-    )
-
-    db_log = db_models.ActivityLog(**log_data.model_dump())
+    """
+    Core function to log any user activity.
+
+    task_id is the task the activity belongs to; timeline and shared-activity
+    queries filter on it through ix_activity_logs_task_id_created_at.
+
+    In sync mode the entry and its activity_feed rows join the caller's
+    transaction. In buffered modes it is queued for the activity writer once
+    the caller commits, and the returned ActivityLog is transient (never
+    added to the session).
+    """
+    log_data: dict[str, Any] = {
+        "user_id": user_id,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "task_id": task_id,
+        "details": details,
+    }
+
+    # Live update for everyone with access to the task, sent on commit
+    events.queue_event(db_session, log_data)
+
+    if activity_writer.buffered:
+        # Stamp now so ordering reflects when the action happened, not the flush
+        log_data["created_at"] = datetime.now(timezone.utc)
+        activity_writer.defer(db_session, log_data)
+        return db_models.ActivityLog(**log_data)
+
+    db_log = db_models.ActivityLog(**log_data)
     db_session.add(db_log)
+    db_session.info.setdefault(STATS_DIRTY_KEY, set()).add(user_id)
+
+    # Flush for the generated id/created_at the feed rows point at
+    db_session.flush()
+    activity_feed.fan_out(
+        db_session, [{**log_data, "id": db_log.id, "created_at": db_log.created_at}]
+    )
 
     return db_log
 
 
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_stats(session: Session) -> None:
+    for user_id in session.info.pop(STATS_DIRTY_KEY, ()):
+        invalidate_activity_stats(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty_stats(session: Session) -> None:
+    session.info.pop(STATS_DIRTY_KEY, None)
+
+
+def get_activity_stats(db_session: Session, user_id: int) -> dict[str, Any]:
+    """
+    Count a user's activity by action and by resource type.
+
+    One GROUPING SETS query produces both breakdowns; the result is cached
+    until the user logs new activity.
+    """
+    cache_key = activity_stats_cache_key(user_id)
+    cached = get_cache(cache_key)
+    if cached:
+        return json.loads(cached)
+
+    rows = (
+        db_session.query(
+            db_models.ActivityLog.action,
+            db_models.ActivityLog.resource_type,
+            # 0 for rows of the (action) grouping set, 1 for (resource_type)
+            func.grouping(db_models.ActivityLog.action).label("by_resource"),
+            func.count().label("count"),
+        )
+        .filter(db_models.ActivityLog.user_id == user_id)
+        .group_by(
+            func.grouping_sets(
+                db_models.ActivityLog.action, db_models.ActivityLog.resource_type
+            )
+        )
+        .all()
+    )
+
+    action_counts: dict[str, int] = {}
+    resource_counts: dict[str, int] = {}
+    for row in rows:
+        if row.by_resource:
+            resource_counts[row.resource_type] = row.count
+        else:
+            action_counts[row.action] = row.count
+
+    stats = {
+        "total_activities": sum(action_counts.values()),
+        "by_action": action_counts,
+        "by_resource": resource_counts,
+    }
+    set_cache(cache_key, json.dumps(stats))
+    return stats
+
+
 # --- Task Activity Logging ---
 
 
@@ -45,6 +144,7 @@ def log_task_created(
         action="created",
         resource_type="task",
         resource_id=task.id,  # type: ignore
+        task_id=task.id,  # type: ignore
         details={
             "title": task.title,
             "priority": task.priority,
@@ -75,6 +175,7 @@ def log_task_updated(
         action="updated",
         resource_type="task",
         resource_id=task.id,  # type: ignore
+        task_id=task.id,  # type: ignore
         details={
             "task_title": task.title,
             "changed_fields": changed_fields,
@@ -94,6 +195,7 @@ def log_task_deleted(
         action="deleted",
         resource_type="task",
         resource_id=task.id,  # type: ignore
+        task_id=task.id,  # type: ignore
         details={
             "title": task.title,
             "priority": task.priority,
@@ -118,6 +220,7 @@ def log_task_shared(
         action="shared",
         resource_type="task",
         resource_id=task.id,  # type: ignore
+        task_id=task.id,  # type: ignore
         details={
             "task_title": task.title,
             "shared_with_user_id": shared_with_user.id,
@@ -137,6 +240,7 @@ def log_task_unshared(
         action="unshared",
         resource_type="task",
         resource_id=task.id,  # type: ignore
+        task_id=task.id,  # type: ignore
         details={
             "task_title": task.title,
             "unshared_user_id": unshared_user.id,
@@ -158,6 +262,7 @@ def log_comment_created(
         action="created",
         resource_type="comment",
         resource_id=comment.id,  # type: ignore
+        task_id=comment.task_id,  # type: ignore
         details={
             "task_id": comment.task_id,
             "task_title": comment.task.title if comment.task else None,
@@ -180,6 +285,7 @@ def log_comment_updated(
         action="updated",
         resource_type="comment",
         resource_id=comment.id,  # type: ignore
+        task_id=comment.task_id,  # type: ignore
         details={
             "task_id": comment.task_id,
             "task_title": comment.task.title if comment.task else None,
@@ -199,6 +305,7 @@ def log_comment_deleted(
         action="deleted",
         resource_type="comment",
         resource_id=comment.id,  # type: ignore
+        task_id=comment.task_id,  # type: ignore
         details={
             "task_id": comment.task_id,
             "task_title": comment.task.title if comment.task else None,
@@ -220,6 +327,7 @@ def log_file_uploaded(
         action="uploaded",
         resource_type="file",
         resource_id=task_file.id,  # type: ignore
+        task_id=task_file.task_id,  # type: ignore
         details={
             "task_id": task_file.task_id,
             "filename": task_file.original_filename,
@@ -239,6 +347,7 @@ def log_file_deleted(
         action="deleted",
         resource_type="file",
         resource_id=task_file.id,  # type: ignore
+        task_id=task_file.task_id,  # type: ignore
         details={"task_id": task_file.task_id, "filename": task_file.original_filename},
     )
 
@@ -0,0 +1,342 @@
+"""
+Buffered activity log writer.
+
+ACTIVITY_LOG_MODE controls how activity_service.log_activity persists entries:
+- "sync" (default) - INSERT inside the request transaction (original behaviour)
+- "memory" - entries are buffered in-process and flushed in multi-row INSERT
+  batches by a background thread. Fastest, but entries still in the buffer
+  are lost if the process is killed (graceful shutdown flushes them).
+- "redis" - entries are appended to a Redis stream and flushed through a
+  consumer group, so a crashed instance's entries are picked up by another.
+  Falls back to the in-memory buffer if Redis is unavailable.
+
+In the buffered modes an entry is attached to the request's session and only
+handed to the writer after that session commits, so the audit trail matches
+exactly what was committed: rolled-back requests leave no entries behind.
+
+Failed flushes are handled by cause. While the database can't be reached,
+entries are kept and retried with exponential backoff, and the in-memory
+buffer holds at most ACTIVITY_BUFFER_MAX_ENTRIES: beyond that the oldest are
+dropped and counted in ActivityWriter.dropped. When the database rejects a
+batch, it is split in halves until the offending entries are isolated; those
+are logged, counted in ActivityWriter.rejected and skipped, so one bad entry
+can't block everything queued behind it.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+
+import db_models
+from core.redis_config import invalidate_activity_stats, redis_client
+from core.settings import settings
+from db_config import SessionLocal
+from services import activity_feed
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding entries waiting for the request to commit
+PENDING_KEY = "pending_activity"
+
+STREAM_KEY = "activity:stream"
+STREAM_GROUP = "activity-writers"
+# Entries left unacknowledged this long (crashed consumer) are reclaimed
+STREAM_RECLAIM_IDLE_MS = 60_000
+
+# Longest wait between flush attempts while the database is unreachable
+MAX_RETRY_BACKOFF_SECONDS = 60.0
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed insert is worth retrying as is (database unreachable)."""
+    if isinstance(error, (OperationalError, InterfaceError)):
+        return True
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated
+    # Not a database error (e.g. a bug in fan-out): keep the entries
+    return True
+
+
+class ActivityWriter:
+    """Collects committed activity entries and writes them in batches."""
+
+    def __init__(
+        self,
+        mode: str,
+        batch_size: int,
+        flush_interval: float,
+        max_buffered: int = 50_000,
+    ):
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+
+        # Entries lost to the buffer bound / rejected by the database
+        self.dropped = 0
+        self.rejected = 0
+        self._failures = 0
+        self._retry_at = 0.0
+
+        self._buffer: deque[dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._consumer = f"{socket.gethostname()}-{os.getpid()}"
+
+    @property
+    def buffered(self) -> bool:
+        return self.mode != "sync"
+
+    @property
+    def _use_stream(self) -> bool:
+        return self.mode == "redis" and bool(redis_client)
+
+    # --- Producer side ---
+
+    def defer(self, db_session: Session, entry: dict[str, Any]) -> None:
+        """Attach an entry to the session; released to the writer on commit."""
+        pending = db_session.info.setdefault(PENDING_KEY, {})
+        pending.setdefault(self, []).append(entry)
+
+    def submit(self, entries: list[dict[str, Any]]) -> None:
+        """Queue committed entries for the next flush."""
+        if self._use_stream:
+            try:
+                pipe = redis_client.pipeline(transaction=False)  # type: ignore
+                for entry in entries:
+                    pipe.xadd(STREAM_KEY, {"entry": json.dumps(entry, default=str)})
+                pipe.execute()
+                return
+            except Exception as e:
+                logger.error(f"Activity stream XADD failed, buffering in memory: {e}")
+
+        with self._lock:
+            self._buffer.extend(entries)
+            self._trim()
+            if len(self._buffer) >= self.batch_size:
+                self._wake.set()
+
+    def _trim(self) -> None:
+        # Caller holds the lock. The oldest entries are on the left
+        overflow = len(self._buffer) - self.max_buffered
+        if overflow <= 0:
+            return
+        for _ in range(overflow):
+            self._buffer.popleft()
+        self.dropped += overflow
+        logger.error(
+            f"Activity buffer full ({self.max_buffered} entries), dropped the "
+            f"{overflow} oldest ({self.dropped} dropped so far)"
+        )
+
+    # --- Consumer side ---
+
+    def flush(self) -> int:
+        """Write everything currently queued. Returns the number of rows written."""
+        written = self._flush_buffer()
+        if self._use_stream:
+            written += self._flush_stream()
+        return written
+
+    def _insert(self, rows: list[dict[str, Any]]) -> None:
+        db = SessionLocal()
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start : start + self.batch_size]
+                # executemany on a Core insert is sent as multi-row VALUES batches
+                ids = db.execute(
+                    insert(db_models.ActivityLog).returning(
+                        db_models.ActivityLog.id, sort_by_parameter_order=True
+                    ),
+                    batch,
+                ).scalars()
+                activity_feed.fan_out(
+                    db, [{**row, "id": id_} for row, id_ in zip(batch, ids)]
+                )
+            db.commit()
+        finally:
+            db.close()
+
+        for user_id in {row["user_id"] for row in rows}:
+            invalidate_activity_stats(user_id)
+
+    def _write(self, rows: list[dict[str, Any]]) -> int:
+        """
+        Insert rows, skipping any the database rejects: a rejected batch is
+        split in halves until the bad entries are isolated. Transient errors
+        are raised, leaving the caller to retry. Returns the rows written.
+        """
+        try:
+            self._insert(rows)
+            return len(rows)
+        except Exception as e:
+            if _is_transient(e):
+                raise
+            if len(rows) == 1:
+                self.rejected += 1
+                logger.error(f"Activity entry rejected, skipping it: {e} entry={rows[0]}")
+                return 0
+
+        middle = len(rows) // 2
+        return self._write(rows[:middle]) + self._write(rows[middle:])
+
+    def _failed(self) -> None:
+        """Back off exponentially before the next flush attempt."""
+        self._failures += 1
+        backoff = min(
+            self.flush_interval * 2**self._failures, MAX_RETRY_BACKOFF_SECONDS
+        )
+        self._retry_at = time.monotonic() + backoff
+
+    def _succeeded(self) -> None:
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def _flush_buffer(self) -> int:
+        with self._lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+
+        if not batch:
+            return 0
+
+        try:
+            written = self._write(batch)
+        except Exception as e:
+            logger.error(f"Activity flush failed, re-queueing {len(batch)} entries: {e}")
+            with self._lock:
+                self._buffer.extendleft(reversed(batch))
+                self._trim()
+            self._failed()
+            return 0
+
+        self._succeeded()
+        logger.debug(f"Flushed {written} activity entries")
+        return written
+
+    def _ensure_stream_group(self) -> None:
+        try:
+            redis_client.xgroup_create(  # type: ignore
+                STREAM_KEY, STREAM_GROUP, id="0", mkstream=True
+            )
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _read_stream(self) -> list[tuple[str, dict[str, str]]]:
+        # Reclaim entries a crashed instance read but never acknowledged
+        _, claimed, *_ = redis_client.xautoclaim(  # type: ignore
+            STREAM_KEY,
+            STREAM_GROUP,
+            self._consumer,
+            min_idle_time=STREAM_RECLAIM_IDLE_MS,
+            start_id="0-0",
+            count=self.batch_size,
+        )
+        if claimed:
+            return claimed
+
+        response = redis_client.xreadgroup(  # type: ignore
+            STREAM_GROUP, self._consumer, {STREAM_KEY: ">"}, count=self.batch_size
+        )
+        return response[0][1] if response else []
+
+    def _flush_stream(self) -> int:
+        written = 0
+        try:
+            self._ensure_stream_group()
+            while True:
+                messages = self._read_stream()
+                if not messages:
+                    break
+
+                ids = [message_id for message_id, _ in messages]
+                rows = []
+                for _, fields in messages:
+                    entry = json.loads(fields["entry"])
+                    entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+                    rows.append(entry)
+
+                # Unacknowledged on a transient failure, so the batch is
+                # retried later; rejected entries are acknowledged with the rest
+                written += self._write(rows)
+                redis_client.xack(STREAM_KEY, STREAM_GROUP, *ids)  # type: ignore
+                redis_client.xdel(STREAM_KEY, *ids)  # type: ignore
+        except Exception as e:
+            logger.error(f"Activity stream flush failed: {e}")
+            self._failed()
+
+        return written
+
+    # --- Lifecycle ---
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if time.monotonic() < self._retry_at:
+                # Backing off after a failure; a full buffer doesn't cut it short
+                continue
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Activity writer flush loop error: {e}")
+
+    def start(self) -> None:
+        """Start the background flush thread (no-op in sync mode)."""
+        if not self.buffered or self._thread is not None:
+            return
+
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="activity-writer", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Activity writer started (mode={self.mode})")
+
+    def stop(self) -> None:
+        """Stop the flush thread and write out anything still queued."""
+        if self._thread is None:
+            return
+
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+        written = self.flush()
+        logger.info(f"Activity writer stopped, flushed {written} entries on shutdown")
+
+
+@event.listens_for(Session, "after_commit")
+def _release_pending_activity(session: Session) -> None:
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        for writer, entries in pending.items():
+            writer.submit(entries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_activity(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+
+
+# Global writer instance
+activity_writer = ActivityWriter(
+    mode=settings.activity_log_mode,
+    batch_size=settings.ACTIVITY_FLUSH_BATCH_SIZE,
+    flush_interval=settings.ACTIVITY_FLUSH_INTERVAL_SECONDS,
+    max_buffered=settings.ACTIVITY_BUFFER_MAX_ENTRIES,
+)
@@ -0,0 +1,226 @@
+"""
+Live change events for GET /events (server-sent events).
+
+Every logged activity entry doubles as a change event. log_activity queues it
+on the session with its audience (task owner, everyone the task is shared
+with, and the user a share was granted to or revoked from), and it is
+published to one Redis pub/sub channel per recipient (events:user_{id}) once
+the session commits. Rolled-back changes are never announced.
+
+A task's audience is read once per transaction and memoized on the session,
+so the event, the activity feed rows and a deletion's sync tombstones share
+one query; preload_task_audiences() reads a whole subtree at once. Adding or
+deleting a share through the session drops the task's memoized audience.
+
+Each SSE connection subscribes to its user's channel, so an event published
+by any API instance reaches subscribers on every instance. Connections have
+a bounded queue: a client that falls EVENTS_QUEUE_SIZE events behind has its
+backlog dropped and receives a single "resync" event telling it to refetch.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Iterable
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import db_models
+from core.redis_config import async_redis_client, redis_client
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding events waiting for the request to commit
+PENDING_KEY = "pending_events"
+
+# Session.info key holding {task_id: (owner_id, sharee ids)} for this transaction
+AUDIENCE_KEY = "task_audiences"
+
+# Client reconnect delay advertised in the stream
+RETRY_MS = 3000
+
+# Details keys naming a user whose access is changing in this event
+AUDIENCE_DETAIL_KEYS = ("shared_with_user_id", "unshared_user_id")
+
+
+def channel_for(user_id: int) -> str:
+    return f"events:user_{user_id}"
+
+
+def format_sse(event_name: str, data: str) -> str:
+    return f"event: {event_name}\ndata: {data}\n\n"
+
+
+def _forget_pending_shares(session: Session) -> None:
+    """Drop memoized audiences of tasks with a share added or deleted in session."""
+    memo = session.info.get(AUDIENCE_KEY)
+    if not memo:
+        return
+    for obj in itertools.chain(session.new, session.deleted):
+        if isinstance(obj, db_models.TaskShare):
+            memo.pop(obj.task_id, None)
+
+
+def preload_task_audiences(db_session: Session, task_ids: Iterable[int]) -> None:
+    """Read the owner and sharees of every task not memoized yet, in one query."""
+    _forget_pending_shares(db_session)
+    memo = db_session.info.setdefault(AUDIENCE_KEY, {})
+    missing = {task_id for task_id in task_ids if task_id not in memo}
+    if not missing:
+        return
+
+    owners: dict[int, int] = {}
+    sharees: dict[int, set[int]] = defaultdict(set)
+    rows = (
+        db_session.query(
+            db_models.Task.id, db_models.Task.user_id, db_models.TaskShare.shared_with_user_id
+        )
+        .outerjoin(db_models.TaskShare, db_models.TaskShare.task_id == db_models.Task.id)
+        .filter(db_models.Task.id.in_(missing))
+    )
+    for task_id, owner_id, sharee_id in rows:
+        owners[task_id] = owner_id
+        if sharee_id is not None:
+            sharees[task_id].add(sharee_id)
+
+    for task_id in missing:
+        memo[task_id] = (owners.get(task_id), frozenset(sharees[task_id]))
+
+
+def task_sharees(db_session: Session, task_ids: Iterable[int]) -> dict[int, frozenset[int]]:
+    """Everyone each task is shared with."""
+    task_ids = list(task_ids)
+    preload_task_audiences(db_session, task_ids)
+    memo = db_session.info[AUDIENCE_KEY]
+    return {task_id: memo[task_id][1] for task_id in task_ids}
+
+
+def task_audience(db_session: Session, task_id: int) -> set[int]:
+    """The task owner plus everyone it is shared with."""
+    preload_task_audiences(db_session, [task_id])
+    owner_id, sharees = db_session.info[AUDIENCE_KEY][task_id]
+    audience = set(sharees)
+    if owner_id is not None:
+        audience.add(owner_id)
+    return audience
+
+
+def queue_event(db_session: Session, entry: dict[str, Any]) -> None:
+    """Queue a change event for an activity entry; published after commit."""
+    recipients = {entry["user_id"]}
+    task_id = entry.get("task_id")
+    if task_id is not None:
+        recipients |= task_audience(db_session, task_id)
+
+    details = entry.get("details") or {}
+    for key in AUDIENCE_DETAIL_KEYS:
+        if details.get(key) is not None:
+            recipients.add(details[key])
+
+    payload = {
+        "type": f"{entry['resource_type']}.{entry['action']}",
+        "resource_type": entry["resource_type"],
+        "resource_id": entry["resource_id"],
+        "task_id": task_id,
+        "actor_id": entry["user_id"],
+        "details": details,
+        "at": datetime.now(timezone.utc).isoformat(),
+    }
+    db_session.info.setdefault(PENDING_KEY, []).append((recipients, payload))
+
+
+def publish(recipients: set[int], payload: dict[str, Any]) -> None:
+    if not redis_client:
+        return
+
+    message = json.dumps(payload, default=str)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for user_id in recipients:
+            pipe.publish(channel_for(user_id), message)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Event publish failed for {payload['type']}: {e}")
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_events(session: Session) -> None:
+    for recipients, payload in session.info.pop(PENDING_KEY, ()):
+        publish(recipients, payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+
+
+@event.listens_for(Session, "before_flush")
+def _forget_changed_audiences(session: Session, flush_context, instances) -> None:
+    _forget_pending_shares(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_audiences(session: Session) -> None:
+    # Other transactions may change shares; the next one reads them again
+    session.info.pop(AUDIENCE_KEY, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_audiences(session: Session) -> None:
+    session.info.pop(AUDIENCE_KEY, None)
+
+
+# --- Subscriber side ---
+
+
+async def _pump(messages: AsyncIterator[dict[str, Any]], queue: asyncio.Queue) -> None:
+    """Move pub/sub messages into a connection's bounded queue."""
+    async for message in messages:
+        if message["type"] != "message":
+            continue
+        try:
+            queue.put_nowait(format_sse("change", message["data"]))
+        except asyncio.QueueFull:
+            # Slow client: drop the backlog and have it refetch instead
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(format_sse("resync", "{}"))
+            logger.warning("Event stream fell behind, sent resync")
+
+
+async def event_stream(request: Request, user_id: int) -> AsyncIterator[str]:
+    """Yield SSE frames for one user until the client disconnects."""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+    pubsub = async_redis_client.pubsub()  # type: ignore
+    await pubsub.subscribe(channel_for(user_id))
+    reader = asyncio.create_task(_pump(pubsub.listen(), queue))
+    logger.info(f"Event stream opened for user_id={user_id}")
+
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        # Anything before this point is unknown to the client: it should sync now
+        yield format_sse("ready", "{}")
+
+        while not reader.done():
+            if await request.is_disconnected():
+                break
+            try:
+                frame = await asyncio.wait_for(
+                    queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                # Comment frame keeps proxies from closing an idle connection
+                yield ": heartbeat\n\n"
+                continue
+            yield frame
+    finally:
+        reader.cancel()
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
+        logger.info(f"Event stream closed for user_id={user_id}")
@@ -0,0 +1,273 @@
+"""
+Conditional GET (ETag / If-None-Match) for task reads, and the change
+tracking that also drives core.cache tag invalidation.
+
+Two kinds of version counter live in Redis:
+- version:user_{id} - anything shown on the user's task list or stats changed
+- version:task_{id} - the task, its comments, shares or files changed
+
+A before_flush listener notices inserts, updates and deletes of tasks,
+comments, shares and files, and works out who can see them: the task owners
+and everyone the tasks are shared with, before the change. Once the session
+commits it invalidates the matching cache tags (user_tag for owners,
+share_tag for sharees, task_tag for the tasks) and then bumps the version
+counters. Rolled-back changes touch nothing.
+
+The conditional_get dependencies read the counter before the endpoint runs
+any query for the body (cached or not), so an ETag is never newer than the
+data it is sent with. A matching If-None-Match short-circuits to 304 without
+running the endpoint. Without Redis no ETag is sent and every GET is a 200.
+"""
+
+import logging
+import time
+from datetime import date
+from itertools import chain
+from typing import Iterable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import db_models
+from core import cache, exceptions
+from core.redis_config import redis_client
+from core.settings import settings
+from db_config import get_db
+from dependencies import TaskPermission, get_current_user, require_task_access
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding (owner_ids, sharee_ids, task_ids) to invalidate after commit
+PENDING_KEY = "pending_versions"
+
+# Counters idle this long expire; a recreated one starts from a fresh value
+VERSION_TTL_SECONDS = 30 * 24 * 3600
+
+TRACKED_MODELS = (
+    db_models.Task,
+    db_models.TaskComment,
+    db_models.TaskShare,
+    db_models.TaskFile,
+)
+
+
+def user_version_key(user_id: int) -> str:
+    return f"version:user_{user_id}"
+
+
+def task_version_key(task_id: int) -> str:
+    return f"version:task_{task_id}"
+
+
+def _seed() -> int:
+    # Counters start from the clock, so a counter lost with Redis data can't
+    # come back at a value a client already holds an ETag for
+    return time.time_ns()
+
+
+def _read_version(key: str) -> Optional[int]:
+    if not redis_client:
+        return None
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(key, _seed(), nx=True, ex=VERSION_TTL_SECONDS)
+        pipe.get(key)
+        _, version = pipe.execute()
+        return int(version)
+    except Exception as e:
+        logger.error(f"Version read failed for {key}: {e}")
+        return None
+
+
+def bump_versions(user_ids: set[int], task_ids: set[int]) -> None:
+    if not redis_client or not (user_ids or task_ids):
+        return
+
+    keys = [user_version_key(u) for u in user_ids] + [task_version_key(t) for t in task_ids]
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(key, _seed(), nx=True)
+            pipe.incr(key)
+            pipe.expire(key, VERSION_TTL_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Version bump failed for {len(keys)} keys: {e}")
+
+
+# --- ETags ---
+
+
+def user_etag(user_id: int) -> Optional[str]:
+    """ETag for per-user views (task list, stats)."""
+    version = _read_version(user_version_key(user_id))
+    if version is None:
+        return None
+    # "Overdue" depends on the date as well as the data
+    return f'W/"user-{user_id}-{version}-{date.today():%Y%m%d}"'
+
+
+def task_etag(task_id: int) -> Optional[str]:
+    """ETag for views of one task (detail, comments, files)."""
+    version = _read_version(task_version_key(task_id))
+    if version is None:
+        return None
+    return f'W/"task-{task_id}-{version}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" match
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def cache_control() -> str:
+    max_age = settings.HTTP_CACHE_MAX_AGE_SECONDS
+    if max_age > 0:
+        return f"private, max-age={max_age}"
+    return "private, no-cache"
+
+
+def conditional_get(request: Request, response: Response, etag: Optional[str]) -> None:
+    """
+    Set caching headers on the response, or raise a 304 if the client's
+    If-None-Match already matches.
+    """
+    response.headers["Cache-Control"] = cache_control()
+    # Auth comes from the cookie or the bearer header
+    response.headers["Vary"] = "Authorization, Cookie"
+    if etag is None:
+        return
+
+    response.headers["ETag"] = etag
+    if _matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=dict(response.headers)
+        )
+
+
+# --- Dependencies ---
+
+
+def user_conditional_get(
+    request: Request,
+    response: Response,
+    current_user: db_models.User = Depends(get_current_user),
+) -> None:
+    """ETag check for per-user views; add to the route's dependencies."""
+    conditional_get(request, response, user_etag(current_user.id))  # type: ignore
+
+
+def task_conditional_get(
+    task_id: int,
+    request: Request,
+    response: Response,
+    db_session: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+) -> None:
+    """ETag check for views of one task. A 304 still requires view access."""
+    etag = task_etag(task_id)
+
+    task = db_session.query(db_models.Task).filter(db_models.Task.id == task_id).first()
+    if not task:
+        raise exceptions.TaskNotFoundError(task_id=task_id)
+    require_task_access(task, current_user, db_session, TaskPermission.VIEW)
+
+    conditional_get(request, response, etag)
+
+
+# --- Change tracking ---
+
+
+def _audience(session: Session, task_ids: set[int]) -> tuple[set[int], set[int]]:
+    """Owners of the tasks, and everyone they are shared with."""
+    if not task_ids:
+        return set(), set()
+
+    owners = session.query(db_models.Task.user_id).filter(
+        db_models.Task.id.in_(task_ids)
+    )
+    sharees = session.query(db_models.TaskShare.shared_with_user_id).filter(
+        db_models.TaskShare.task_id.in_(task_ids)
+    )
+    return {row[0] for row in owners}, {row[0] for row in sharees}
+
+
+def mark_user_changed(session: Session, user_id: int) -> None:
+    """
+    Invalidate the user's task list on commit, for writes the flush listener
+    can't see (COPY, bulk statements).
+    """
+    pending = session.info.setdefault(PENDING_KEY, (set(), set(), set()))
+    pending[0].add(user_id)
+
+
+def mark_tasks_changed(session: Session, task_ids: Iterable[int]) -> None:
+    """
+    Invalidate the tasks and everyone who sees them on commit, for bulk
+    statements that update existing tasks.
+    """
+    task_ids = set(task_ids)
+    owners, sharees = _audience(session, task_ids)
+    pending = session.info.setdefault(PENDING_KEY, (set(), set(), set()))
+    pending[0].update(owners)
+    pending[1].update(sharees)
+    pending[2].update(task_ids)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changed_versions(session: Session, flush_context, instances) -> None:
+    owner_ids: set[int] = set()
+    sharee_ids: set[int] = set()
+    task_ids: set[int] = set()
+
+    modified = (obj for obj in session.dirty if session.is_modified(obj))
+    for obj in chain(session.new, modified, session.deleted):
+        if not isinstance(obj, TRACKED_MODELS):
+            continue
+        if isinstance(obj, db_models.Task):
+            owner_ids.add(obj.user_id)  # type: ignore
+            if obj.id is not None:
+                task_ids.add(obj.id)  # type: ignore
+        else:
+            task_ids.add(obj.task_id)  # type: ignore
+            if isinstance(obj, db_models.TaskShare):
+                sharee_ids.add(obj.shared_with_user_id)  # type: ignore
+
+    if not (owner_ids or task_ids):
+        return
+
+    # Read before the flush, so a deleted task or share still counts its audience
+    owners, sharees = _audience(session, task_ids)
+
+    pending = session.info.setdefault(PENDING_KEY, (set(), set(), set()))
+    pending[0].update(owner_ids, owners)
+    pending[1].update(sharee_ids, sharees)
+    pending[2].update(task_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_pending(session: Session) -> None:
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+
+    owner_ids, sharee_ids, task_ids = pending
+    # Tags first: a request that sees the new ETag must also miss the old entries
+    cache.invalidate_tags(
+        [cache.user_tag(u) for u in owner_ids]
+        + [cache.share_tag(u) for u in sharee_ids]
+        + [cache.task_tag(t) for t in task_ids]
+    )
+    bump_versions(owner_ids | sharee_ids, task_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_versions(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
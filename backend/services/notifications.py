@@ -1,14 +1,36 @@
+import json
 import logging
 import os
-from typing import Optional
+from typing import Any, Optional
 
 from sqlalchemy.orm import Session
 
 import db_models
 from core.email import email_service
+from core.redis_config import PREFERENCES_CACHE_TTL, delete_cache, get_cache, set_cache
 
 logger = logging.getLogger(__name__)
 
+# Preference columns served from cache to should_notify()
+PREFERENCE_FIELDS = (
+    "email_verified",
+    "email_enabled",
+    "task_shared_with_me",
+    "task_completed",
+    "comment_on_my_task",
+    "task_due_soon",
+)
+
+# Column defaults, used when a user has no stored preferences row yet
+DEFAULT_PREFERENCES: dict[str, bool] = {
+    "email_verified": False,
+    "email_enabled": True,
+    "task_shared_with_me": True,
+    "task_completed": False,
+    "comment_on_my_task": True,
+    "task_due_soon": True,
+}
+
 
 class NotificationType:
     """Enum for notification event types"""
@@ -59,6 +81,61 @@ def get_or_create_preferences(
     return prefs
 
 
+def create_default_preferences(
+    user_id: int, db_session: Session
+) -> db_models.NotificationPreference:
+    """
+    Add a default preferences row for a new user.
+    Does not commit - the caller commits it together with the user.
+    """
+    prefs = db_models.NotificationPreference(user_id=user_id, **DEFAULT_PREFERENCES)
+    db_session.add(prefs)
+    return prefs
+
+
+def _preferences_cache_key(user_id: int) -> str:
+    return f"notification_prefs:user_{user_id}"
+
+
+def cache_preferences(prefs: db_models.NotificationPreference) -> None:
+    """Write-through: store a committed preferences row in the cache."""
+    snapshot = {field: bool(getattr(prefs, field)) for field in PREFERENCE_FIELDS}
+    set_cache(
+        _preferences_cache_key(prefs.user_id),  # type: ignore
+        json.dumps(snapshot),
+        ttl=PREFERENCES_CACHE_TTL,
+    )
+
+
+def invalidate_preferences_cache(user_id: int) -> None:
+    """Drop the cached preferences so the next read goes to the database."""
+    delete_cache(_preferences_cache_key(user_id))
+
+
+def get_cached_preferences(user_id: int, db_session: Session) -> dict[str, Any]:
+    """
+    Read-only preference lookup for the notification hot path.
+    Served from Redis when possible; never inserts or commits.
+    Users without a stored row get the column defaults.
+    """
+    cached = get_cache(_preferences_cache_key(user_id))
+    if cached:
+        return json.loads(cached)
+
+    prefs = (
+        db_session.query(db_models.NotificationPreference)
+        .filter(db_models.NotificationPreference.user_id == user_id)
+        .first()
+    )
+
+    if not prefs:
+        logger.debug(f"No stored preferences for user_id={user_id}, using defaults")
+        return dict(DEFAULT_PREFERENCES)
+
+    cache_preferences(prefs)
+    return {field: bool(getattr(prefs, field)) for field in PREFERENCE_FIELDS}
+
+
 def should_notify(user_id: int, notification_type: str, db_session: Session) -> bool:
     """
     Check if user wants this type of notification
@@ -67,28 +144,28 @@ def should_notify(user_id: int, notification_type: str, db_session: Session) ->
     - User hasn't verified email
     - User disabled this specific notification type
     """
-    prefs = get_or_create_preferences(user_id, db_session)
+    prefs = get_cached_preferences(user_id, db_session)
 
     # 1. Check if email is verified
-    if not prefs.email_verified:  # type: ignore
+    if not prefs["email_verified"]:
         logger.debug(f"Skipping notification: user_id={user_id} email not verified")
         return False
 
     # 2. Check if notifications are globally disabled
-    if not prefs.email_enabled:  # type: ignore
+    if not prefs["email_enabled"]:
         logger.debug(f"Skipping notification: user_id={user_id} has disabled email")
         return False
 
     # 3. Check specific notification type
     type_mapping = {
-        NotificationType.TASK_SHARED: prefs.task_shared_with_me,
-        NotificationType.TASK_COMPLETED: prefs.task_completed,
-        NotificationType.COMMENT_ADDED: prefs.comment_on_my_task,
-        NotificationType.TASK_DUE_SOON: prefs.task_due_soon,
+        NotificationType.TASK_SHARED: prefs["task_shared_with_me"],
+        NotificationType.TASK_COMPLETED: prefs["task_completed"],
+        NotificationType.COMMENT_ADDED: prefs["comment_on_my_task"],
+        NotificationType.TASK_DUE_SOON: prefs["task_due_soon"],
     }
 
     enabled = type_mapping.get(notification_type, False)
-    if not enabled:  # type: ignore
+    if not enabled:
         logger.debug(
             f"Skipping notification: user_id={user_id} disabled {notification_type}"
         )
@@ -208,3 +285,25 @@ Task Manager Notifications
     """.strip()
 
     return subject, message
+
+
+def format_task_due_soon_notification(
+    task_title: str, due_date: str
+) -> tuple[str, str]:
+    """Returns (subject, message) for task due soon reminder"""
+    subject = f"Task Due Soon: {task_title}"
+    message = f"""
+Hello!
+
+One of your tasks is due soon:
+
+Task: {task_title}
+Due: {due_date}
+
+Log in to see details: http://localhost:8000/tasks
+
+---
+Task Manager Notifications
+    """.strip()
+
+    return subject, message
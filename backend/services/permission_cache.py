@@ -0,0 +1,131 @@
+"""
+Per-user map of shared-task permissions, cached in Redis.
+
+get_user_task_permission would otherwise run a TaskShare query on every
+non-owner access (comments, files, timeline, updates, downloads). Instead each
+user has one hash, task_perms:user_{id}, of task_id -> "view" | "edit" | "none".
+"none" is stored too, so repeated probes of a task that isn't shared are
+answered without a query as well.
+
+Fields are filled lazily from the database on a miss, with HSETNX, and
+rewritten with HSET once a share change commits (share, permission update,
+unshare). A request that read the database before the change therefore can't
+overwrite the committed value with its older one. If that rewrite fails, the
+user's whole map is deleted. Each map expires PERMISSION_CACHE_TTL_SECONDS
+after it was created and reads never extend it, so whatever goes wrong, a
+stale field outlives the share by that long at most. Owners never use the map:
+ownership is on the task row the caller has already loaded.
+"""
+
+import logging
+from itertools import chain
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import db_models
+from core.redis_config import redis_client
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding {(user_id, task_id): permission} to write after commit
+PENDING_KEY = "pending_task_permissions"
+
+NO_ACCESS = "none"
+
+
+def _cache_key(user_id: int) -> str:
+    return f"task_perms:user_{user_id}"
+
+
+def cached_permission(user_id: int, task_id: int) -> Optional[str]:
+    """"view", "edit" or "none" from the map, or None on a miss."""
+    if not redis_client:
+        return None
+
+    try:
+        return redis_client.hget(_cache_key(user_id), str(task_id))  # type: ignore
+    except Exception as e:
+        logger.error(f"Permission cache read failed for user_id={user_id}: {e}")
+        return None
+
+
+def _write(entries: dict[tuple[int, int], str], overwrite: bool) -> bool:
+    """Store fields in the users' maps; returns False if Redis couldn't be written."""
+    if not entries:
+        return True
+    if not redis_client:
+        return False
+
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for (user_id, task_id), permission in entries.items():
+            if overwrite:
+                pipe.hset(_cache_key(user_id), str(task_id), permission)
+            else:
+                pipe.hsetnx(_cache_key(user_id), str(task_id), permission)
+            # NX: the TTL runs from the map's creation, later writes keep it
+            pipe.expire(_cache_key(user_id), settings.PERMISSION_CACHE_TTL_SECONDS, nx=True)
+        pipe.execute()
+        return True
+    except Exception as e:
+        logger.error(f"Permission cache write failed: {e}")
+        return False
+
+
+def _forget(user_ids: set[int]) -> None:
+    """Drop the users' maps, so their permissions are read from the database."""
+    if not redis_client or not user_ids:
+        return
+
+    try:
+        redis_client.delete(*(_cache_key(user_id) for user_id in user_ids))
+    except Exception as e:
+        logger.error(f"Permission cache delete failed for user_ids={user_ids}: {e}")
+
+
+def lookup_permission(user_id: int, task_id: int, db_session: Session) -> str:
+    """The user's share permission on a task: "view", "edit" or "none"."""
+    cached = cached_permission(user_id, task_id)
+    if cached is not None:
+        return cached
+
+    share = (
+        db_session.query(db_models.TaskShare.permission)
+        .filter(
+            db_models.TaskShare.task_id == task_id,
+            db_models.TaskShare.shared_with_user_id == user_id,
+        )
+        .first()
+    )
+    permission = share.permission if share else NO_ACCESS
+
+    # Never overwrite: a share change may have committed since the query ran
+    _write({(user_id, task_id): permission}, overwrite=False)
+    return permission
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_share_changes(session: Session, flush_context, instances) -> None:
+    modified = (obj for obj in session.dirty if session.is_modified(obj))
+    for obj in chain(session.new, modified, session.deleted):
+        if not isinstance(obj, db_models.TaskShare):
+            continue
+        permission = NO_ACCESS if obj in session.deleted else obj.permission
+        pending = session.info.setdefault(PENDING_KEY, {})
+        pending[(obj.shared_with_user_id, obj.task_id)] = permission
+
+
+@event.listens_for(Session, "after_commit")
+def _write_pending_permissions(session: Session) -> None:
+    pending = session.info.pop(PENDING_KEY, {})
+    if not _write(pending, overwrite=True):
+        # The old fields would otherwise outlive the change
+        _forget({user_id for user_id, _ in pending})
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_permissions(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
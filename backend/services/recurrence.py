@@ -0,0 +1,313 @@
+"""
+Recurring tasks: the scheduler that creates occurrences ahead of time, and
+the GET /tasks/occurrences expansion of the ones it hasn't created yet.
+
+A recurring task is a series. It holds the rule (core/rrule.py) and is the
+first occurrence itself, its due_date being the rule's start. Every later
+occurrence is an ordinary task with recurrence_parent_id set to the series,
+so it can be completed, edited or deleted on its own.
+
+Occurrences are created lazily, RECURRENCE_HORIZON_DAYS ahead, by a scheduler
+running as its own process next to the API:
+
+    python -m services.recurrence
+
+Each series keeps recurrence_next, its first occurrence not created yet
+(NULL once the rule has ended). A sweep walks the partial index
+ix_tasks_recurrence_next in keyset order, so it only reads series with an
+occurrence inside the horizon. Per batch it locks the series (SKIP LOCKED),
+inserts all their occurrences with one INSERT ... ON CONFLICT DO NOTHING
+(the unique (recurrence_parent_id, due_date) index makes reruns harmless)
+and moves recurrence_next past the horizon, in one transaction.
+
+Listing a date range never writes: tasks that exist are read, and each
+series' occurrences from recurrence_next on are computed as virtual entries.
+"""
+
+import logging
+import time
+from datetime import date, timedelta
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import Date, case, cast, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import db_models
+from core import rrule
+from core.settings import settings
+from db_config import SessionLocal
+from services import http_cache
+from services.sync import UNCHANGED_BY_BOOKKEEPING
+from services.task_listing import apply_task_filters
+
+logger = logging.getLogger(__name__)
+
+# TaskUpdate fields that move a series' next occurrence
+SCHEDULE_FIELDS = frozenset({"recurrence_rule", "due_date"})
+
+# Copied from the series onto each occurrence
+COPIED_COLUMNS = ("title", "description", "priority", "tags", "notes", "user_id")
+
+
+def schedule_series(db_session: Session, task: db_models.Task) -> None:
+    """
+    Set recurrence_next after a task's rule or due date was set or changed.
+
+    The series resumes at its first occurrence after its own due date, after
+    the latest occurrence already created, and from today on: a backdated
+    series doesn't create the occurrences it missed. Occurrences already
+    created are kept. Raises 400 if a recurring task has no due date.
+    """
+    if not task.recurrence_rule:
+        task.recurrence_next = None  # type: ignore
+        return
+
+    if task.due_date is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A recurring task needs a due_date (its first occurrence)",
+        )
+
+    resume = max(task.due_date + timedelta(days=1), date.today())  # type: ignore
+    if task.id is not None:
+        latest = (
+            db_session.query(func.max(db_models.Task.due_date))
+            .filter(db_models.Task.recurrence_parent_id == task.id)
+            .scalar()
+        )
+        if latest is not None:
+            resume = max(resume, latest + timedelta(days=1))
+
+    task.recurrence_next = rrule.next_occurrence(  # type: ignore
+        rrule.parse_rule(task.recurrence_rule), task.due_date, resume  # type: ignore
+    )
+
+
+# --- Scheduler ---
+
+
+def _claim_batch(
+    db_session: Session,
+    horizon_end: date,
+    after: Optional[tuple[date, int]],
+    limit: int,
+) -> list:
+    """
+    Lock the next keyset page of series with an occurrence due by horizon_end.
+    SKIP LOCKED lets several scheduler instances sweep side by side.
+    """
+    query = db_session.query(
+        db_models.Task.id,
+        db_models.Task.due_date,
+        db_models.Task.recurrence_rule,
+        db_models.Task.recurrence_next,
+        *(getattr(db_models.Task, column) for column in COPIED_COLUMNS),
+    ).filter(
+        # Must match the partial index predicate
+        db_models.Task.recurrence_next.isnot(None),
+        db_models.Task.recurrence_next <= horizon_end,
+    )
+
+    if after is not None:
+        query = query.filter(
+            tuple_(db_models.Task.recurrence_next, db_models.Task.id) > tuple_(*after)
+        )
+
+    return (
+        query.order_by(db_models.Task.recurrence_next, db_models.Task.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def _materialize_batch(db_session: Session, rows: list, horizon_end: date) -> int:
+    """Create the batch's occurrences up to horizon_end; returns how many."""
+    occurrences: list[dict[str, Any]] = []
+    next_by_id: dict[int, Optional[date]] = {}
+
+    for row in rows:
+        try:
+            rule = rrule.parse_rule(row.recurrence_rule)
+        except (TypeError, ValueError) as e:
+            # Rules are validated on write; stop a series rather than the sweep
+            logger.error(f"Recurring task_id={row.id} has an invalid rule: {e}")
+            next_by_id[row.id] = None
+            continue
+
+        copied = {column: getattr(row, column) for column in COPIED_COLUMNS}
+        occurrences.extend(
+            {
+                **copied,
+                "completed": False,
+                "due_date": day,
+                "recurrence_parent_id": row.id,
+            }
+            for day in rrule.occurrences_between(
+                rule, row.due_date, row.recurrence_next, horizon_end
+            )
+        )
+        next_by_id[row.id] = rrule.next_occurrence(
+            rule, row.due_date, horizon_end + timedelta(days=1)
+        )
+
+    created = 0
+    if occurrences:
+        created = db_session.execute(
+            insert(db_models.Task)
+            .values(occurrences)
+            .on_conflict_do_nothing(
+                index_elements=["recurrence_parent_id", "due_date"],
+                index_where=db_models.Task.recurrence_parent_id.isnot(None),
+            )
+        ).rowcount
+
+    db_session.query(db_models.Task).filter(
+        db_models.Task.id.in_(next_by_id)
+    ).update(
+        {
+            # Typed, or an all-NULL CASE would be text
+            db_models.Task.recurrence_next: case(
+                {task_id: cast(day, Date) for task_id, day in next_by_id.items()},
+                value=db_models.Task.id,
+            ),
+            **UNCHANGED_BY_BOOKKEEPING,
+        },
+        synchronize_session=False,
+    )
+
+    # Bulk statements skip the flush listener
+    for user_id in {row.user_id for row in rows}:
+        http_cache.mark_user_changed(db_session, user_id)
+
+    return created
+
+
+def sweep_recurring_tasks(db_session: Session, today: Optional[date] = None) -> int:
+    """
+    Create occurrences due within RECURRENCE_HORIZON_DAYS of today.
+    Returns the number of tasks created.
+    """
+    today = today or date.today()
+    horizon_end = today + timedelta(days=settings.RECURRENCE_HORIZON_DAYS)
+    batch_size = settings.RECURRENCE_BATCH_SIZE
+
+    logger.info(f"Recurrence sweep starting: horizon={horizon_end}")
+
+    created = 0
+    after: Optional[tuple[date, int]] = None
+
+    while True:
+        rows = _claim_batch(db_session, horizon_end, after, batch_size)
+        if not rows:
+            db_session.commit()
+            break
+
+        after = (rows[-1].recurrence_next, rows[-1].id)
+        created += _materialize_batch(db_session, rows, horizon_end)
+        db_session.commit()
+
+        if len(rows) < batch_size:
+            break
+
+    logger.info(f"Recurrence sweep finished: created={created}")
+    return created
+
+
+# --- Listing ---
+
+
+def _entry(task, day: date, virtual: bool) -> dict[str, Any]:
+    return {
+        "task_id": None if virtual else task.id,
+        "series_id": (
+            task.id if virtual or task.recurrence_rule else task.recurrence_parent_id
+        ),
+        "virtual": virtual,
+        "title": task.title,
+        "priority": task.priority,
+        "due_date": day,
+        "completed": False if virtual else task.completed,
+        "tags": task.tags,
+    }
+
+
+def list_occurrences(
+    db_session: Session,
+    user_id: int,
+    due_after: date,
+    due_before: date,
+    completed: Optional[bool] = None,
+    **filters: Any,
+) -> list[dict[str, Any]]:
+    """
+    The user's tasks due in [due_after, due_before] plus the occurrences of
+    their recurring tasks in that range that don't exist yet, by due date.
+    filters are apply_task_filters' priority/tags/search; a series' own
+    values decide for its virtual occurrences, which are never completed.
+    """
+    if due_before < due_after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="due_before must not be before due_after",
+        )
+    if (due_before - due_after).days >= settings.RECURRENCE_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range is limited to {settings.RECURRENCE_MAX_RANGE_DAYS} days",
+        )
+
+    owned = db_session.query(db_models.Task).filter(db_models.Task.user_id == user_id)
+
+    tasks = apply_task_filters(
+        owned, completed=completed, due_after=due_after, due_before=due_before, **filters
+    ).order_by(db_models.Task.due_date, db_models.Task.id)
+    entries = [_entry(task, task.due_date, virtual=False) for task in tasks]
+
+    if completed is not True:
+        series = apply_task_filters(
+            owned.filter(
+                db_models.Task.recurrence_next.isnot(None),
+                db_models.Task.recurrence_next <= due_before,
+            ),
+            **filters,
+        )
+        for task in series:
+            rule = rrule.parse_rule(task.recurrence_rule)  # type: ignore
+            first = max(due_after, task.recurrence_next)  # type: ignore
+            entries.extend(
+                _entry(task, day, virtual=True)
+                for day in rrule.occurrences_between(rule, task.due_date, first, due_before)
+            )
+
+    entries.sort(
+        key=lambda entry: (entry["due_date"], entry["virtual"], entry["series_id"] or 0)
+    )
+    return entries
+
+
+def run_scheduler() -> None:
+    """Sweep forever, sleeping RECURRENCE_SWEEP_INTERVAL_SECONDS between runs."""
+    interval = settings.RECURRENCE_SWEEP_INTERVAL_SECONDS
+    logger.info(f"Recurring task scheduler started (interval={interval}s)")
+
+    while True:
+        db = SessionLocal()
+        try:
+            sweep_recurring_tasks(db)
+        except Exception as e:
+            logger.error(f"Recurrence sweep failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    from core.logging_config import setup_logging
+
+    setup_logging()
+    run_scheduler()
@@ -0,0 +1,217 @@
+"""
+Due-soon reminder scheduler.
+
+Sweeps open tasks whose due date falls inside the reminder window and emails
+their owners. Runs as its own process next to the API:
+
+    python -m services.reminders
+
+Each sweep walks the partial index ix_tasks_open_due_date in keyset order
+(due_date, id), so it only ever touches open tasks inside the window.
+Tasks are claimed by setting due_reminder_sent_for = due_date before the
+email goes out; a failed send releases the claim so the next sweep retries.
+Changing a task's due date re-arms the reminder automatically.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+import db_models
+from core.settings import settings
+from db_config import SessionLocal
+from services.notifications import (
+    NotificationType,
+    format_task_due_soon_notification,
+    send_notification,
+    should_notify,
+)
+from services.sync import UNCHANGED_BY_BOOKKEEPING
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class DueSoonReminder:
+    """A claimed task waiting for its reminder email."""
+
+    task_id: int
+    task_title: str
+    due_date: date
+    recipient_email: str
+
+
+def _claim_batch(
+    db_session: Session,
+    window_start: date,
+    window_end: date,
+    after: Optional[tuple[date, int]],
+    limit: int,
+) -> list:
+    """
+    Lock and claim the next keyset page of open tasks due inside the window.
+    SKIP LOCKED lets several scheduler instances sweep without double sends.
+    """
+    query = db_session.query(
+        db_models.Task.id,
+        db_models.Task.title,
+        db_models.Task.due_date,
+        db_models.Task.user_id,
+    ).filter(
+        # Must match the partial index predicate (NOT completed)
+        ~db_models.Task.completed,
+        db_models.Task.due_date >= window_start,
+        db_models.Task.due_date <= window_end,
+        db_models.Task.due_reminder_sent_for.is_distinct_from(db_models.Task.due_date),
+    )
+
+    if after is not None:
+        query = query.filter(
+            tuple_(db_models.Task.due_date, db_models.Task.id) > tuple_(*after)
+        )
+
+    rows = (
+        query.order_by(db_models.Task.due_date, db_models.Task.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    if rows:
+        db_session.query(db_models.Task).filter(
+            db_models.Task.id.in_([row.id for row in rows])
+        ).update(
+            {
+                db_models.Task.due_reminder_sent_for: db_models.Task.due_date,
+                **UNCHANGED_BY_BOOKKEEPING,
+            },
+            synchronize_session=False,
+        )
+    db_session.commit()
+
+    return rows
+
+
+def _build_reminders(db_session: Session, rows: list) -> list[DueSoonReminder]:
+    """Resolve owner emails and drop owners who opted out of due-soon emails."""
+    user_ids = {row.user_id for row in rows}
+    recipients = {
+        user.id: user.email
+        for user in db_session.query(db_models.User.id, db_models.User.email).filter(
+            db_models.User.id.in_(user_ids)
+        )
+    }
+
+    allowed = {
+        user_id
+        for user_id in user_ids
+        if should_notify(user_id, NotificationType.TASK_DUE_SOON, db_session)
+    }
+
+    return [
+        DueSoonReminder(
+            task_id=row.id,
+            task_title=row.title,
+            due_date=row.due_date,
+            recipient_email=recipients[row.user_id],
+        )
+        for row in rows
+        if row.user_id in allowed and row.user_id in recipients
+    ]
+
+
+def _send_reminder(reminder: DueSoonReminder) -> bool:
+    subject, message = format_task_due_soon_notification(
+        task_title=reminder.task_title,
+        due_date=reminder.due_date.isoformat(),
+    )
+    try:
+        return send_notification(
+            recipient_email=reminder.recipient_email,
+            subject=subject,
+            message=message,
+            notification_type=NotificationType.TASK_DUE_SOON,
+        )
+    except Exception as e:
+        logger.error(f"Due-soon reminder failed for task_id={reminder.task_id}: {e}")
+        return False
+
+
+def _release_claims(db_session: Session, task_ids: list[int]) -> None:
+    """Clear the watermark on failed sends so the next sweep retries them."""
+    if not task_ids:
+        return
+
+    db_session.query(db_models.Task).filter(db_models.Task.id.in_(task_ids)).update(
+        {db_models.Task.due_reminder_sent_for: None, **UNCHANGED_BY_BOOKKEEPING},
+        synchronize_session=False,
+    )
+    db_session.commit()
+
+
+def sweep_due_soon_tasks(db_session: Session, today: Optional[date] = None) -> int:
+    """
+    Send reminders for open tasks due within DUE_SOON_REMINDER_DAYS.
+    Returns the number of reminders sent.
+    """
+    today = today or date.today()
+    window_end = today + timedelta(days=settings.DUE_SOON_REMINDER_DAYS)
+    batch_size = settings.REMINDER_BATCH_SIZE
+
+    logger.info(f"Due-soon sweep starting: window={today}..{window_end}")
+
+    sent = 0
+    after: Optional[tuple[date, int]] = None
+
+    with ThreadPoolExecutor(
+        max_workers=settings.REMINDER_MAX_CONCURRENT_SENDS
+    ) as sender:
+        while True:
+            rows = _claim_batch(db_session, today, window_end, after, batch_size)
+            if not rows:
+                break
+
+            after = (rows[-1].due_date, rows[-1].id)
+            reminders = _build_reminders(db_session, rows)
+
+            results = list(sender.map(_send_reminder, reminders))
+            failed = [r.task_id for r, ok in zip(reminders, results) if not ok]
+            _release_claims(db_session, failed)
+
+            sent += len(reminders) - len(failed)
+
+            if len(rows) < batch_size:
+                break
+
+    logger.info(f"Due-soon sweep finished: sent={sent}")
+    return sent
+
+
+def run_scheduler() -> None:
+    """Sweep forever, sleeping REMINDER_SWEEP_INTERVAL_SECONDS between runs."""
+    interval = settings.REMINDER_SWEEP_INTERVAL_SECONDS
+    logger.info(f"Due-soon reminder scheduler started (interval={interval}s)")
+
+    while True:
+        db = SessionLocal()
+        try:
+            sweep_due_soon_tasks(db)
+        except Exception as e:
+            logger.error(f"Due-soon sweep failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    from core.logging_config import setup_logging
+
+    setup_logging()
+    run_scheduler()
@@ -0,0 +1,256 @@
+"""
+Subtasks: the task hierarchy and its completion rollups.
+
+A task's parent_id points at its parent. path holds all of its ancestors'
+ids from the top down ("/" for a top-level task, "/12/34/" for a child of
+34, itself a child of 12). That makes a subtree one indexed prefix scan,
+path LIKE '/12/34/56/%', instead of a recursive CTE.
+
+Every task also carries rollups over its whole subtree: subtask_count
+(descendants) and subtasks_completed (completed descendants). They are kept
+incrementally. Creating, completing, reopening, moving or deleting a task
+adds or subtracts its share of the counts on its ancestors with one
+UPDATE ... WHERE id IN (ancestors from path). Listing 100 parents with their
+"7/10 done" therefore reads 100 rows and nothing else.
+
+Subtasks belong to the owner of their parent. Deleting a task deletes its
+subtree.
+"""
+
+import itertools
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+
+import db_models
+from core.settings import settings
+from services import http_cache
+from services.sync import UNCHANGED_BY_BOOKKEEPING
+
+ROOT_PATH = "/"
+
+
+def ancestor_ids(path: str) -> list[int]:
+    """Ids in a path, from the top-level task down."""
+    return [int(part) for part in path.strip("/").split("/") if part]
+
+
+def child_path(task: db_models.Task) -> str:
+    """Path of the task's children; every descendant's path starts with it."""
+    return f"{task.path}{task.id}/"
+
+
+def _depth(path: str) -> int:
+    return path.count("/") - 1
+
+
+def _adjust_rollups(
+    db_session: Session, path: str, count_delta: int, completed_delta: int
+) -> None:
+    """
+    Add to the rollups of every ancestor in path, as one atomic UPDATE.
+    updated_at is kept: a subtask changing isn't an edit of its ancestors.
+    change_xid still moves (onupdate), so /sync sends the new counts.
+    """
+    ids = ancestor_ids(path)
+    if not ids or not (count_delta or completed_delta):
+        return
+
+    db_session.query(db_models.Task).filter(db_models.Task.id.in_(ids)).update(
+        {
+            db_models.Task.subtask_count: db_models.Task.subtask_count + count_delta,
+            db_models.Task.subtasks_completed: db_models.Task.subtasks_completed
+            + completed_delta,
+            db_models.Task.updated_at: db_models.Task.updated_at,
+        },
+        synchronize_session=False,
+    )
+    # Bulk statements skip the flush listener
+    http_cache.mark_tasks_changed(db_session, ids)
+
+
+def _lock(db_session: Session, *tasks: db_models.Task) -> None:
+    """
+    Reload tasks FOR UPDATE, so their path and rollups can't change under a
+    concurrent move, delete or child insert until this transaction ends.
+    """
+    for task in tasks:
+        db_session.refresh(task, with_for_update=True)
+
+
+def _subtree_size(task: db_models.Task) -> tuple[int, int]:
+    """(tasks, completed tasks) in the subtree rooted at task, itself included."""
+    # A new task's counters are still None until its INSERT
+    return (
+        1 + (task.subtask_count or 0),  # type: ignore
+        int(bool(task.completed)) + (task.subtasks_completed or 0),  # type: ignore
+    )
+
+
+def _check_parent(
+    db_session: Session, task: db_models.Task, parent: db_models.Task
+) -> None:
+    """
+    Raise 400 unless task (and its subtree) may go under parent. Callers
+    check that the user owns parent, and so task and parent share an owner.
+    """
+    height = 0
+    if task.id is not None:
+        if parent.id == task.id or parent.path.startswith(child_path(task)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A task can't be moved under itself or its own subtasks",
+            )
+        if task.subtask_count:
+            # Levels below task: separators in the deepest descendant's path
+            separators = func.length(db_models.Task.path) - func.length(
+                func.replace(db_models.Task.path, "/", "")
+            )
+            deepest = (
+                db_session.query(func.max(separators))
+                .filter(db_models.Task.path.like(f"{child_path(task)}%"))
+                .scalar()
+            )
+            height = deepest - 1 - _depth(task.path)  # type: ignore
+
+    max_depth = settings.SUBTASK_MAX_DEPTH
+    if _depth(child_path(parent)) + height > max_depth:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Subtasks can be nested at most {max_depth} levels deep",
+        )
+
+
+def attach(
+    db_session: Session, task: db_models.Task, parent: Optional[db_models.Task]
+) -> None:
+    """Place a new task under parent (or at the top) and count it in the rollups."""
+    if parent is None:
+        task.parent_id = None  # type: ignore
+        task.path = ROOT_PATH  # type: ignore
+        return
+
+    _lock(db_session, parent)
+    _check_parent(db_session, task, parent)
+    task.parent_id = parent.id
+    task.path = child_path(parent)  # type: ignore
+    _adjust_rollups(db_session, task.path, *_subtree_size(task))  # type: ignore
+
+
+def move(
+    db_session: Session, task: db_models.Task, parent: Optional[db_models.Task]
+) -> None:
+    """
+    Move a task and its subtree under parent (None: to the top level). The
+    old ancestors lose the subtree's counts and the new ones gain them.
+    Call it before changing other fields: the task is reloaded.
+    """
+    _lock(db_session, task, *([parent] if parent is not None else []))
+    if parent is not None:
+        _check_parent(db_session, task, parent)
+    new_path = child_path(parent) if parent is not None else ROOT_PATH
+    if new_path == task.path:
+        return
+
+    count, completed = _subtree_size(task)
+    _adjust_rollups(db_session, task.path, -count, -completed)  # type: ignore
+
+    old_prefix = child_path(task)
+    task.parent_id = parent.id if parent is not None else None  # type: ignore
+    task.path = new_path  # type: ignore
+    new_prefix = child_path(task)
+
+    if task.subtask_count:
+        # Rewrite the prefix of every descendant's path in one statement.
+        # path isn't in any response, so this is bookkeeping for /sync
+        db_session.query(db_models.Task).filter(
+            db_models.Task.path.like(f"{old_prefix}%")
+        ).update(
+            {
+                db_models.Task.path: new_prefix
+                + func.substr(db_models.Task.path, len(old_prefix) + 1),
+                **UNCHANGED_BY_BOOKKEEPING,
+            },
+            synchronize_session=False,
+        )
+
+    _adjust_rollups(db_session, new_path, count, completed)
+
+
+def completion_changed(db_session: Session, task: db_models.Task) -> None:
+    """Count a task that was just completed or reopened in its ancestors' rollups."""
+    _adjust_rollups(db_session, task.path, 0, 1 if task.completed else -1)  # type: ignore
+
+
+def descendants(db_session: Session, task: db_models.Task) -> list[db_models.Task]:
+    """
+    Every task below task, deepest first. Locks task, so no subtask can be
+    added under it until the transaction ends.
+    """
+    _lock(db_session, task)
+
+    subtree = (
+        db_session.query(db_models.Task)
+        .filter(db_models.Task.path.like(f"{child_path(task)}%"))
+        .all()
+    )
+    subtree.sort(key=lambda child: _depth(child.path), reverse=True)  # type: ignore
+    return subtree
+
+
+def list_subtasks(
+    db_session: Session,
+    task: db_models.Task,
+    user_id: int,
+    recursive: bool = False,
+) -> list[db_models.Task]:
+    """
+    Direct subtasks of task, oldest first, or with recursive its whole subtree
+    from one path prefix scan, ordered by path (each level under the one above).
+
+    A share covers only the task shared: a user other than the owner gets
+    the subtasks that were shared with them too, and no others.
+    """
+    if recursive:
+        query = db_session.query(db_models.Task).filter(
+            db_models.Task.path.like(f"{child_path(task)}%")
+        )
+        order = (db_models.Task.path, db_models.Task.created_at, db_models.Task.id)
+    else:
+        query = db_session.query(db_models.Task).filter(
+            db_models.Task.parent_id == task.id
+        )
+        order = (db_models.Task.created_at, db_models.Task.id)
+
+    # Subtasks all belong to the parent's owner
+    if task.user_id != user_id:  # type: ignore
+        query = query.join(db_models.Task.shares).filter(
+            db_models.TaskShare.shared_with_user_id == user_id
+        )
+
+    return (
+        query.options(selectinload(db_models.Task.shares))
+        .order_by(*order)
+        .all()
+    )
+
+
+def delete_subtree(
+    db_session: Session, task: db_models.Task, below: list[db_models.Task]
+) -> None:
+    """
+    Delete task and below (from descendants(), in that transaction) and
+    take them out of the ancestors' rollups. Children go before their
+    parents, one flush per level, since parent_id has no ON DELETE CASCADE.
+    """
+    count, completed = _subtree_size(task)
+    _adjust_rollups(db_session, task.path, -count, -completed)  # type: ignore
+
+    for _, level in itertools.groupby(below, key=lambda child: _depth(child.path)):
+        for child in level:
+            db_session.delete(child)
+        db_session.flush()
+
+    db_session.delete(task)
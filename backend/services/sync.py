@@ -0,0 +1,195 @@
+"""
+Delta sync for offline-capable clients (GET /sync).
+
+Change tokens are Postgres transaction ids. Every synced row carries
+change_xid, the id of the transaction that last inserted or updated it, and
+a token is the xmin of the reading transaction's snapshot: every transaction
+below it had finished when the sync ran, anything at or above it may not have.
+Asking for change_xid >= token on the next sync therefore never misses a
+write that committed late, whatever order transactions commit in. The price
+is that a row can occasionally be sent twice, so clients apply changes as
+idempotent upserts.
+
+Deletions are recorded as sync_tombstones rows, one per user who could see
+the deleted resource. Deleting a task removes its comments and shares with
+it, so one "task" tombstone covers them; unsharing records a "share"
+tombstone for the owner and sharee, plus a "task" tombstone for the sharee,
+who no longer has access. Clients apply deleted before the upserts.
+"""
+
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import or_, select, text, true
+from sqlalchemy.orm import Session, joinedload
+
+import db_models
+
+# Merge into the values of a bulk UPDATE that only writes internal bookkeeping
+# (reminder watermarks, recurrence schedules, subtask paths): setting these
+# columns to themselves keeps their onupdate defaults from marking the tasks
+# as changed for /sync
+UNCHANGED_BY_BOOKKEEPING = {
+    db_models.Task.updated_at: db_models.Task.updated_at,
+    db_models.Task.change_xid: db_models.Task.change_xid,
+}
+
+
+def current_token(db_session: Session) -> int:
+    """Token for "everything visible to this transaction". Read it first."""
+    return db_session.execute(
+        text("SELECT (pg_snapshot_xmin(pg_current_snapshot())::text)::bigint")
+    ).scalar_one()
+
+
+def record_deletion(
+    db_session: Session,
+    resource_type: str,
+    resource_id: int,
+    audience: Iterable[int],
+    task_id: Optional[int] = None,
+) -> None:
+    """Leave a tombstone for each user who should drop the resource."""
+    db_session.add_all(
+        db_models.SyncTombstone(
+            user_id=user_id,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            task_id=task_id,
+        )
+        for user_id in audience
+    )
+
+
+def clear_task_tombstone(db_session: Session, task_id: int, user_id: int) -> None:
+    """Forget an unshare tombstone once the task is shared with the user again."""
+    db_session.query(db_models.SyncTombstone).filter(
+        db_models.SyncTombstone.user_id == user_id,
+        db_models.SyncTombstone.resource_type == "task",
+        db_models.SyncTombstone.resource_id == task_id,
+    ).delete(synchronize_session=False)
+
+
+def _changed(column, since: Optional[int]):
+    return column >= since if since is not None else true()
+
+
+def _task_changes(db_session: Session, user_id: int, since: Optional[int]) -> list:
+    owned = db_session.query(db_models.Task).filter(
+        db_models.Task.user_id == user_id,
+        _changed(db_models.Task.change_xid, since),
+    )
+
+    # A newly shared task is new to the sharee even if the task itself is old
+    shared = (
+        db_session.query(db_models.Task)
+        .join(db_models.TaskShare, db_models.TaskShare.task_id == db_models.Task.id)
+        .filter(db_models.TaskShare.shared_with_user_id == user_id)
+    )
+    if since is not None:
+        shared = shared.filter(
+            or_(
+                db_models.Task.change_xid >= since,
+                db_models.TaskShare.change_xid >= since,
+            )
+        )
+
+    return owned.order_by(db_models.Task.id).all() + shared.order_by(
+        db_models.Task.id
+    ).all()
+
+
+def _comment_changes(
+    db_session: Session, user_id: int, since: Optional[int]
+) -> list[dict[str, Any]]:
+    accessible_task_ids = (
+        select(db_models.Task.id)
+        .where(db_models.Task.user_id == user_id)
+        .union(
+            select(db_models.TaskShare.task_id).where(
+                db_models.TaskShare.shared_with_user_id == user_id
+            )
+        )
+    )
+
+    conditions = [_changed(db_models.TaskComment.change_xid, since)]
+    if since is not None:
+        newly_shared_task_ids = select(db_models.TaskShare.task_id).where(
+            db_models.TaskShare.shared_with_user_id == user_id,
+            db_models.TaskShare.change_xid >= since,
+        )
+        conditions.append(db_models.TaskComment.task_id.in_(newly_shared_task_ids))
+
+    comments = (
+        db_session.query(db_models.TaskComment)
+        .options(joinedload(db_models.TaskComment.user))
+        .filter(
+            db_models.TaskComment.task_id.in_(accessible_task_ids),
+            or_(*conditions),
+        )
+        .order_by(db_models.TaskComment.id)
+        .all()
+    )
+
+    return [
+        {
+            "id": c.id,
+            "task_id": c.task_id,
+            "user_id": c.user_id,
+            "content": c.content,
+            "created_at": c.created_at,
+            "updated_at": c.updated_at,
+            "username": c.user.username if c.user else None,
+        }
+        for c in comments
+    ]
+
+
+def _share_changes(db_session: Session, user_id: int, since: Optional[int]) -> list:
+    # Shares of my own tasks, and my own shares of other people's tasks
+    owned = (
+        db_session.query(db_models.TaskShare)
+        .join(db_models.Task, db_models.Task.id == db_models.TaskShare.task_id)
+        .filter(
+            db_models.Task.user_id == user_id,
+            _changed(db_models.TaskShare.change_xid, since),
+        )
+    )
+    received = db_session.query(db_models.TaskShare).filter(
+        db_models.TaskShare.shared_with_user_id == user_id,
+        _changed(db_models.TaskShare.change_xid, since),
+    )
+
+    return owned.order_by(db_models.TaskShare.id).all() + received.order_by(
+        db_models.TaskShare.id
+    ).all()
+
+
+def sync_changes(
+    db_session: Session, user_id: int, since: Optional[int] = None
+) -> dict[str, Any]:
+    """
+    Everything visible to the user that changed since the token, or a full
+    snapshot without one. The returned token is passed as since next time.
+    """
+    # Taken first: any write the queries below miss has an xid at or above it
+    token = current_token(db_session)
+
+    deleted = []
+    if since is not None:
+        deleted = (
+            db_session.query(db_models.SyncTombstone)
+            .filter(
+                db_models.SyncTombstone.user_id == user_id,
+                db_models.SyncTombstone.change_xid >= since,
+            )
+            .order_by(db_models.SyncTombstone.id)
+            .all()
+        )
+
+    return {
+        "token": token,
+        "tasks": _task_changes(db_session, user_id, since),
+        "comments": _comment_changes(db_session, user_id, since),
+        "shares": _share_changes(db_session, user_id, since),
+        "deleted": deleted,
+    }
@@ -0,0 +1,180 @@
+"""
+Task listings: the filters shared by GET /tasks and GET /tasks/visible, and
+the "tasks I can see" query behind /tasks/visible and /tasks/shared-with-me.
+
+A user sees the tasks they own and the tasks shared with them. The listing is
+one UNION ALL of two branches, owned (tasks by user_id) and shared
+(task_shares by shared_with_user_id, joined to tasks). Each branch applies
+the filters and the keyset condition, sorts by (created_at, id) newest first
+and stops at limit + 1 rows, so neither branch reads past the requested page.
+The outer query merges the two short lists and loads the page's Task rows.
+
+Pages are resumed with core.pagination cursors, never OFFSET.
+"""
+
+from datetime import date, datetime
+from typing import Any, Literal, Optional
+
+from sqlalchemy import literal, select, tuple_, union_all
+from sqlalchemy.orm import Query, Session, selectinload
+
+import db_models
+from core.pagination import decode_cursor, encode_cursor
+
+Scope = Literal["owned", "shared", "all"]
+
+# Permission reported for the caller's own tasks
+OWNER_PERMISSION = "owner"
+
+
+def apply_task_filters(
+    query: Query,
+    *,
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    tags: Optional[str] = None,
+    overdue: Optional[bool] = None,
+    search: Optional[str] = None,
+    created_after: Optional[date] = None,
+    created_before: Optional[date] = None,
+    due_after: Optional[date] = None,
+    due_before: Optional[date] = None,
+) -> Query:
+    """Apply the GET /tasks filters to a query that selects from tasks."""
+    # Completion and priority filters
+    if completed is not None:
+        query = query.filter(db_models.Task.completed == completed)
+
+    if priority is not None:
+        query = query.filter(db_models.Task.priority == priority)
+
+    # Tag filter
+    if tags:
+        # Split by comma, then strip whitespace
+        tag_list = [tag.strip() for tag in tags.split(",")]
+        # Filter out empty strings
+        tag_list = [t for t in tag_list if t]
+        query = query.filter(db_models.Task.tags.contains(tag_list))
+
+    # Title and description filters
+    if search:
+        search_pattern = f"%{search.lower()}%"
+        query = query.filter(
+            (db_models.Task.title.ilike(search_pattern))
+            | (db_models.Task.description.ilike(search_pattern))
+        )
+
+    # Date filters
+    if created_after:
+        query = query.filter(db_models.Task.created_at >= created_after)
+
+    if created_before:
+        query = query.filter(db_models.Task.created_at <= created_before)
+
+    if due_after:
+        query = query.filter(db_models.Task.due_date >= due_after)
+
+    if due_before:
+        query = query.filter(db_models.Task.due_date <= due_before)
+
+    # Overdue filter
+    if overdue:
+        query = query.filter(
+            db_models.Task.due_date.isnot(None),
+            db_models.Task.completed.is_(False),
+            db_models.Task.due_date < date.today(),
+        )
+
+    return query
+
+
+def _branch(
+    query: Query,
+    limit: int,
+    after: Optional[tuple[datetime, int]],
+    filters: dict[str, Any],
+):
+    """One side of the union: filtered, resumed after the cursor, limit + 1 rows."""
+    query = apply_task_filters(query, **filters)
+    if after:
+        query = query.filter(
+            tuple_(db_models.Task.created_at, db_models.Task.id) < tuple_(*after)
+        )
+    query = query.order_by(
+        db_models.Task.created_at.desc(), db_models.Task.id.desc()
+    ).limit(limit + 1)
+    return select(query.subquery())
+
+
+def visible_tasks_page(
+    db_session: Session,
+    user_id: int,
+    scope: Scope = "all",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    **filters: Any,
+) -> dict[str, Any]:
+    """
+    One page of the tasks user_id can see, newest first.
+
+    Returns {"items": [...], "next_cursor": str | None}; each item is the
+    SharedTaskResponse shape, with permission "owner" for owned tasks.
+    Raises 400 (from decode_cursor) for a malformed cursor.
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    branches = []
+    if scope in ("owned", "all"):
+        owned = db_session.query(
+            db_models.Task.id.label("task_id"),
+            db_models.Task.created_at.label("created_at"),
+            literal(OWNER_PERMISSION).label("permission"),
+        ).filter(db_models.Task.user_id == user_id)
+        branches.append(_branch(owned, limit, after, filters))
+
+    if scope in ("shared", "all"):
+        shared = (
+            db_session.query(
+                db_models.Task.id.label("task_id"),
+                db_models.Task.created_at.label("created_at"),
+                db_models.TaskShare.permission.label("permission"),
+            )
+            .join(db_models.TaskShare, db_models.TaskShare.task_id == db_models.Task.id)
+            .filter(db_models.TaskShare.shared_with_user_id == user_id)
+        )
+        branches.append(_branch(shared, limit, after, filters))
+
+    visible = union_all(*branches).subquery("visible")
+
+    rows = (
+        db_session.query(db_models.Task, visible.c.permission)
+        .join(visible, db_models.Task.id == visible.c.task_id)
+        .options(
+            selectinload(db_models.Task.owner),
+            selectinload(db_models.Task.shares),
+        )
+        .order_by(visible.c.created_at.desc(), visible.c.task_id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last_task = rows[-1][0]
+        next_cursor = encode_cursor(last_task.created_at, last_task.id)  # type: ignore
+
+    return {
+        "items": [
+            {
+                "task": task,
+                "permission": permission,
+                "is_owner": permission == OWNER_PERMISSION,
+                "owner_username": task.owner.username,
+            }
+            for task, permission in rows
+        ],
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,433 @@
+"""
+Bulk export and import of a user's data (GET /tasks/export, POST /tasks/import).
+
+Export streams one resource (the user's tasks, the comments on them, or the
+user's activity) as CSV, JSONL or Parquet. Rows come from a server-side
+cursor (Query.yield_per) and are encoded TRANSFER_BATCH_SIZE at a time, so
+memory stays flat however many rows there are. Parquet writes one row group
+per batch; pyarrow is imported only when Parquet is asked for.
+
+Import reads tasks in any of the three formats (an export's extra columns
+such as id or created_at are ignored), validates every row against
+TaskCreate and loads the valid ones with COPY, one batch per savepoint. A
+row that fails validation, sets a field import can't honour (recurrence_rule,
+parent_id), or is in a batch the database rejects, is reported by row number
+and the rest of the file still loads.
+
+COPY bypasses the ORM, so the session hooks that react to task writes never
+see imported rows. http_cache.mark_user_changed() stands in for the cache
+and ETag invalidation; imports don't log per-task activity or live events.
+"""
+
+import csv
+import io
+import itertools
+import logging
+from datetime import date, datetime
+from typing import IO, Any, Iterable, Iterator, Literal
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+import db_models
+from core.settings import settings
+from schemas.task import TaskCreate
+from services import http_cache
+
+logger = logging.getLogger(__name__)
+
+Format = Literal["csv", "jsonl", "parquet"]
+Resource = Literal["tasks", "comments", "activity"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Errors listed in an import result; the failed count covers every row
+MAX_REPORTED_ERRORS = 100
+
+# (column, kind) per resource. Kinds decide the CSV encoding and Parquet type;
+# "list" and "json" values are JSON-encoded in CSV, "json" also in Parquet.
+COLUMNS: dict[str, list[tuple[str, str]]] = {
+    "tasks": [
+        ("id", "int"),
+        ("title", "str"),
+        ("description", "str"),
+        ("completed", "bool"),
+        ("priority", "str"),
+        ("due_date", "date"),
+        ("tags", "list"),
+        ("notes", "str"),
+        ("created_at", "datetime"),
+        ("updated_at", "datetime"),
+    ],
+    "comments": [
+        ("id", "int"),
+        ("task_id", "int"),
+        ("user_id", "int"),
+        ("content", "str"),
+        ("created_at", "datetime"),
+        ("updated_at", "datetime"),
+    ],
+    "activity": [
+        ("id", "int"),
+        ("action", "str"),
+        ("resource_type", "str"),
+        ("resource_id", "int"),
+        ("task_id", "int"),
+        ("details", "json"),
+        ("created_at", "datetime"),
+    ],
+}
+
+# Columns COPY writes; everything else takes its server default
+IMPORT_COLUMNS = ["title", "description", "completed", "priority", "due_date", "tags"]
+
+# TaskCreate fields that need the services COPY bypasses (recurrence
+# scheduling, subtask paths and rollups); rows setting them are rejected
+# rather than loaded as plain tasks
+UNSUPPORTED_FIELDS = ("recurrence_rule", "parent_id")
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# --- Export ---
+
+
+def _export_query(db_session: Session, user_id: int, resource: str):
+    if resource == "tasks":
+        model = db_models.Task
+        query = db_session.query(
+            *(getattr(model, name) for name, _ in COLUMNS["tasks"])
+        ).filter(model.user_id == user_id)
+        return query.order_by(model.id)
+
+    if resource == "comments":
+        comment = db_models.TaskComment
+        query = (
+            db_session.query(*(getattr(comment, name) for name, _ in COLUMNS["comments"]))
+            .join(db_models.Task, db_models.Task.id == comment.task_id)
+            .filter(db_models.Task.user_id == user_id)
+        )
+        return query.order_by(comment.id)
+
+    log = db_models.ActivityLog
+    query = db_session.query(
+        *(getattr(log, name) for name, _ in COLUMNS["activity"])
+    ).filter(log.user_id == user_id)
+    return query.order_by(log.created_at, log.id)
+
+
+def _batches(db_session: Session, user_id: int, resource: str) -> Iterator[list[dict]]:
+    """The resource's rows as dicts, one batch at a time from a server-side cursor."""
+    size = settings.TRANSFER_BATCH_SIZE
+    rows = _export_query(db_session, user_id, resource).yield_per(size)
+    for batch in itertools.batched(rows, size):
+        yield [row._asdict() for row in batch]
+
+
+def _csv_value(value: Any, kind: str) -> Any:
+    if value is None:
+        return ""
+    if kind in ("list", "json"):
+        return orjson.dumps(value).decode()
+    if kind == "bool":
+        return "true" if value else "false"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(
+    batches: Iterable[list[dict]], columns: list[tuple[str, str]]
+) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for batch in batches:
+        for row in batch:
+            writer.writerow([_csv_value(row[name], kind) for name, kind in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header only, for an empty export
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _jsonl_chunks(batches: Iterable[list[dict]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in batch)
+
+
+class _DrainableSink(io.RawIOBase):
+    """
+    Write-only file for ParquetWriter whose bytes can be taken out as they come.
+    tell() keeps counting from the start of the file, as the footer's offsets need.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_chunks(
+    batches: Iterable[list[dict]], columns: list[tuple[str, str]]
+) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow package is required. Install with: pip install pyarrow")
+
+    types = {
+        "int": pa.int64(),
+        "str": pa.string(),
+        "bool": pa.bool_(),
+        "date": pa.date32(),
+        "datetime": pa.timestamp("us", tz="UTC"),
+        "list": pa.list_(pa.string()),
+        "json": pa.string(),
+    }
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    json_columns = [name for name, kind in columns if kind == "json"]
+
+    sink = _DrainableSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        for batch in batches:
+            for row in batch:
+                for name in json_columns:
+                    if row[name] is not None:
+                        row[name] = orjson.dumps(row[name]).decode()
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    # Footer
+    yield sink.drain()
+
+
+def export_chunks(
+    db_session: Session, user_id: int, resource: Resource, format: Format
+) -> Iterator[bytes]:
+    """Encoded export of one resource, for a StreamingResponse."""
+    columns = COLUMNS[resource]
+    batches = _batches(db_session, user_id, resource)
+    logger.info(f"Exporting {resource} as {format} for user_id={user_id}")
+
+    if format == "csv":
+        return _csv_chunks(batches, columns)
+    if format == "jsonl":
+        return _jsonl_chunks(batches)
+    return _parquet_chunks(batches, columns)
+
+
+# --- Import ---
+
+
+def _csv_rows(file: IO[bytes]) -> Iterator[Any]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    for row in csv.DictReader(text):
+        # Empty cells mean "not set", so the TaskCreate defaults apply
+        values: dict[str, Any] = {k: v for k, v in row.items() if k and v != ""}
+        tags = values.get("tags")
+        if isinstance(tags, str):
+            # Exports write a JSON array; hand-made files may use "a,b"
+            if tags.startswith("["):
+                try:
+                    values["tags"] = orjson.loads(tags)
+                except orjson.JSONDecodeError as e:
+                    yield ValueError(f"tags: {e}")
+                    continue
+            else:
+                values["tags"] = [tag.strip() for tag in tags.split(",") if tag.strip()]
+        yield values
+
+
+def _jsonl_rows(file: IO[bytes]) -> Iterator[Any]:
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+
+
+def _parquet_rows(file: IO[bytes]) -> Iterator[dict[str, Any]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow package is required. Install with: pip install pyarrow")
+
+    parquet_file = pq.ParquetFile(file)
+    for batch in parquet_file.iter_batches(batch_size=settings.TRANSFER_BATCH_SIZE):
+        yield from batch.to_pylist()
+
+
+def _parse_rows(file: IO[bytes], format: Format) -> Iterator[Any]:
+    if format == "csv":
+        return _csv_rows(file)
+    if format == "jsonl":
+        return _jsonl_rows(file)
+    return _parquet_rows(file)
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def _array_literal(values: list[str]) -> str:
+    """A Postgres text[] literal; COPY's CSV quoting is applied on top."""
+    quoted = (
+        '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values
+    )
+    return "{" + ",".join(quoted) + "}"
+
+
+def _copy_batch(db_session: Session, user_id: int, tasks: list[TaskCreate]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for task in tasks:
+        writer.writerow(
+            [
+                task.title,
+                task.description,
+                "true" if task.completed else "false",
+                task.priority,
+                task.due_date.isoformat() if task.due_date else None,
+                _array_literal(task.tags),
+                user_id,
+            ]
+        )
+    buffer.seek(0)
+
+    columns = ", ".join([*IMPORT_COLUMNS, "user_id"])
+    table = db_models.Task.__table__.fullname  # type: ignore[attr-defined]
+    cursor = db_session.connection().connection.cursor()
+    try:
+        # Unquoted empty fields are NULL
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _load_batch(
+    db_session: Session,
+    user_id: int,
+    batch: list[tuple[int, TaskCreate]],
+    result: dict[str, Any],
+) -> None:
+    savepoint = db_session.begin_nested()
+    try:
+        _copy_batch(db_session, user_id, [task for _, task in batch])
+    except Exception as e:
+        savepoint.rollback()
+        first, last = batch[0][0], batch[-1][0]
+        logger.warning(f"Import batch rows {first}-{last} rejected for user_id={user_id}: {e}")
+        _record_error(result, first, f"Rows {first}-{last} rejected by the database: {e}")
+        result["failed"] += len(batch)
+        return
+
+    savepoint.commit()
+    result["imported"] += len(batch)
+
+
+def _record_error(result: dict[str, Any], row: int, error: str) -> None:
+    if len(result["errors"]) < MAX_REPORTED_ERRORS:
+        result["errors"].append({"row": row, "error": error})
+
+
+def import_tasks(
+    db_session: Session, user_id: int, file: IO[bytes], format: Format
+) -> dict[str, Any]:
+    """
+    Load tasks from an uploaded file for user_id. Does not commit.
+
+    Returns {"imported", "failed", "errors": [{"row", "error"}]}; rows are
+    numbered from 1, not counting a CSV header.
+    """
+    result: dict[str, Any] = {"imported": 0, "failed": 0, "errors": []}
+    batch: list[tuple[int, TaskCreate]] = []
+
+    # Parsers yield a ValueError for a row they can't read and carry on; one
+    # raised means the rest of the file can't be read (encoding, broken Parquet)
+    rows = _parse_rows(file, format)
+    row_number = 0
+    while True:
+        try:
+            values = next(rows)
+        except StopIteration:
+            break
+        except (ValueError, csv.Error) as e:
+            _record_error(result, row_number + 1, f"Unreadable {format} input: {e}")
+            break
+        row_number += 1
+
+        if isinstance(values, ValueError):
+            result["failed"] += 1
+            _record_error(result, row_number, str(values))
+            continue
+
+        try:
+            task = TaskCreate.model_validate(values)
+        except ValidationError as e:
+            result["failed"] += 1
+            _record_error(result, row_number, _describe(e))
+            continue
+
+        unsupported = [name for name in UNSUPPORTED_FIELDS if getattr(task, name) is not None]
+        if unsupported:
+            result["failed"] += 1
+            _record_error(
+                result,
+                row_number,
+                f"{', '.join(unsupported)}: not supported by import, use POST /tasks",
+            )
+            continue
+
+        batch.append((row_number, task))
+
+        if len(batch) >= settings.TRANSFER_BATCH_SIZE:
+            _load_batch(db_session, user_id, batch, result)
+            batch = []
+
+    if batch:
+        _load_batch(db_session, user_id, batch, result)
+
+    if result["imported"]:
+        http_cache.mark_user_changed(db_session, user_id)
+
+    logger.info(
+        f"Imported {result['imported']} tasks for user_id={user_id} "
+        f"({result['failed']} failed)"
+    )
+    return result
@@ -0,0 +1,127 @@
+"""
+Per-user access token versions, used to revoke issued JWTs.
+
+Every access token carries the user's users.token_version as its "ver"
+claim. revoke_tokens() bumps the column (password change, password reset);
+tokens minted before that no longer match and are rejected.
+
+get_current_user compares the claim with the row it loads anyway. The
+zero-query get_current_user_id path compares it with a copy in Redis
+(token_version:user_{id}), re-read from the database on a miss. The copy may
+only lag behind the column by a miss, never by an older value:
+
+- Writes are a max-set (MAX_SET_LUA): a login or cache fill that read version
+  N before a bump can't overwrite the N+1 the bump stored.
+- revoke_tokens() deletes the copy, and the bump's after-commit write stores
+  the new version; if that write fails, the copy is deleted again.
+"""
+
+import logging
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import db_models
+from core.redis_config import redis_client
+from core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Session.info key holding {user_id: new version} to publish after commit
+PENDING_KEY = "pending_token_versions"
+
+
+# KEYS[1] cached version; ARGV: version, TTL in seconds.
+# Stores the version unless the cached one is already as new. Returns 1 if stored.
+MAX_SET_LUA = """
+local cached = tonumber(redis.call('GET', KEYS[1]))
+if cached and cached >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+_max_set = redis_client.register_script(MAX_SET_LUA)
+
+
+def _cache_key(user_id: int) -> str:
+    return f"token_version:user_{user_id}"
+
+
+def forget_token_version(user_id: int) -> None:
+    """Drop the cached version, so the fast path reads the column."""
+    if not redis_client:
+        return
+
+    try:
+        redis_client.delete(_cache_key(user_id))
+    except Exception as e:
+        logger.error(f"Token version cache delete failed for user_id={user_id}: {e}")
+
+
+def cache_token_version(user_id: int, version: int) -> bool:
+    """
+    Store a committed version in Redis for the fast path, unless a newer one
+    is already there. Returns False if Redis couldn't be written.
+    """
+    if not redis_client:
+        return False
+
+    try:
+        # Nothing older than a token's lifetime needs the entry
+        _max_set(
+            keys=[_cache_key(user_id)],
+            args=[version, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60],
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Token version cache write failed for user_id={user_id}: {e}")
+        return False
+
+
+def current_token_version(user_id: int, db_session: Session) -> Optional[int]:
+    """The user's token version (Redis, else database). None if no such user."""
+    if redis_client:
+        try:
+            cached = redis_client.get(_cache_key(user_id))
+            if cached is not None:
+                return int(cached)  # type: ignore
+        except Exception as e:
+            logger.error(f"Token version cache read failed for user_id={user_id}: {e}")
+
+    row = (
+        db_session.query(db_models.User.token_version)
+        .filter(db_models.User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+
+    cache_token_version(user_id, row.token_version)
+    return row.token_version
+
+
+def revoke_tokens(db_session: Session, user: db_models.User) -> None:
+    """
+    Invalidate every access token issued to user so far.
+    Does not commit; Redis is updated once the caller commits.
+    """
+    user.token_version = (user.token_version or 0) + 1  # type: ignore
+    db_session.info.setdefault(PENDING_KEY, {})[user.id] = user.token_version
+    forget_token_version(user.id)  # type: ignore
+    logger.info(f"Access tokens revoked for user_id={user.id}")
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending_versions(session: Session) -> None:
+    for user_id, version in session.info.pop(PENDING_KEY, {}).items():
+        if not cache_token_version(user_id, version):
+            # An entry left by a read before the bump would still match old tokens
+            forget_token_version(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_versions(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
@@ -22,6 +22,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 import db_models
+from core.redis_config import local_cache
 from db_config import Base, get_db
 from main import app
 
@@ -98,6 +99,8 @@ def db_session(prepare_test_database):
     session = TestSessionLocal()
 
     redis_client.flushdb()
+    # The L1 tier lives in this process and outlives the flush
+    local_cache.clear()
 
     try:
         yield session
@@ -27,7 +27,7 @@ def test_activity_log_created_on_task_creation(authenticated_client):
     activity_response = authenticated_client.get("/activity")
     assert activity_response.status_code == 200
 
-    logs = activity_response.json()
+    logs = activity_response.json()["items"]
     # Should have exactly one log (the task creation)
     assert len(logs) == 1
 
@@ -61,7 +61,7 @@ def test_activity_log_tracks_updates_with_old_new_values(authenticated_client):
     # Get activity logs
     activity_response = authenticated_client.get("/activity?action=updated")
 
-    logs = activity_response.json()
+    logs = activity_response.json()["items"]
     assert len(logs) == 1
 
     log = logs[0]
@@ -96,7 +96,7 @@ def test_activity_log_captures_data_before_deletion(authenticated_client):
     # Get activity logs
     activity_response = authenticated_client.get("/activity?action=deleted")
 
-    logs = activity_response.json()
+    logs = activity_response.json()["items"]
     assert len(logs) == 1
 
     log = logs[0]
@@ -136,7 +136,7 @@ def test_activity_log_tracks_sharing(client, create_user_and_token):
         "/activity?action=shared", headers={"Authorization": f"Bearer {alice_token}"}
     )
 
-    logs = activity_response.json()
+    logs = activity_response.json()["items"]
     assert len(logs) == 1
 
     log = logs[0]
@@ -165,17 +165,17 @@ def test_activity_filtering_by_resource_type(authenticated_client):
 
     # Get all activity (should have 2: task + comment)
     all_activity = authenticated_client.get("/activity")
-    assert len(all_activity.json()) == 2
+    assert len(all_activity.json()["items"]) == 2
 
     # Filter for tasks only
     task_activity = authenticated_client.get("/activity?resource_type=task")
-    task_logs = task_activity.json()
+    task_logs = task_activity.json()["items"]
     assert len(task_logs) == 1
     assert task_logs[0]["resource_type"] == "task"
 
     # Filter for comments only
     comment_activity = authenticated_client.get("/activity?resource_type=comment")
-    comment_logs = comment_activity.json()
+    comment_logs = comment_activity.json()["items"]
     assert len(comment_logs) == 1
     assert comment_logs[0]["resource_type"] == "comment"
 
@@ -191,15 +191,15 @@ def test_activity_pagination(authenticated_client):
 
     # Get first page (limit 10)
     page1 = authenticated_client.get("/activity?limit=10&offset=0")
-    assert len(page1.json()) == 10
+    assert len(page1.json()["items"]) == 10
 
     # Get second page
     page2 = authenticated_client.get("/activity?limit=10&offset=10")
-    assert len(page2.json()) == 5  # Remaining 5
+    assert len(page2.json()["items"]) == 5  # Remaining 5
 
     # Verify no overlap between pages
-    page1_ids = {log["id"] for log in page1.json()}
-    page2_ids = {log["id"] for log in page2.json()}
+    page1_ids = {log["id"] for log in page1.json()["items"]}
+    page2_ids = {log["id"] for log in page2.json()["items"]}
     assert len(page1_ids & page2_ids) == 0  # No intersection
 
 
@@ -226,7 +226,7 @@ def test_users_only_see_their_own_activity(client, create_user_and_token):
     bob_activity = client.get(
         "/activity", headers={"Authorization": f"Bearer {bob_token}"}
     )
-    bob_logs = bob_activity.json()
+    bob_logs = bob_activity.json()["items"]
 
     # Bob should only see his own activity
     assert len(bob_logs) == 1
@@ -256,7 +256,7 @@ def test_task_timeline_shows_complete_history(authenticated_client):
     # Get task timeline
     timeline_response = authenticated_client.get(f"/activity/tasks/{task_id}")
 
-    timeline = timeline_response.json()
+    timeline = timeline_response.json()["items"]
     # Should have 3 logs: create + 2 updates
     assert len(timeline) == 3
 
@@ -304,7 +304,7 @@ def test_task_timeline_requires_permission(client, create_user_and_token):
     assert bob_timeline.status_code == 200
 
     # Bob sees activity from both users (Alice created, Alice shared)
-    timeline = bob_timeline.json()
+    timeline = bob_timeline.json()["items"]
     assert len(timeline) >= 2  # At least creation + sharing
 
 
@@ -339,6 +339,24 @@ def test_activity_stats(authenticated_client):
     assert stats["by_resource"]["task"] == 4
 
 
+def test_activity_stats_cache_invalidated_by_new_activity(authenticated_client):
+    """Cached stats are dropped as soon as the user's next action commits"""
+    authenticated_client.post("/tasks", json={"title": "First", "priority": "low"})
+
+    first = authenticated_client.get("/activity/stats").json()
+    assert first["total_activities"] == 1
+
+    # Served from cache until something changes
+    assert authenticated_client.get("/activity/stats").json() == first
+
+    authenticated_client.post("/tasks", json={"title": "Second", "priority": "low"})
+
+    second = authenticated_client.get("/activity/stats").json()
+    assert second["total_activities"] == 2
+    assert second["by_action"] == {"created": 2}
+    assert second["by_resource"] == {"task": 2}
+
+
 def test_shared_task_activity_visible_to_collaborator(client, create_user_and_token):
     """Test that collaborators see activity on tasks shared with them"""
     alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
@@ -370,7 +388,7 @@ def test_shared_task_activity_visible_to_collaborator(client, create_user_and_to
     bob_activity = client.get(
         "/activity", headers={"Authorization": f"Bearer {bob_token}"}
     )
-    bob_logs = bob_activity.json()
+    bob_logs = bob_activity.json()["items"]
 
     # Bob should see Alice's create, share, and update actions on the shared task
     alice_logs = [log for log in bob_logs if log["username"] == "alice"]
@@ -413,7 +431,7 @@ def test_unshared_task_activity_not_visible(client, create_user_and_token):
     bob_activity = client.get(
         "/activity", headers={"Authorization": f"Bearer {bob_token}"}
     )
-    bob_logs = bob_activity.json()
+    bob_logs = bob_activity.json()["items"]
 
     alice_task_logs = [
         log for log in bob_logs
@@ -454,9 +472,127 @@ def test_shared_task_comment_activity_visible(client, create_user_and_token):
         "/activity?resource_type=comment",
         headers={"Authorization": f"Bearer {bob_token}"},
     )
-    bob_logs = bob_activity.json()
+    bob_logs = bob_activity.json()["items"]
 
     alice_comment_logs = [log for log in bob_logs if log["username"] == "alice"]
     assert len(alice_comment_logs) == 1
     assert alice_comment_logs[0]["action"] == "created"
     assert alice_comment_logs[0]["resource_type"] == "comment"
+
+
+def test_activity_entries_carry_task_id(authenticated_client):
+    """Task and comment activity is stamped with the owning task's id"""
+    create_response = authenticated_client.post(
+        "/tasks", json={"title": "With comments", "priority": "low"}
+    )
+    task_id = create_response.json()["id"]
+
+    comment_response = authenticated_client.post(
+        f"/tasks/{task_id}/comments", json={"content": "First!"}
+    )
+    assert comment_response.status_code == 201
+
+    response = authenticated_client.get(f"/activity/tasks/{task_id}")
+    timeline = response.json()["items"]
+    assert [log["resource_type"] for log in timeline] == ["task", "comment"]
+    assert all(log["task_id"] == task_id for log in timeline)
+
+
+def test_feed_backfilled_on_share_and_revoked_on_unshare(client, create_user_and_token):
+    """History from before a share appears in the feed, and leaves on unshare"""
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    bob_token = create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    bob = {"Authorization": f"Bearer {bob_token}"}
+
+    task_id = client.post(
+        "/tasks", json={"title": "Later shared", "priority": "low"}, headers=alice
+    ).json()["id"]
+    client.post(f"/tasks/{task_id}/comments", json={"content": "Early"}, headers=alice)
+
+    client.post(
+        f"/tasks/{task_id}/share",
+        json={"shared_with_username": "bob", "permission": "edit"},
+        headers=alice,
+    )
+    client.post(f"/tasks/{task_id}/comments", json={"content": "Bob here"}, headers=bob)
+
+    bob_logs = client.get("/activity", headers=bob).json()["items"]
+    seen = {(log["username"], log["resource_type"], log["action"]) for log in bob_logs}
+    assert ("alice", "comment", "created") in seen
+    assert ("alice", "task", "shared") in seen
+    assert ("bob", "comment", "created") in seen
+    # Task creation stays private to the owner
+    assert ("alice", "task", "created") not in seen
+
+    client.delete(f"/tasks/{task_id}/share/bob", headers=alice)
+
+    bob_logs = client.get("/activity", headers=bob).json()["items"]
+    assert [log["username"] for log in bob_logs] == ["bob"]
+
+
+def test_feed_revoked_when_task_deleted(client, create_user_and_token):
+    """Collaborators stop seeing a deleted task's activity"""
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    bob_token = create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    bob = {"Authorization": f"Bearer {bob_token}"}
+
+    task_id = client.post(
+        "/tasks", json={"title": "Short lived", "priority": "low"}, headers=alice
+    ).json()["id"]
+    client.post(
+        f"/tasks/{task_id}/share",
+        json={"shared_with_username": "bob", "permission": "view"},
+        headers=alice,
+    )
+    assert len(client.get("/activity", headers=bob).json()["items"]) == 1
+
+    client.delete(f"/tasks/{task_id}", headers=alice)
+
+    assert client.get("/activity", headers=bob).json()["items"] == []
+    alice_logs = client.get("/activity", headers=alice).json()["items"]
+    alice_actions = [log["action"] for log in alice_logs]
+    assert alice_actions == ["deleted", "shared", "created"]
+
+
+def test_activity_cursor_pagination(authenticated_client):
+    """Following next_cursor walks the feed without gaps or repeats"""
+    for i in range(5):
+        authenticated_client.post("/tasks", json={"title": f"Task {i}", "priority": "low"})
+
+    seen = []
+    params: dict = {"limit": 2}
+    while True:
+        page = authenticated_client.get("/activity", params=params).json()
+        seen.extend(log["id"] for log in page["items"])
+        if page["next_cursor"] is None:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_task_timeline_cursor_pagination(authenticated_client):
+    """Timeline pages oldest-first and reports when it is exhausted"""
+    task_id = authenticated_client.post(
+        "/tasks", json={"title": "Busy task", "priority": "low"}
+    ).json()["id"]
+    for i in range(4):
+        authenticated_client.post(f"/tasks/{task_id}/comments", json={"content": f"#{i}"})
+
+    first = authenticated_client.get(f"/activity/tasks/{task_id}?limit=3").json()
+    assert [log["resource_type"] for log in first["items"]] == ["task", "comment", "comment"]
+    assert first["next_cursor"] is not None
+
+    second = authenticated_client.get(
+        f"/activity/tasks/{task_id}",
+        params={"limit": 3, "cursor": first["next_cursor"]},
+    ).json()
+    assert len(second["items"]) == 2
+    assert second["next_cursor"] is None
+
+    bad = authenticated_client.get(f"/activity/tasks/{task_id}?cursor=not-a-cursor")
+    assert bad.status_code == 400
@@ -0,0 +1,111 @@
+import gzip
+import json
+from datetime import date, datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import text
+
+import db_models
+from services import activity_partitions
+
+
+def _log_at(db_session, user_id: int, created_at: datetime) -> None:
+    db_session.add(
+        db_models.ActivityLog(
+            user_id=user_id,
+            action="created",
+            resource_type="task",
+            resource_id=1,
+            details={"title": "Old task"},
+            created_at=created_at,
+        )
+    )
+    db_session.commit()
+
+
+def test_future_partitions_created(db_session):
+    """Maintenance creates this month's partition and the configured months ahead"""
+    with patch.object(activity_partitions.settings, "ACTIVITY_PARTITION_MONTHS_AHEAD", 2):
+        activity_partitions.ensure_future_partitions(db_session, today=date(2031, 11, 15))
+
+    partitions = activity_partitions.list_partitions(db_session)
+    assert partitions["activity_logs_p203111"] == date(2031, 11, 1)
+    assert partitions["activity_logs_p203112"] == date(2031, 12, 1)
+    assert partitions["activity_logs_p203201"] == date(2032, 1, 1)
+
+    # Running again is a no-op
+    with patch.object(activity_partitions.settings, "ACTIVITY_PARTITION_MONTHS_AHEAD", 2):
+        assert activity_partitions.ensure_future_partitions(
+            db_session, today=date(2031, 11, 15)
+        ) == []
+
+
+def test_partition_takes_over_rows_from_default(authenticated_client, db_session):
+    """Rows that landed in DEFAULT move into their month's new partition"""
+    user = db_session.query(db_models.User).filter_by(username="testuser").first()
+    _log_at(db_session, user.id, datetime(2033, 5, 20, tzinfo=timezone.utc))
+
+    assert activity_partitions.create_partition(db_session, date(2033, 5, 1))
+
+    counts = db_session.execute(
+        text(
+            "SELECT pg_class.relname, count(*) FROM faros.activity_logs "
+            "JOIN pg_class ON pg_class.oid = activity_logs.tableoid "
+            "WHERE created_at >= '2033-05-01' GROUP BY 1"
+        )
+    ).all()
+    assert counts == [("activity_logs_p203305", 1)]
+
+
+def test_retention_archives_and_drops_old_partitions(authenticated_client, db_session):
+    """Expired partitions are archived through storage, then dropped"""
+    user = db_session.query(db_models.User).filter_by(username="testuser").first()
+    activity_partitions.create_partition(db_session, date(2019, 3, 1))
+    _log_at(db_session, user.id, datetime(2019, 3, 10, tzinfo=timezone.utc))
+
+    uploaded = {}
+
+    def upload_fileobj(stored_filename, fileobj, content_type):
+        uploaded.update(name=stored_filename, content=fileobj.read(), type=content_type)
+
+    mock_storage = MagicMock()
+    mock_storage.upload_fileobj.side_effect = upload_fileobj
+    with (
+        patch.object(activity_partitions, "storage", mock_storage),
+        patch.object(activity_partitions.settings, "ACTIVITY_RETENTION_MONTHS", 12),
+        patch.object(activity_partitions.settings, "ACTIVITY_RETENTION_ACTION", "archive"),
+    ):
+        removed = activity_partitions.apply_retention(db_session, today=date(2020, 6, 1))
+
+    assert "activity_logs_p201903" in removed
+    assert "activity_logs_p201903" not in activity_partitions.list_partitions(db_session)
+
+    assert uploaded["name"] == "archives/activity_logs/activity_logs_p201903.jsonl.gz"
+    assert uploaded["type"] == "application/gzip"
+    rows = [json.loads(line) for line in gzip.decompress(uploaded["content"]).splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["details"] == {"title": "Old task"}
+
+    remaining = db_session.execute(
+        text("SELECT count(*) FROM faros.activity_logs WHERE created_at < '2020-01-01'")
+    ).scalar()
+    assert remaining == 0
+
+
+def test_task_timeline_date_filters(authenticated_client):
+    """Timeline date filters bound the returned activity"""
+    task = authenticated_client.post(
+        "/tasks", json={"title": "Timeline", "priority": "low"}
+    ).json()
+
+    response = authenticated_client.get(
+        f"/activity/tasks/{task['id']}", params={"start_date": "2000-01-01T00:00:00Z"}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 1
+
+    response = authenticated_client.get(
+        f"/activity/tasks/{task['id']}", params={"end_date": "2000-01-01T00:00:00Z"}
+    )
+    assert response.status_code == 200
+    assert response.json()["items"] == []
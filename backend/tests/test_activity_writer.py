@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import db_models
+from services.activity_writer import ActivityWriter
+
+
+@pytest.fixture
+def memory_writer(db_session):
+    """Swap in an in-memory writer that flushes through the test database."""
+    writer = ActivityWriter(mode="memory", batch_size=100, flush_interval=60)
+    test_sessions = sessionmaker(bind=db_session.get_bind())
+
+    with patch("services.activity_service.activity_writer", writer):
+        with patch("services.activity_writer.SessionLocal", test_sessions):
+            yield writer
+
+
+def test_buffered_entries_written_after_commit(
+    authenticated_client, db_session, memory_writer
+):
+    """Activity is queued on commit and written in one batch on flush"""
+    for i in range(3):
+        response = authenticated_client.post(
+            "/tasks", json={"title": f"Buffered {i}", "priority": "low"}
+        )
+        assert response.status_code == 201
+
+    assert db_session.query(db_models.ActivityLog).count() == 0
+
+    assert memory_writer.flush() == 3
+
+    logs = db_session.query(db_models.ActivityLog).all()
+    assert len(logs) == 3
+    titles = {log.details["title"] for log in logs}
+    assert titles == {"Buffered 0", "Buffered 1", "Buffered 2"}
+
+
+def test_buffered_entries_dropped_on_rollback(db_session, memory_writer):
+    """Entries from a rolled-back transaction never reach the audit trail"""
+    memory_writer.defer(
+        db_session,
+        {
+            "user_id": 1,
+            "action": "created",
+            "resource_type": "task",
+            "resource_id": 1,
+            "details": None,
+        },
+    )
+    db_session.rollback()
+
+    assert memory_writer.flush() == 0
+
+
+def test_stop_flushes_remaining_entries(
+    authenticated_client, db_session, memory_writer
+):
+    """Shutdown drains the buffer"""
+    memory_writer.start()
+    authenticated_client.post("/tasks", json={"title": "Last one", "priority": "low"})
+    memory_writer.stop()
+
+    assert db_session.query(db_models.ActivityLog).count() == 1
+
+
+def _entry(user_id: int) -> dict:
+    return {
+        "user_id": user_id,
+        "action": "created",
+        "resource_type": "task",
+        "resource_id": 1,
+        "details": None,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def test_rejected_entry_is_skipped_not_retried_forever(
+    db_session, test_user, memory_writer
+):
+    """One entry the database refuses doesn't hold back the rest of the batch"""
+    user_id = db_session.query(db_models.User.id).filter_by(username="testuser").scalar()
+    memory_writer.submit([_entry(user_id), _entry(999999), _entry(user_id)])
+
+    assert memory_writer.flush() == 2
+    assert memory_writer.rejected == 1
+    assert memory_writer.flush() == 0
+    assert db_session.query(db_models.ActivityLog).count() == 2
+
+
+def test_buffer_drops_oldest_beyond_bound():
+    writer = ActivityWriter(mode="memory", batch_size=100, flush_interval=60, max_buffered=3)
+
+    writer.submit([_entry(user_id) for user_id in range(5)])
+
+    assert writer.dropped == 2
+    assert [entry["user_id"] for entry in writer._buffer] == [2, 3, 4]
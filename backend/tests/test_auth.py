@@ -5,6 +5,8 @@ import pytest
 from fastapi import status
 
 import db_models
+from core.exceptions import PasswordHashingBusyError
+from core.security import BCRYPT_ROUNDS, PasswordHasher, _hash
 from core.settings import settings
 
 
@@ -220,3 +222,40 @@ def test_password_reset_lifecycle(client, create_user_and_token, mock_ses, db_se
         response.json()["message"]
         == "Password updated successfully. You can now log in with your new password."
     )
+
+
+def test_login_rehashes_password_with_old_rounds(client, db_session, test_user):
+    """A hash made with a different BCRYPT_ROUNDS is replaced on login"""
+    user = (
+        db_session.query(db_models.User)
+        .filter(db_models.User.username == test_user["username"])
+        .first()
+    )
+    user.hashed_password = _hash(test_user["password"], BCRYPT_ROUNDS + 1)
+    db_session.commit()
+
+    response = client.post(
+        "/auth/login",
+        json={"username": test_user["username"], "password": test_user["password"]},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    db_session.refresh(user)
+    assert user.hashed_password.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
+
+
+def test_password_pool_round_trip_and_sheds_when_full():
+    hasher = PasswordHasher(workers=1, queue_limit=0, rounds=4)
+    try:
+        hashed = hasher.hash("secret-password")
+        assert hasher.verify_and_update("secret-password", hashed) == (True, None)
+        assert hasher.verify_and_update("wrong", hashed) == (False, None)
+
+        # Occupy the only slot, as a long-running hash would
+        hasher._slots.acquire()
+        with pytest.raises(PasswordHashingBusyError):
+            hasher.hash("secret-password")
+        assert hasher.shed == 1
+        hasher._slots.release()
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,90 @@
+from core import cache
+
+
+def test_get_or_compute_computes_once():
+    """A second call with the same params and tags is served from Redis"""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    first = cache.get_or_compute("test:once", {"a": 1}, [cache.user_tag(1)], compute)
+    second = cache.get_or_compute("test:once", {"a": 1}, [cache.user_tag(1)], compute)
+
+    assert first == second == {"value": 1}
+    assert len(calls) == 1
+
+
+def test_invalidate_tags_orphans_entries():
+    """Bumping a tag forces a recompute; other tags are untouched"""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    cache.get_or_compute("test:tags", {}, [cache.user_tag(1)], compute)
+    cache.get_or_compute("test:tags", {}, [cache.user_tag(2)], compute)
+
+    cache.invalidate_tags([cache.user_tag(1)])
+
+    assert cache.get_or_compute("test:tags", {}, [cache.user_tag(1)], compute) == 3
+    assert cache.get_or_compute("test:tags", {}, [cache.user_tag(2)], compute) == 2
+
+
+def test_cached_task_list_sees_new_task(authenticated_client):
+    """A write after a cached read is visible on the next read"""
+    authenticated_client.post("/tasks", json={"title": "First", "priority": "low"})
+    assert authenticated_client.get("/tasks").json()["total"] == 1
+
+    authenticated_client.post("/tasks", json={"title": "Second", "priority": "low"})
+
+    assert authenticated_client.get("/tasks").json()["total"] == 2
+
+
+def test_cached_list_keyed_by_query_params(authenticated_client):
+    """Different filters get different cache entries"""
+    authenticated_client.post("/tasks", json={"title": "Low", "priority": "low"})
+    authenticated_client.post("/tasks", json={"title": "High", "priority": "high"})
+
+    assert authenticated_client.get("/tasks").json()["total"] == 2
+    assert authenticated_client.get("/tasks?priority=high").json()["total"] == 1
+
+
+def test_owner_edit_invalidates_sharee_caches(client, create_user_and_token):
+    """Shared-with-me and comments are invalidated by the owner's writes"""
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    bob_token = create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    bob = {"Authorization": f"Bearer {bob_token}"}
+
+    task_id = client.post(
+        "/tasks", json={"title": "Shared", "priority": "low"}, headers=alice
+    ).json()["id"]
+    client.post(
+        f"/tasks/{task_id}/share",
+        json={"shared_with_username": "bob", "permission": "view"},
+        headers=alice,
+    )
+    shared = client.get("/tasks/shared-with-me", headers=bob).json()
+    assert shared[0]["task"]["title"] == "Shared"
+    assert client.get(f"/tasks/{task_id}/comments", headers=bob).json() == []
+
+    client.patch(f"/tasks/{task_id}", json={"title": "Renamed"}, headers=alice)
+    client.post(f"/tasks/{task_id}/comments", json={"content": "Hi"}, headers=alice)
+
+    shared = client.get("/tasks/shared-with-me", headers=bob).json()
+    assert shared[0]["task"]["title"] == "Renamed"
+    assert len(client.get(f"/tasks/{task_id}/comments", headers=bob).json()) == 1
+
+
+def test_cached_stats_change_after_completion(authenticated_client):
+    task_id = authenticated_client.post(
+        "/tasks", json={"title": "Todo", "priority": "low"}
+    ).json()["id"]
+    assert authenticated_client.get("/tasks/stats").json()["completed"] == 0
+
+    authenticated_client.patch(f"/tasks/{task_id}", json={"completed": True})
+
+    assert authenticated_client.get("/tasks/stats").json()["completed"] == 1
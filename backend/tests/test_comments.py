@@ -177,3 +177,47 @@ def test_cannot_delete_others_comments(client, create_user_and_token):
         f"/comments/{comment_id}", headers={"Authorization": f"Bearer {user_b_token}"}
     )
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_comment_pages_follow_next_cursor(authenticated_client):
+    task_id = authenticated_client.post(
+        "/tasks", json={"title": "Thread", "priority": "low"}
+    ).json()["id"]
+    for i in range(5):
+        authenticated_client.post(f"/tasks/{task_id}/comments", json={"content": f"#{i}"})
+
+    contents = []
+    params = {"limit": 2}
+    while True:
+        response = authenticated_client.get(f"/tasks/{task_id}/comments", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert len(page["items"]) <= 2
+        contents.extend(c["content"] for c in page["items"])
+        if page["next_cursor"] is None:
+            break
+        params = {"limit": 2, "cursor": page["next_cursor"]}
+
+    assert contents == [f"#{i}" for i in range(5)]
+
+
+def test_comment_count_follows_adds_and_deletes(authenticated_client):
+    task_id = authenticated_client.post(
+        "/tasks", json={"title": "Counted", "priority": "low"}
+    ).json()["id"]
+    comment_ids = [
+        authenticated_client.post(
+            f"/tasks/{task_id}/comments", json={"content": f"#{i}"}
+        ).json()["id"]
+        for i in range(3)
+    ]
+    authenticated_client.delete(f"/comments/{comment_ids[0]}")
+
+    task = authenticated_client.get(f"/tasks/{task_id}").json()
+    listed = authenticated_client.get("/tasks").json()["tasks"][0]
+
+    assert task["comment_count"] == 2
+    assert len(task["comments"]) == 2
+    assert listed["comment_count"] == 2
+    # Lists carry the count only
+    assert "comments" not in listed
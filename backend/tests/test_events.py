@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from sqlalchemy import event
+
+import db_models
+from core.redis_config import redis_client
+from services.events import _pump, channel_for, task_audience
+
+
+def _drain(pubsub) -> list[dict]:
+    events = []
+    while True:
+        message = pubsub.get_message(ignore_subscribe_messages=True, timeout=0.5)
+        if message is None:
+            return events
+        events.append(json.loads(message["data"]))
+
+
+def test_collaborators_receive_change_events(client, create_user_and_token):
+    """Share and update events reach the collaborator's channel after commit"""
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    bob_token = create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    bob = {"Authorization": f"Bearer {bob_token}"}
+    bob_id = client.get("/users/me", headers=bob).json()["id"]
+
+    task_id = client.post(
+        "/tasks", json={"title": "Live", "priority": "low"}, headers=alice
+    ).json()["id"]
+
+    pubsub = redis_client.pubsub()  # type: ignore
+    pubsub.subscribe(channel_for(bob_id))
+    try:
+        client.post(
+            f"/tasks/{task_id}/share",
+            json={"shared_with_username": "bob", "permission": "view"},
+            headers=alice,
+        )
+        client.patch(f"/tasks/{task_id}", json={"title": "Live!"}, headers=alice)
+
+        events = _drain(pubsub)
+    finally:
+        pubsub.close()
+
+    assert [event["type"] for event in events] == ["task.shared", "task.updated"]
+    assert all(event["task_id"] == task_id for event in events)
+    assert events[1]["details"]["new_values"]["title"] == "Live!"
+
+
+def test_slow_subscriber_gets_resync():
+    """Overflowing a connection's queue drops the backlog for one resync frame"""
+
+    async def messages():
+        for i in range(5):
+            yield {"type": "message", "data": json.dumps({"n": i})}
+
+    async def run():
+        queue: asyncio.Queue = asyncio.Queue(maxsize=3)
+        await _pump(messages(), queue)
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    frames = asyncio.run(run())
+
+    assert frames[0] == "event: resync\ndata: {}\n\n"
+    assert frames[1:] == ['event: change\ndata: {"n": 4}\n\n']
+
+
+def test_task_audience_is_read_once_per_transaction(
+    client, create_user_and_token, db_session
+):
+    """Later lookups reuse the memo; a share added in the session refreshes it"""
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    task_id = client.post(
+        "/tasks", json={"title": "Audience", "priority": "low"}, headers=alice
+    ).json()["id"]
+    alice_id = client.get("/users/me", headers=alice).json()["id"]
+    bob = db_session.query(db_models.User).filter_by(username="bob").one()
+
+    statements = []
+
+    def listen(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", listen)
+    try:
+        assert task_audience(db_session, task_id) == {alice_id}
+        assert task_audience(db_session, task_id) == {alice_id}
+        assert len(statements) == 1
+
+        db_session.add(
+            db_models.TaskShare(
+                task_id=task_id,
+                shared_with_user_id=bob.id,
+                shared_by_user_id=alice_id,
+                permission="view",
+            )
+        )
+        assert task_audience(db_session, task_id) == {alice_id, bob.id}
+    finally:
+        event.remove(engine, "before_cursor_execute", listen)
+        db_session.rollback()
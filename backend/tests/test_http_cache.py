@@ -0,0 +1,88 @@
+from fastapi import status
+
+
+def test_task_list_returns_304_until_a_write(authenticated_client):
+    """GET /tasks revalidates with If-None-Match and changes after a write"""
+    authenticated_client.post("/tasks", json={"title": "Cached", "priority": "low"})
+
+    response = authenticated_client.get("/tasks")
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"user-')
+    assert "private" in response.headers["Cache-Control"]
+
+    response = authenticated_client.get("/tasks", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+
+    authenticated_client.post("/tasks", json={"title": "Another", "priority": "low"})
+
+    response = authenticated_client.get("/tasks", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+    assert response.json()["total"] == 2
+
+
+def test_task_etag_changes_when_comment_added(authenticated_client):
+    """Comments bump the task's version, so detail and comment list refetch"""
+    task_id = authenticated_client.post(
+        "/tasks", json={"title": "Discussed", "priority": "low"}
+    ).json()["id"]
+
+    etag = authenticated_client.get(f"/tasks/{task_id}").headers["ETag"]
+    comments_etag = authenticated_client.get(f"/tasks/{task_id}/comments").headers["ETag"]
+    assert comments_etag == etag
+
+    response = authenticated_client.get(
+        f"/tasks/{task_id}/comments", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    authenticated_client.post(f"/tasks/{task_id}/comments", json={"content": "Hi"})
+
+    response = authenticated_client.get(
+        f"/tasks/{task_id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["comments"]) == 1
+
+
+def test_shared_task_write_bumps_collaborator_list(client, create_user_and_token):
+    """An edit by the owner invalidates the sharee's view of the task"""
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    bob_token = create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    bob = {"Authorization": f"Bearer {bob_token}"}
+
+    task_id = client.post(
+        "/tasks", json={"title": "Shared", "priority": "low"}, headers=alice
+    ).json()["id"]
+    client.post(
+        f"/tasks/{task_id}/share",
+        json={"shared_with_username": "bob", "permission": "view"},
+        headers=alice,
+    )
+    etag = client.get(f"/tasks/{task_id}", headers=bob).headers["ETag"]
+
+    client.patch(f"/tasks/{task_id}", json={"title": "Renamed"}, headers=alice)
+
+    response = client.get(f"/tasks/{task_id}", headers={**bob, "If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["title"] == "Renamed"
+
+
+def test_not_modified_still_requires_access(client, create_user_and_token):
+    """A matching ETag doesn't bypass the permission check"""
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    mallory_token = create_user_and_token("mallory", "mallory@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+
+    task_id = client.post(
+        "/tasks", json={"title": "Private", "priority": "low"}, headers=alice
+    ).json()["id"]
+    etag = client.get(f"/tasks/{task_id}", headers=alice).headers["ETag"]
+
+    response = client.get(
+        f"/tasks/{task_id}",
+        headers={"Authorization": f"Bearer {mallory_token}", "If-None-Match": etag},
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
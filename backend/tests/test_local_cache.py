@@ -0,0 +1,58 @@
+import time
+
+from core.local_cache import LocalCache
+from core.redis_config import get_cache, local_cache, set_cache
+
+
+def test_expired_entries_are_misses():
+    cache = LocalCache(max_bytes=1024 * 1024, ttl_seconds=0.05)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+
+    time.sleep(0.06)
+
+    assert cache.get("k") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_bounded_by_bytes_evicting_least_recently_used():
+    cache = LocalCache(max_bytes=4000, ttl_seconds=60)
+    for i in range(10):
+        cache.set(f"k{i}", "x" * 500)
+        cache.get("k0")  # keep k0 hot
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 4000
+    assert stats["evictions"] > 0
+    assert cache.get("k0") is not None
+    assert cache.get("k1") is None
+
+
+def test_oversized_values_are_not_kept():
+    cache = LocalCache(max_bytes=4000, ttl_seconds=60)
+    cache.set("big", "x" * 2000)
+    assert cache.get("big") is None
+
+
+def test_hot_keys_served_from_l1(db_session):
+    """Preference-style keys are copied to L1; others always go to Redis"""
+    set_cache("notification_prefs:user_1", '{"email_enabled": true}')
+    set_cache("other:key", "value")
+    local_cache.clear()
+    hits = local_cache.hits
+
+    get_cache("notification_prefs:user_1")
+    get_cache("notification_prefs:user_1")
+    get_cache("other:key")
+
+    assert local_cache.hits == hits + 1
+    assert local_cache.get("other:key") is None
+
+
+def test_cache_metrics_endpoint(client):
+    response = client.get("/health/cache")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"l1", "l2"}
+    assert "hit_ratio" in response.json()["l1"]
@@ -4,7 +4,12 @@ import pytest
 from fastapi import status
 
 import db_models
-from services.notifications import get_or_create_preferences
+from core.redis_config import get_cache
+from services.notifications import (
+    get_or_create_preferences,
+    invalidate_preferences_cache,
+    should_notify,
+)
 
 
 def mark_email_verified(db_session, username):
@@ -25,6 +30,7 @@ def mark_email_verified(db_session, username):
     # Mark as verified
     prefs.email_verified = True  # type: ignore
     db_session.commit()
+    invalidate_preferences_cache(user.id)
 
 
 @pytest.fixture
@@ -70,6 +76,44 @@ def test_notification_preferences(authenticated_client):
     assert data["email_enabled"] is True
 
 
+def test_preferences_created_at_registration(client, db_session, test_user):
+    """Registration creates the preferences row so notification checks never insert"""
+    user = (
+        db_session.query(db_models.User)
+        .filter(db_models.User.username == test_user["username"])
+        .first()
+    )
+    prefs = (
+        db_session.query(db_models.NotificationPreference)
+        .filter(db_models.NotificationPreference.user_id == user.id)
+        .first()
+    )
+
+    assert prefs is not None
+    assert prefs.email_enabled is True
+    assert prefs.email_verified is False
+
+
+def test_preference_cache_write_through(authenticated_client, db_session):
+    """should_notify reads from cache, and PATCH refreshes the cached copy"""
+    user = (
+        db_session.query(db_models.User)
+        .filter(db_models.User.username == "testuser")
+        .first()
+    )
+    mark_email_verified(db_session, "testuser")
+
+    assert should_notify(user.id, "task_shared", db_session) is True
+    assert get_cache(f"notification_prefs:user_{user.id}") is not None
+
+    response = authenticated_client.patch(
+        "/notifications/preferences", json={"task_shared_with_me": False}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    assert should_notify(user.id, "task_shared", db_session) is False
+
+
 def test_notification_lifecycle(client, db_session, create_user_and_token, mock_sns):
     # Bob's email is verified
     # Alice shares task with bob
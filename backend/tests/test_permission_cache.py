@@ -0,0 +1,106 @@
+import pytest
+
+from core.redis_config import redis_client
+from services import permission_cache
+
+
+class NoQuerySession:
+    """Stands in for a session that must not be used"""
+
+    def query(self, *args, **kwargs):
+        raise AssertionError("permission lookup hit the database")
+
+
+@pytest.fixture
+def shared_task(client, create_user_and_token):
+    """Alice's task shared with Bob (view); returns (task_id, alice, bob) headers"""
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    bob_token = create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    bob = {"Authorization": f"Bearer {bob_token}"}
+
+    task_id = client.post(
+        "/tasks", json={"title": "Shared", "priority": "low"}, headers=alice
+    ).json()["id"]
+    response = client.post(
+        f"/tasks/{task_id}/share",
+        json={"shared_with_username": "bob", "permission": "view"},
+        headers=alice,
+    )
+    assert response.status_code == 201
+    return task_id, alice, bob
+
+
+def _bob_id(client, bob) -> int:
+    return client.get("/users/me", headers=bob).json()["id"]
+
+
+def test_share_writes_permission_map(client, shared_task):
+    task_id, _, bob = shared_task
+    bob_id = _bob_id(client, bob)
+
+    assert permission_cache.cached_permission(bob_id, task_id) == "view"
+    assert permission_cache.lookup_permission(bob_id, task_id, NoQuerySession()) == "view"
+
+
+def test_lookup_fills_map_once(client, shared_task, db_session):
+    """A miss queries once; later lookups, including "none", come from Redis"""
+    task_id, _, bob = shared_task
+    bob_id = _bob_id(client, bob)
+    redis_client.delete(f"task_perms:user_{bob_id}")
+
+    assert permission_cache.lookup_permission(bob_id, task_id, db_session) == "view"
+    assert permission_cache.lookup_permission(bob_id, task_id, NoQuerySession()) == "view"
+
+    assert permission_cache.lookup_permission(bob_id, 999999, db_session) == "none"
+    assert permission_cache.lookup_permission(bob_id, 999999, NoQuerySession()) == "none"
+
+
+def test_update_and_unshare_rewrite_map(client, shared_task):
+    task_id, alice, bob = shared_task
+
+    # View only: can't edit
+    response = client.patch(f"/tasks/{task_id}", json={"title": "Bob"}, headers=bob)
+    assert response.status_code == 403
+
+    client.put(f"/tasks/{task_id}/share/bob", json={"permission": "edit"}, headers=alice)
+    response = client.patch(f"/tasks/{task_id}", json={"title": "Bob"}, headers=bob)
+    assert response.status_code == 200
+
+    client.delete(f"/tasks/{task_id}/share/bob", headers=alice)
+    assert client.get(f"/tasks/{task_id}/comments", headers=bob).status_code == 403
+    assert permission_cache.cached_permission(_bob_id(client, bob), task_id) == "none"
+
+
+def test_stale_fill_does_not_overwrite_committed_change(client, shared_task):
+    """A lookup that read the database before an unshare can't restore access"""
+    task_id, alice, bob = shared_task
+    bob_id = _bob_id(client, bob)
+
+    client.delete(f"/tasks/{task_id}/share/bob", headers=alice)
+    # The late fill of a request that queried before the unshare committed
+    permission_cache._write({(bob_id, task_id): "view"}, overwrite=False)
+
+    assert permission_cache.cached_permission(bob_id, task_id) == "none"
+
+
+def test_failed_rewrite_drops_map(client, shared_task, monkeypatch):
+    """An unshare whose cache write fails must not leave the old field behind"""
+    task_id, alice, bob = shared_task
+    bob_id = _bob_id(client, bob)
+    monkeypatch.setattr(permission_cache, "_write", lambda *args, **kwargs: False)
+
+    client.delete(f"/tasks/{task_id}/share/bob", headers=alice)
+
+    assert redis_client.exists(f"task_perms:user_{bob_id}") == 0
+
+
+def test_reads_do_not_extend_map_ttl(client, shared_task):
+    task_id, _, bob = shared_task
+    bob_id = _bob_id(client, bob)
+    key = f"task_perms:user_{bob_id}"
+    redis_client.expire(key, 5)
+
+    permission_cache.cached_permission(bob_id, task_id)
+
+    assert 0 < redis_client.ttl(key) <= 5
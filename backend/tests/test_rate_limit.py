@@ -0,0 +1,68 @@
+import pytest
+from fastapi import Request
+
+from core.exceptions import RateLimitExceededError
+from core.rate_limit_config import RateLimiter, parse_rate
+
+
+def _request(ip: str = "10.0.0.1") -> Request:
+    return Request({"type": "http", "client": (ip, 1234), "headers": []})
+
+
+def test_parse_rate():
+    assert parse_rate("5/minute") == (5, 60)
+    assert parse_rate("100 / hour") == (100, 3600)
+    with pytest.raises(ValueError):
+        parse_rate("5 per fortnight")
+
+
+def test_redis_bucket_allows_burst_then_rejects(db_session):
+    limiter = RateLimiter()
+
+    for _ in range(3):
+        limiter.hit("test.login", "3/minute", _request())
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        limiter.hit("test.login", "3/minute", _request())
+
+    # One token every 20 seconds
+    assert 0 < exc_info.value.retry_after <= 20
+    assert limiter.metrics.allowed == 3
+    assert limiter.metrics.rejected == 1
+    assert limiter.metrics.fallback_decisions == 0
+
+
+def test_rejected_caller_is_rejected_locally(db_session):
+    """After a Redis rejection the same caller doesn't cost a round trip"""
+    limiter = RateLimiter()
+    limiter.hit("test.reset", "1/minute", _request())
+    with pytest.raises(RateLimitExceededError):
+        limiter.hit("test.reset", "1/minute", _request())
+
+    with pytest.raises(RateLimitExceededError):
+        limiter.hit("test.reset", "1/minute", _request())
+
+    assert limiter.metrics.rejected_locally == 1
+    # Other callers are unaffected
+    limiter.hit("test.reset", "1/minute", _request("10.0.0.2"))
+
+
+def test_buckets_are_shared_between_instances(db_session):
+    """Two limiters (two API processes) draw from the same Redis bucket"""
+    first, second = RateLimiter(), RateLimiter()
+
+    first.hit("test.shared", "2/hour", _request())
+    second.hit("test.shared", "2/hour", _request())
+    with pytest.raises(RateLimitExceededError):
+        first.hit("test.shared", "2/hour", _request())
+
+
+def test_in_memory_buckets_without_redis():
+    limiter = RateLimiter(use_redis=False)
+
+    limiter.hit("test.memory", "2/minute", _request())
+    limiter.hit("test.memory", "2/minute", _request())
+    with pytest.raises(RateLimitExceededError):
+        limiter.hit("test.memory", "2/minute", _request())
+
+    assert limiter.metrics.fallback_decisions == 3
+    assert limiter.metrics.stats()["decision_latency_ms"]["max"] >= 0
@@ -0,0 +1,184 @@
+import itertools
+from datetime import date, timedelta
+
+import pytest
+
+import db_models
+from core import rrule
+from services.recurrence import sweep_recurring_tasks
+
+TODAY = date.today()
+
+
+def _create_series(client, rule, due_date=TODAY, **fields):
+    response = client.post(
+        "/tasks",
+        json={
+            "title": "Standup",
+            "priority": "high",
+            "due_date": due_date.isoformat(),
+            "recurrence_rule": rule,
+            **fields,
+        },
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def _occurrences(db_session, series_id):
+    return (
+        db_session.query(db_models.Task)
+        .filter(db_models.Task.recurrence_parent_id == series_id)
+        .order_by(db_models.Task.due_date)
+        .all()
+    )
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "FREQ=DAILY;INTERVAL=3",
+        "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH",
+        "FREQ=MONTHLY;BYMONTHDAY=31,-1",
+        "FREQ=YEARLY",
+    ],
+)
+def test_skipping_ahead_matches_walking_from_start(rule):
+    parsed = rrule.parse_rule(rule)
+    start = date(2020, 2, 29)
+    window = (date(2031, 1, 1), date(2033, 12, 31))
+
+    walked = [
+        day
+        for day in itertools.takewhile(
+            lambda day: day <= window[1], rrule.occurrences(parsed, start)
+        )
+        if day >= window[0]
+    ]
+
+    assert rrule.occurrences_between(parsed, start, *window) == walked
+
+
+def test_rule_bounds_and_normal_form():
+    rule = rrule.parse_rule("RRULE:freq=weekly;byday=fr,mo;count=4")
+
+    assert str(rule) == "FREQ=WEEKLY;BYDAY=MO,FR;COUNT=4"
+    # The start counts as the first occurrence
+    assert list(rrule.occurrences(rule, date(2026, 3, 4))) == [
+        date(2026, 3, 4),
+        date(2026, 3, 6),
+        date(2026, 3, 9),
+        date(2026, 3, 13),
+    ]
+    with pytest.raises(ValueError):
+        rrule.parse_rule("FREQ=HOURLY")
+    with pytest.raises(ValueError):
+        rrule.parse_rule("FREQ=DAILY;COUNT=2;UNTIL=20300101")
+
+
+def test_recurring_task_needs_valid_rule_and_due_date(authenticated_client):
+    bad_rule = authenticated_client.post(
+        "/tasks", json={"title": "x", "due_date": "2030-01-01", "recurrence_rule": "FREQ=X"}
+    )
+    no_due_date = authenticated_client.post(
+        "/tasks", json={"title": "x", "recurrence_rule": "FREQ=DAILY"}
+    )
+
+    assert bad_rule.status_code == 422
+    assert no_due_date.status_code == 422
+
+
+def test_sweep_creates_occurrences_up_to_horizon_once(
+    authenticated_client, db_session, monkeypatch
+):
+    monkeypatch.setattr("core.settings.settings.RECURRENCE_HORIZON_DAYS", 6)
+    series = _create_series(authenticated_client, "freq=daily;interval=2")
+    assert series["recurrence_rule"] == "FREQ=DAILY;INTERVAL=2"
+
+    assert sweep_recurring_tasks(db_session, today=TODAY) == 3
+    assert sweep_recurring_tasks(db_session, today=TODAY) == 0
+
+    occurrences = _occurrences(db_session, series["id"])
+    assert [task.due_date for task in occurrences] == [
+        TODAY + timedelta(days=days) for days in (2, 4, 6)
+    ]
+    assert all(task.title == "Standup" and not task.completed for task in occurrences)
+
+    stored = db_session.get(db_models.Task, series["id"])
+    db_session.refresh(stored)
+    assert stored.recurrence_next == TODAY + timedelta(days=8)
+
+
+def test_sweep_stops_at_count(authenticated_client, db_session):
+    series = _create_series(authenticated_client, "FREQ=DAILY;COUNT=3")
+
+    assert sweep_recurring_tasks(db_session, today=TODAY) == 2
+
+    stored = db_session.get(db_models.Task, series["id"])
+    db_session.refresh(stored)
+    assert stored.recurrence_next is None
+
+
+def test_occurrences_lists_virtual_entries_without_writing(
+    authenticated_client, db_session
+):
+    series = _create_series(authenticated_client, "FREQ=WEEKLY")
+    authenticated_client.post(
+        "/tasks", json={"title": "One-off", "due_date": (TODAY + timedelta(days=1)).isoformat()}
+    )
+    before = db_session.query(db_models.Task).count()
+
+    response = authenticated_client.get(
+        "/tasks/occurrences",
+        params={
+            "due_after": TODAY.isoformat(),
+            "due_before": (TODAY + timedelta(days=364)).isoformat(),
+        },
+    )
+
+    assert response.status_code == 200
+    entries = response.json()
+    assert entries[0]["task_id"] == series["id"]
+    assert entries[1]["title"] == "One-off"
+    virtual = [entry for entry in entries if entry["virtual"]]
+    assert len(virtual) == 52
+    assert {entry["series_id"] for entry in virtual} == {series["id"]}
+    assert db_session.query(db_models.Task).count() == before
+
+
+def test_occurrences_after_sweep_are_not_repeated(authenticated_client, db_session):
+    _create_series(authenticated_client, "FREQ=DAILY")
+    sweep_recurring_tasks(db_session, today=TODAY)
+
+    entries = authenticated_client.get(
+        "/tasks/occurrences",
+        params={
+            "due_after": TODAY.isoformat(),
+            "due_before": (TODAY + timedelta(days=29)).isoformat(),
+        },
+    ).json()
+
+    assert [entry["due_date"] for entry in entries] == [
+        (TODAY + timedelta(days=days)).isoformat() for days in range(30)
+    ]
+
+
+def test_occurrences_range_is_bounded(authenticated_client):
+    response = authenticated_client.get(
+        "/tasks/occurrences",
+        params={"due_after": "2030-01-01", "due_before": "2032-01-01"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_clearing_rule_stops_the_series(authenticated_client, db_session):
+    series = _create_series(authenticated_client, "FREQ=DAILY")
+
+    response = authenticated_client.patch(
+        f"/tasks/{series['id']}", json={"recurrence_rule": None}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["recurrence_rule"] is None
+    assert sweep_recurring_tasks(db_session, today=TODAY) == 0
@@ -0,0 +1,55 @@
+import pytest
+import redis
+
+from core.redis_factory import CircuitBreaker, CircuitOpenError
+
+
+def _fail():
+    raise redis.ConnectionError("down")
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+
+    for _ in range(3):
+        with pytest.raises(redis.ConnectionError):
+            breaker.call(_fail)
+
+    assert breaker.state == "open"
+    assert not breaker.available
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    assert calls == []
+
+
+def test_breaker_half_open_probe_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    with pytest.raises(redis.ConnectionError):
+        breaker.call(_fail)
+
+    assert breaker.state == "half-open"
+    assert breaker.call(lambda: "PONG") == "PONG"
+    assert breaker.state == "closed"
+
+
+def test_breaker_ignores_command_errors():
+    """A bad command isn't an outage"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+
+    def bad_command():
+        raise redis.ResponseError("WRONGTYPE")
+
+    with pytest.raises(redis.ResponseError):
+        breaker.call(bad_command)
+    assert breaker.state == "closed"
+
+
+def test_shared_client_is_pooled_and_up():
+    from core.redis_config import async_redis_client, redis_client
+    from core.redis_factory import get_redis
+
+    assert redis_client is get_redis()
+    assert redis_client
+    assert async_redis_client
+    assert redis_client.ping()
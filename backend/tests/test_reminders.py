@@ -0,0 +1,108 @@
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import db_models
+from services.notifications import invalidate_preferences_cache
+from services.reminders import sweep_due_soon_tasks
+
+TODAY = date(2026, 3, 10)
+
+
+@pytest.fixture
+def mock_email():
+    mock = MagicMock()
+    mock.send_email.return_value = True
+
+    with patch("services.notifications.email_service", mock):
+        yield mock
+
+
+def _verify_email(db_session, username):
+    user = (
+        db_session.query(db_models.User)
+        .filter(db_models.User.username == username)
+        .first()
+    )
+    prefs = (
+        db_session.query(db_models.NotificationPreference)
+        .filter(db_models.NotificationPreference.user_id == user.id)
+        .first()
+    )
+    prefs.email_verified = True  # type: ignore
+    db_session.commit()
+    invalidate_preferences_cache(user.id)
+
+
+def _create_task(client, title, due_date, completed=False):
+    response = client.post(
+        "/tasks",
+        json={
+            "title": title,
+            "priority": "medium",
+            "due_date": due_date.isoformat(),
+            "completed": completed,
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_sweep_sends_once_per_due_date(authenticated_client, db_session, mock_email):
+    """Reminders go out for open tasks in the window, and only once"""
+    _verify_email(db_session, "testuser")
+
+    _create_task(authenticated_client, "Due tomorrow", TODAY + timedelta(days=1))
+    _create_task(authenticated_client, "Due next month", TODAY + timedelta(days=30))
+    _create_task(
+        authenticated_client, "Done already", TODAY + timedelta(days=1), completed=True
+    )
+
+    assert sweep_due_soon_tasks(db_session, today=TODAY) == 1
+    mock_email.send_email.assert_called_once()
+    assert "Due tomorrow" in mock_email.send_email.call_args.kwargs["subject"]
+
+    mock_email.reset_mock()
+    assert sweep_due_soon_tasks(db_session, today=TODAY) == 0
+    mock_email.send_email.assert_not_called()
+
+
+def test_sweep_rearms_when_due_date_changes(
+    authenticated_client, db_session, mock_email
+):
+    """Moving the due date makes the task eligible for a new reminder"""
+    _verify_email(db_session, "testuser")
+    task_id = _create_task(authenticated_client, "Movable", TODAY)
+
+    assert sweep_due_soon_tasks(db_session, today=TODAY) == 1
+
+    authenticated_client.patch(
+        f"/tasks/{task_id}",
+        json={"due_date": (TODAY + timedelta(days=1)).isoformat()},
+    )
+
+    assert sweep_due_soon_tasks(db_session, today=TODAY) == 1
+
+
+def test_sweep_respects_preferences_and_retries_failures(
+    authenticated_client, db_session, mock_email
+):
+    """Unverified owners get nothing; failed sends are retried next sweep"""
+    _create_task(authenticated_client, "Quiet task", TODAY)
+
+    assert sweep_due_soon_tasks(db_session, today=TODAY) == 0
+    mock_email.send_email.assert_not_called()
+
+    _verify_email(db_session, "testuser")
+    task_id = _create_task(authenticated_client, "Flaky send", TODAY)
+
+    mock_email.send_email.return_value = False
+    assert sweep_due_soon_tasks(db_session, today=TODAY) == 0
+
+    task = db_session.query(db_models.Task).filter(db_models.Task.id == task_id).first()
+    db_session.refresh(task)
+    assert task.due_reminder_sent_for is None
+
+    mock_email.send_email.return_value = True
+    assert sweep_due_soon_tasks(db_session, today=TODAY) == 1
@@ -0,0 +1,33 @@
+def test_large_task_page_is_gzipped(authenticated_client):
+    """List responses above GZIP_MINIMUM_SIZE are compressed"""
+    for i in range(20):
+        authenticated_client.post(
+            "/tasks",
+            json={"title": f"Task {i}", "description": "x" * 200, "priority": "low"},
+        )
+
+    response = authenticated_client.get("/tasks", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["total"] == 20
+
+
+def test_small_response_not_compressed(authenticated_client):
+    response = authenticated_client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+
+def test_orjson_list_matches_schema(authenticated_client):
+    """ORJSONResponse keeps the response_model shape and datetime format"""
+    authenticated_client.post("/tasks", json={"title": "Shape", "priority": "high"})
+
+    task = authenticated_client.get("/tasks").json()["tasks"][0]
+
+    assert task["title"] == "Shape"
+    assert task["comment_count"] == 0
+    assert "comments" not in task
+    assert "T" in task["created_at"]
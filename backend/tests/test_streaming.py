@@ -0,0 +1,46 @@
+import orjson
+
+from core import streaming
+
+
+def test_iter_json_array_batches():
+    chunks = list(streaming.iter_json_array(range(5), lambda n: {"n": n}, batch_size=2))
+
+    assert len(chunks) == 4  # three batches and the closing bracket
+    assert orjson.loads(b"".join(chunks)) == [{"n": n} for n in range(5)]
+
+
+def test_iter_json_array_empty():
+    assert b"".join(streaming.iter_json_array([], lambda n: n, batch_size=2)) == b"[]"
+
+
+def test_comments_stream_in_batches(authenticated_client, monkeypatch):
+    monkeypatch.setattr("core.settings.settings.STREAM_BATCH_SIZE", 2)
+    task_id = authenticated_client.post(
+        "/tasks", json={"title": "Chatty", "priority": "low"}
+    ).json()["id"]
+    for i in range(5):
+        authenticated_client.post(f"/tasks/{task_id}/comments", json={"content": f"#{i}"})
+
+    response = authenticated_client.get(f"/tasks/{task_id}/comments")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    comments = response.json()
+    assert [c["content"] for c in comments] == [f"#{i}" for i in range(5)]
+    assert comments[0]["username"] == "testuser"
+
+
+def test_streamed_comments_keep_etag(authenticated_client):
+    task_id = authenticated_client.post(
+        "/tasks", json={"title": "Tagged", "priority": "low"}
+    ).json()["id"]
+
+    response = authenticated_client.get(f"/tasks/{task_id}/comments")
+
+    assert response.json() == []
+    etag = response.headers["ETag"]
+    cached = authenticated_client.get(
+        f"/tasks/{task_id}/comments", headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
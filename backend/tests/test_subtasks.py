@@ -0,0 +1,143 @@
+def _create(client, title, parent_id=None, **fields):
+    response = client.post(
+        "/tasks", json={"title": title, "parent_id": parent_id, **fields}
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def _rollup(client, task_id):
+    task = client.get(f"/tasks/{task_id}").json()
+    return task["subtask_count"], task["subtasks_completed"]
+
+
+def test_rollups_count_the_whole_subtree(authenticated_client):
+    project = _create(authenticated_client, "Project")
+    phase = _create(authenticated_client, "Phase", project)
+    step = _create(authenticated_client, "Step", phase)
+    _create(authenticated_client, "Done step", phase, completed=True)
+
+    assert _rollup(authenticated_client, project) == (3, 1)
+    assert _rollup(authenticated_client, phase) == (2, 1)
+
+    authenticated_client.patch(f"/tasks/{step}", json={"completed": True})
+    assert _rollup(authenticated_client, project) == (3, 2)
+
+    authenticated_client.patch(f"/tasks/{step}", json={"completed": False})
+    assert _rollup(authenticated_client, project) == (3, 1)
+
+
+def test_delete_takes_subtree_out_of_rollups(authenticated_client):
+    project = _create(authenticated_client, "Project")
+    phase = _create(authenticated_client, "Phase", project)
+    step = _create(authenticated_client, "Step", phase, completed=True)
+    authenticated_client.post(f"/tasks/{step}/comments", json={"content": "Done"})
+
+    response = authenticated_client.delete(f"/tasks/{phase}")
+
+    assert response.status_code == 204
+    assert authenticated_client.get(f"/tasks/{step}").status_code == 404
+    assert _rollup(authenticated_client, project) == (0, 0)
+
+
+def test_move_shifts_counts_between_ancestors(authenticated_client):
+    first = _create(authenticated_client, "First")
+    second = _create(authenticated_client, "Second")
+    branch = _create(authenticated_client, "Branch", first)
+    leaf = _create(authenticated_client, "Leaf", branch, completed=True)
+
+    response = authenticated_client.patch(f"/tasks/{branch}", json={"parent_id": second})
+
+    assert response.status_code == 200
+    assert _rollup(authenticated_client, first) == (0, 0)
+    assert _rollup(authenticated_client, second) == (2, 1)
+    subtree = authenticated_client.get(f"/tasks/{second}/subtasks?recursive=true").json()
+    assert [task["id"] for task in subtree] == [branch, leaf]
+
+    authenticated_client.patch(f"/tasks/{branch}", json={"parent_id": None})
+    assert _rollup(authenticated_client, second) == (0, 0)
+    assert authenticated_client.get(f"/tasks/{branch}").json()["parent_id"] is None
+
+
+def test_cannot_move_under_own_subtree(authenticated_client):
+    parent = _create(authenticated_client, "Parent")
+    child = _create(authenticated_client, "Child", parent)
+
+    response = authenticated_client.patch(f"/tasks/{parent}", json={"parent_id": child})
+
+    assert response.status_code == 400
+
+
+def test_depth_is_limited(authenticated_client, monkeypatch):
+    monkeypatch.setattr("core.settings.settings.SUBTASK_MAX_DEPTH", 1)
+    parent = _create(authenticated_client, "Parent")
+    child = _create(authenticated_client, "Child", parent)
+
+    response = authenticated_client.post(
+        "/tasks", json={"title": "Too deep", "parent_id": child}
+    )
+
+    assert response.status_code == 400
+
+
+def test_direct_subtasks_listing(authenticated_client):
+    parent = _create(authenticated_client, "Parent")
+    child = _create(authenticated_client, "Child", parent)
+    _create(authenticated_client, "Grandchild", child)
+
+    response = authenticated_client.get(f"/tasks/{parent}/subtasks")
+
+    assert response.status_code == 200
+    assert [task["id"] for task in response.json()] == [child]
+
+
+def _share(client, task_id, username, permission, headers):
+    response = client.post(
+        f"/tasks/{task_id}/share",
+        json={"shared_with_username": username, "permission": permission},
+        headers=headers,
+    )
+    assert response.status_code in (200, 201), response.text
+
+
+def test_parent_must_be_owned(client, create_user_and_token):
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    bob_token = create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    bob = {"Authorization": f"Bearer {bob_token}"}
+    parent = client.post("/tasks", json={"title": "Alice's"}, headers=alice).json()["id"]
+    _share(client, parent, "bob", "edit", alice)
+    bobs = client.post("/tasks", json={"title": "Bob's"}, headers=bob).json()["id"]
+
+    created = client.post(
+        "/tasks", json={"title": "Bob's", "parent_id": parent}, headers=bob
+    )
+    moved = client.patch(f"/tasks/{bobs}", json={"parent_id": parent}, headers=bob)
+
+    assert created.status_code == 403
+    assert moved.status_code == 403
+
+
+def test_sharing_a_parent_does_not_share_its_subtasks(client, create_user_and_token):
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    bob_token = create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    bob = {"Authorization": f"Bearer {bob_token}"}
+    parent = client.post("/tasks", json={"title": "Plan"}, headers=alice).json()["id"]
+    private = client.post(
+        "/tasks", json={"title": "Private", "parent_id": parent}, headers=alice
+    ).json()["id"]
+    shared = client.post(
+        "/tasks", json={"title": "Shared", "parent_id": private}, headers=alice
+    ).json()["id"]
+    _share(client, parent, "bob", "view", alice)
+    _share(client, shared, "bob", "view", alice)
+
+    direct = client.get(f"/tasks/{parent}/subtasks", headers=bob)
+    subtree = client.get(f"/tasks/{parent}/subtasks?recursive=true", headers=bob)
+
+    assert direct.status_code == 200
+    assert direct.json() == []
+    assert [task["id"] for task in subtree.json()] == [shared]
+    owners_view = client.get(f"/tasks/{parent}/subtasks?recursive=true", headers=alice)
+    assert [task["id"] for task in owners_view.json()] == [private, shared]
@@ -0,0 +1,85 @@
+def _setup_shared_task(client, create_user_and_token):
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    bob_token = create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    bob = {"Authorization": f"Bearer {bob_token}"}
+
+    task_id = client.post(
+        "/tasks", json={"title": "Synced", "priority": "low"}, headers=alice
+    ).json()["id"]
+    client.post(
+        f"/tasks/{task_id}/comments", json={"content": "First"}, headers=alice
+    )
+    client.post(
+        f"/tasks/{task_id}/share",
+        json={"shared_with_username": "bob", "permission": "edit"},
+        headers=alice,
+    )
+    return alice, bob, task_id
+
+
+def test_full_sync_returns_visible_state(client, create_user_and_token):
+    """Without since, /sync returns everything the user can see"""
+    _, bob, task_id = _setup_shared_task(client, create_user_and_token)
+
+    response = client.get("/sync", headers=bob)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [task["id"] for task in data["tasks"]] == [task_id]
+    assert data["tasks"][0]["updated_at"] is not None
+    assert [comment["content"] for comment in data["comments"]] == ["First"]
+    assert [share["task_id"] for share in data["shares"]] == [task_id]
+    assert data["deleted"] == []
+
+
+def test_incremental_sync_returns_only_changes(client, create_user_and_token):
+    """A sync with the previous token returns only what changed since"""
+    alice, bob, task_id = _setup_shared_task(client, create_user_and_token)
+    token = client.get("/sync", headers=bob).json()["token"]
+
+    unchanged = client.get("/sync", params={"since": token}, headers=bob).json()
+    assert unchanged["tasks"] == []
+    assert unchanged["comments"] == []
+    assert unchanged["shares"] == []
+
+    client.patch(f"/tasks/{task_id}", json={"title": "Renamed"}, headers=alice)
+
+    changed = client.get("/sync", params={"since": token}, headers=bob).json()
+    assert [task["title"] for task in changed["tasks"]] == ["Renamed"]
+    assert changed["comments"] == []
+
+
+def test_deletions_are_returned_as_tombstones(client, create_user_and_token):
+    """Deleted comments and tasks come back in deleted"""
+    alice, bob, task_id = _setup_shared_task(client, create_user_and_token)
+    comment_id = client.get(f"/tasks/{task_id}/comments", headers=alice).json()[0]["id"]
+    token = client.get("/sync", headers=bob).json()["token"]
+
+    client.delete(f"/comments/{comment_id}", headers=alice)
+    client.delete(f"/tasks/{task_id}", headers=alice)
+
+    deleted = client.get("/sync", params={"since": token}, headers=bob).json()["deleted"]
+    assert [(d["resource_type"], d["resource_id"]) for d in deleted] == [
+        ("comment", comment_id),
+        ("task", task_id),
+    ]
+
+
+def test_unshare_tombstones_task_for_sharee(client, create_user_and_token):
+    """Losing access to a task is a deletion for the sharee"""
+    alice, bob, task_id = _setup_shared_task(client, create_user_and_token)
+    token = client.get("/sync", headers=bob).json()["token"]
+
+    client.delete(f"/tasks/{task_id}/share/bob", headers=alice)
+
+    data = client.get("/sync", params={"since": token}, headers=bob).json()
+    assert ("task", task_id) in [
+        (d["resource_type"], d["resource_id"]) for d in data["deleted"]
+    ]
+    assert data["tasks"] == []
+
+
+def test_invalid_token_rejected(authenticated_client):
+    response = authenticated_client.get("/sync", params={"since": "abc"})
+    assert response.status_code == 422
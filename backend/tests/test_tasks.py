@@ -508,6 +508,34 @@ def test_get_stats_with_tasks(authenticated_client):
     assert stats["by_priority"]["low"] == 1
 
 
+def test_get_stats_counts_tags_and_overdue(authenticated_client):
+    """Tags are counted once per task; overdue skips completed tasks"""
+    authenticated_client.post(
+        "/tasks",
+        json={
+            "title": "Late",
+            "priority": "low",
+            "tags": ["work", "urgent"],
+            "due_date": "2020-01-01",
+        },
+    )
+    authenticated_client.post(
+        "/tasks",
+        json={
+            "title": "Done",
+            "priority": "low",
+            "tags": ["work"],
+            "due_date": "2020-01-01",
+            "completed": True,
+        },
+    )
+
+    stats = authenticated_client.get("/tasks/stats").json()
+
+    assert stats["by_tag"] == {"work": 2, "urgent": 1}
+    assert stats["overdue"] == 1
+
+
 def test_get_stats_empty(authenticated_client):
     """Test stats endpoint with no tasks"""
 
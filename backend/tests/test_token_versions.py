@@ -0,0 +1,100 @@
+from fastapi import status
+from jose import jwt
+
+from core.redis_config import redis_client
+from core.security import create_access_token
+from core.settings import settings
+from services import token_versions
+
+
+def _claims(token: str) -> dict:
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+def test_login_token_carries_uid_and_version(client, auth_token):
+    claims = _claims(auth_token)
+
+    assert claims["sub"] == "testuser"
+    assert isinstance(claims["uid"], int)
+    assert claims["ver"] == 0
+    # Login warms the fast path's revocation check
+    assert redis_client.get(f"token_version:user_{claims['uid']}") == "0"
+
+
+def test_fast_path_endpoint_authenticates_by_uid(client, auth_token):
+    response = client.get("/sync", headers={"Authorization": f"Bearer {auth_token}"})
+
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_password_change_revokes_old_tokens(client, auth_token, test_user):
+    old = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.patch(
+        "/users/me/change-password",
+        json={"current_password": test_user["password"], "new_password": "newpass12345"},
+        headers=old,
+    )
+    assert response.status_code == status.HTTP_200_OK
+    new = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    # Both the DB-backed and the zero-query dependency reject the old token
+    assert client.get("/tasks", headers=old).status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.get("/sync", headers=old).status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.get("/tasks", headers=new).status_code == status.HTTP_200_OK
+    assert client.get("/sync", headers=new).status_code == status.HTTP_200_OK
+
+
+def test_revocation_survives_lost_redis_entry(client, auth_token, test_user):
+    """A Redis miss falls back to users.token_version"""
+    old = {"Authorization": f"Bearer {auth_token}"}
+    client.patch(
+        "/users/me/change-password",
+        json={"current_password": test_user["password"], "new_password": "newpass12345"},
+        headers=old,
+    )
+    redis_client.flushdb()
+
+    assert client.get("/sync", headers=old).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_legacy_username_only_token_still_accepted(client, test_user):
+    legacy = create_access_token({"sub": test_user["username"]})
+    headers = {"Authorization": f"Bearer {legacy}"}
+
+    assert client.get("/tasks", headers=headers).status_code == status.HTTP_200_OK
+    assert client.get("/sync", headers=headers).status_code == status.HTTP_200_OK
+
+
+def test_cookie_auth_works_on_fast_path(client, auth_token):
+    client.cookies.set(settings.ACCESS_TOKEN_COOKIE_NAME, auth_token)
+
+    assert client.get("/activity/stats").status_code == status.HTTP_200_OK
+
+
+def test_cache_never_goes_back_to_an_older_version(client, auth_token):
+    uid = _claims(auth_token)["uid"]
+    key = f"token_version:user_{uid}"
+
+    token_versions.cache_token_version(uid, 2)
+    # A login that read the row before the bump committed
+    token_versions.cache_token_version(uid, 1)
+
+    assert redis_client.get(key) == "2"
+
+
+def test_failed_cache_write_after_revoke_drops_entry(
+    client, auth_token, test_user, monkeypatch
+):
+    uid = _claims(auth_token)["uid"]
+    old = {"Authorization": f"Bearer {auth_token}"}
+    monkeypatch.setattr(token_versions, "cache_token_version", lambda *args: False)
+
+    client.patch(
+        "/users/me/change-password",
+        json={"current_password": test_user["password"], "new_password": "newpass12345"},
+        headers=old,
+    )
+
+    assert redis_client.get(f"token_version:user_{uid}") is None
+    assert client.get("/sync", headers=old).status_code == status.HTTP_401_UNAUTHORIZED
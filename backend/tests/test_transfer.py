@@ -0,0 +1,117 @@
+import csv
+import io
+
+import orjson
+import pytest
+
+
+def _create_tasks(client, count: int) -> None:
+    for i in range(count):
+        client.post(
+            "/tasks",
+            json={"title": f"Task {i}", "priority": "low", "tags": ["a", 'b "quoted"']},
+        )
+
+
+def _import(client, name: str, content: bytes, **params):
+    return client.post("/tasks/import", params=params, files={"file": (name, content)})
+
+
+def test_export_jsonl_streams_all_tasks(authenticated_client, monkeypatch):
+    """More rows than one batch (and than GET /tasks allows) all come out"""
+    monkeypatch.setattr("core.settings.settings.TRANSFER_BATCH_SIZE", 2)
+    _create_tasks(authenticated_client, 5)
+
+    response = authenticated_client.get("/tasks/export?format=jsonl")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [row["title"] for row in rows] == [f"Task {i}" for i in range(5)]
+    assert rows[0]["tags"] == ["a", 'b "quoted"']
+
+
+def test_export_csv_has_header_when_empty(authenticated_client):
+    response = authenticated_client.get("/tasks/export?format=csv")
+
+    assert response.status_code == 200
+    assert response.text.strip().split(",")[:2] == ["id", "title"]
+
+
+def test_export_comments(authenticated_client):
+    task_id = authenticated_client.post(
+        "/tasks", json={"title": "Discussed", "priority": "low"}
+    ).json()["id"]
+    authenticated_client.post(f"/tasks/{task_id}/comments", json={"content": "Hello"})
+
+    response = authenticated_client.get("/tasks/export?format=csv&resource=comments")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["task_id"], row["content"]) for row in rows] == [(str(task_id), "Hello")]
+
+
+def test_csv_round_trip(authenticated_client):
+    _create_tasks(authenticated_client, 3)
+    exported = authenticated_client.get("/tasks/export?format=csv").content
+
+    response = _import(authenticated_client, "tasks.csv", exported)
+
+    assert response.status_code == 200
+    assert response.json() == {"imported": 3, "failed": 0, "errors": []}
+    tasks = authenticated_client.get("/tasks").json()["tasks"]
+    assert len(tasks) == 6
+    assert all(task["tags"] == ["a", 'b "quoted"'] for task in tasks)
+
+
+def test_import_reports_bad_rows_and_loads_the_rest(authenticated_client, monkeypatch):
+    monkeypatch.setattr("core.settings.settings.TRANSFER_BATCH_SIZE", 2)
+    lines = [
+        {"title": "One", "priority": "high", "due_date": "2030-01-01"},
+        {"title": "", "priority": "low"},
+        {"title": "Three", "priority": "urgent"},
+        {"title": "Four", "tags": ["x"], "completed": True},
+        {"title": "Five"},
+    ]
+    content = b"".join(orjson.dumps(line) + b"\n" for line in lines) + b"{not json\n"
+
+    response = _import(authenticated_client, "tasks.jsonl", content)
+
+    result = response.json()
+    assert result["imported"] == 3
+    assert result["failed"] == 3
+    assert [error["row"] for error in result["errors"]] == [2, 3, 6]
+    titles = {task["title"] for task in authenticated_client.get("/tasks").json()["tasks"]}
+    assert titles == {"One", "Four", "Five"}
+
+
+def test_import_rejects_recurring_and_subtask_rows(authenticated_client):
+    parent = authenticated_client.post("/tasks", json={"title": "Parent"}).json()["id"]
+    lines = [
+        {"title": "Daily", "due_date": "2030-01-01", "recurrence_rule": "FREQ=DAILY"},
+        {"title": "Child", "parent_id": parent},
+        {"title": "Plain"},
+    ]
+    content = b"".join(orjson.dumps(line) + b"\n" for line in lines)
+
+    result = _import(authenticated_client, "tasks.jsonl", content).json()
+
+    assert result["imported"] == 1
+    assert [error["row"] for error in result["errors"]] == [1, 2]
+    assert result["errors"][0]["error"].startswith("recurrence_rule")
+    assert authenticated_client.get(f"/tasks/{parent}").json()["subtask_count"] == 0
+
+
+def test_import_needs_known_format(authenticated_client):
+    response = _import(authenticated_client, "tasks.txt", b"title\nOne\n")
+
+    assert response.status_code == 400
+
+
+def test_parquet_round_trip(authenticated_client):
+    pytest.importorskip("pyarrow")
+    _create_tasks(authenticated_client, 2)
+    exported = authenticated_client.get("/tasks/export?format=parquet").content
+
+    response = _import(authenticated_client, "tasks.parquet", exported)
+
+    assert response.json()["imported"] == 2
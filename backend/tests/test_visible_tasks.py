@@ -0,0 +1,113 @@
+import pytest
+
+
+@pytest.fixture
+def alice_and_bob(client, create_user_and_token):
+    """Alice owns 3 tasks, Bob owns 2 and shares one of them with Alice (edit)"""
+    alice_token = create_user_and_token("alice", "alice@test.com", "pass1234")
+    bob_token = create_user_and_token("bob", "bob@test.com", "pass1234")
+    alice = {"Authorization": f"Bearer {alice_token}"}
+    bob = {"Authorization": f"Bearer {bob_token}"}
+
+    for title, priority in [("A1", "low"), ("A2", "high"), ("A3", "low")]:
+        client.post("/tasks", json={"title": title, "priority": priority}, headers=alice)
+
+    shared_id = client.post(
+        "/tasks", json={"title": "B shared", "priority": "high"}, headers=bob
+    ).json()["id"]
+    client.post("/tasks", json={"title": "B private", "priority": "high"}, headers=bob)
+    client.post(
+        f"/tasks/{shared_id}/share",
+        json={"shared_with_username": "alice", "permission": "edit"},
+        headers=bob,
+    )
+    return alice, bob
+
+
+def test_scope_all_merges_owned_and_shared(client, alice_and_bob):
+    alice, _ = alice_and_bob
+
+    response = client.get("/tasks/visible", headers=alice)
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [item["task"]["title"] for item in items] == ["B shared", "A3", "A2", "A1"]
+    assert items[0]["permission"] == "edit"
+    assert items[0]["is_owner"] is False
+    assert items[0]["owner_username"] == "bob"
+    assert {item["permission"] for item in items[1:]} == {"owner"}
+    assert response.json()["next_cursor"] is None
+
+
+def test_scope_owned_and_shared(client, alice_and_bob):
+    alice, _ = alice_and_bob
+
+    owned = client.get("/tasks/visible?scope=owned", headers=alice).json()["items"]
+    shared = client.get("/tasks/visible?scope=shared", headers=alice).json()["items"]
+
+    assert len(owned) == 3
+    assert [item["task"]["title"] for item in shared] == ["B shared"]
+
+
+def test_filters_apply_to_both_branches(client, alice_and_bob):
+    alice, _ = alice_and_bob
+
+    items = client.get("/tasks/visible?priority=high", headers=alice).json()["items"]
+
+    assert [item["task"]["title"] for item in items] == ["B shared", "A2"]
+
+
+def test_keyset_pages_cover_everything_once(client, alice_and_bob):
+    alice, _ = alice_and_bob
+
+    titles = []
+    cursor = None
+    for _ in range(4):
+        params = {"limit": 1} if cursor is None else {"limit": 1, "cursor": cursor}
+        page = client.get("/tasks/visible", params=params, headers=alice).json()
+        titles.extend(item["task"]["title"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert titles == ["B shared", "A3", "A2", "A1"]
+    assert cursor is None
+
+
+def test_invalid_cursor_is_400(client, alice_and_bob):
+    alice, _ = alice_and_bob
+
+    response = client.get("/tasks/visible?cursor=not-a-cursor", headers=alice)
+
+    assert response.status_code == 400
+
+
+def test_shared_with_me_uses_shared_scope(client, alice_and_bob):
+    alice, _ = alice_and_bob
+
+    shared = client.get("/tasks/shared-with-me", headers=alice).json()
+
+    assert [item["task"]["title"] for item in shared] == ["B shared"]
+    assert shared[0]["permission"] == "edit"
+
+
+def test_shared_with_me_pages_by_header(client, alice_and_bob):
+    alice, bob = alice_and_bob
+    owned = client.get("/tasks/visible?scope=owned", headers=alice).json()["items"]
+    for item in owned:
+        client.post(
+            f"/tasks/{item['task']['id']}/share",
+            json={"shared_with_username": "bob", "permission": "view"},
+            headers=alice,
+        )
+
+    first = client.get("/tasks/shared-with-me?limit=2", headers=bob)
+    second = client.get(
+        "/tasks/shared-with-me",
+        params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]},
+        headers=bob,
+    )
+
+    assert [item["task"]["title"] for item in first.json()] == ["A3", "A2"]
+    assert [item["task"]["title"] for item in second.json()] == ["A1"]
+    assert "X-Next-Cursor" not in second.headers
@@ -8,12 +8,18 @@ function ActivityTimeline({ taskId, isExpanded }) {
   const [activities, setActivities] = useState([]);
   const [loading, setLoading] = useState(false);
   const [isTimelineExpanded, setIsTimelineExpanded] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
 
-  const fetchTimeline = useCallback(async () => {
+  const fetchTimeline = useCallback(async (cursor = null) => {
     setLoading(true);
     try {
-      const response = await taskService.getTaskActivity(taskId);
-      setActivities(response.data);
+      const response = await taskService.getTaskActivity(
+        taskId,
+        cursor ? { cursor } : undefined
+      );
+      const { items, next_cursor: next } = response.data;
+      setActivities((prev) => (cursor ? [...prev, ...items] : items));
+      setNextCursor(next);
     } catch (err) {
       console.error('Failed to fetch timeline:', err);
       toast.error('Failed to load history');
@@ -78,6 +84,15 @@ function ActivityTimeline({ taskId, isExpanded }) {
               ))}
             </div>
           )}
+
+          {!loading && nextCursor && (
+            <button
+              onClick={() => fetchTimeline(nextCursor)}
+              className="mt-1 w-full cursor-pointer rounded py-1 text-center text-[10px] text-zinc-500 transition-colors hover:bg-zinc-800/30 hover:text-zinc-300"
+            >
+              Show more
+            </button>
+          )}
         </div>
       )}
     </div>
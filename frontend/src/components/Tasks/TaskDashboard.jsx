@@ -1,6 +1,7 @@
 import { Activity, BarChart3, Filter, FolderOpen, Plus, Share2, Users, X } from 'lucide-react';
 import { useCallback, useEffect, useRef, useState } from 'react';
 import { toast } from 'sonner';
+import { useEvents } from '../../hooks/useEvents';
 import { useTasks } from '../../hooks/useTasks';
 import { taskService } from '../../services/taskService';
 import { userService } from '../../services/userService'; // Import userService
@@ -107,6 +108,24 @@ function TaskDashboard({ onLogout }) {
     fetchStats,
   } = useTasks(filters, page, view);
 
+  // Refetch when a collaborator changes something we can see; own changes
+  // are already reflected locally. Bursts are coalesced into one refetch.
+  const liveRefreshTimerRef = useRef(null);
+  const handleLiveEvent = useCallback(
+    (event) => {
+      if (event.type !== 'resync' && event.actor_id === user?.id) return;
+      clearTimeout(liveRefreshTimerRef.current);
+      liveRefreshTimerRef.current = setTimeout(() => {
+        void fetchTasks();
+        void fetchStats();
+      }, 300);
+    },
+    [user?.id, fetchTasks, fetchStats]
+  );
+  useEvents(handleLiveEvent, Boolean(user));
+
+  useEffect(() => () => clearTimeout(liveRefreshTimerRef.current), []);
+
   // Use userService instead of raw api call
   const fetchProfile = async (isUpdate = false) => {
     try {
@@ -18,7 +18,7 @@ export function useActivityLog(resourceType, page) {
 
     try {
       const params = {
-        limit: ITEMS_PER_PAGE + 1,
+        limit: ITEMS_PER_PAGE,
         offset: (page - 1) * ITEMS_PER_PAGE,
         ...(resourceType && { resource_type: resourceType }),
       };
@@ -26,14 +26,8 @@ export function useActivityLog(resourceType, page) {
         params,
         newController.signal
       );
-      const items = response.data;
-      if (items.length > ITEMS_PER_PAGE) {
-        setActivities(items.slice(0, ITEMS_PER_PAGE));
-        setHasMore(true);
-      } else {
-        setActivities(items);
-        setHasMore(false);
-      }
+      setActivities(response.data.items);
+      setHasMore(response.data.next_cursor !== null);
     } catch (err) {
       if (err.name !== 'CanceledError') toast.error('Failed to load activity');
     } finally {
@@ -0,0 +1,36 @@
+import { useEffect, useRef } from 'react';
+import { buildApiUrl } from '../config/env';
+
+// Subscribes to GET /events. `onEvent` receives each change payload, plus
+// { type: 'resync' } whenever the client should refetch from scratch
+// (first connect, reconnects, or after falling behind the server buffer).
+export function useEvents(onEvent, enabled = true) {
+  const handlerRef = useRef(onEvent);
+
+  useEffect(() => {
+    handlerRef.current = onEvent;
+  }, [onEvent]);
+
+  useEffect(() => {
+    if (!enabled || typeof EventSource === 'undefined') return undefined;
+
+    const source = new EventSource(buildApiUrl('/events'), {
+      withCredentials: true,
+    });
+    let connectedOnce = false;
+
+    const onChange = (event) => handlerRef.current?.(JSON.parse(event.data));
+    const onResync = () => handlerRef.current?.({ type: 'resync' });
+    const onReady = () => {
+      // Changes may have been missed while disconnected
+      if (connectedOnce) onResync();
+      connectedOnce = true;
+    };
+
+    source.addEventListener('change', onChange);
+    source.addEventListener('resync', onResync);
+    source.addEventListener('ready', onReady);
+
+    return () => source.close();
+  }, [enabled]);
+}
@@ -37,6 +37,7 @@ export const taskService = {
     api.delete(`/tasks/${taskId}/share/${username}`),
 
   // Activity
-  getTaskActivity: (taskId) => api.get(`/activity/tasks/${taskId}`),
+  getTaskActivity: (taskId, params) =>
+    api.get(`/activity/tasks/${taskId}`, { params }),
   getGlobalActivity: (params, signal) => api.get('/activity', { params, signal }),
 };